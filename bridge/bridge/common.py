@@ -237,6 +237,9 @@ else:
     }
     RABBIT_MQ_QUEUE = "Klever jobs and tasks"
 
+# Exchange for notifying Klever Core about changes of statuses of tasks of particular decisions
+RABBIT_MQ_TASKS_EXCHANGE = 'Klever task changes'
+
 # Celery, using the same RabbitMQ server
 CELERY_BROKER_URL = 'amqp://{username}:{password}@{host}:{port}'.format(**RABBIT_MQ)
 CELERY_RESULT_BACKEND = 'django-db'
@@ -258,9 +261,22 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': timedelta(hours=1),
         'args': (1,)  # Clear cache objects older than 1 hour
     },
+    'remove-old-error-trace-cache': {
+        'task': 'reports.tasks.clear_old_error_trace_cache',
+        'schedule': timedelta(hours=1),
+        'args': (24,)  # Clear cache objects older than 24 hours
+    },
+    'fold-decision-aggregates': {
+        'task': 'caches.tasks.fold_aggregates',
+        'schedule': timedelta(minutes=1)
+    },
 }
 
 ENABLE_CALL_LOGS = False
 ENABLE_UPLOAD_REPORTS_LOGS = False
 
 UPLOAD_LOG_FILE = 'upload.log'
+
+# Attributes of leaves that are often used for sorting and filtering leaves lists. Expression indexes for them are
+# created by the "attr-indexes" management command.
+INDEXED_ATTRS = ['Requirements specification', 'Program fragment']
@@ -15,6 +15,8 @@
 # limitations under the License.
 #
 
+import os
+
 from django.core.management.base import BaseCommand, CommandError
 
 from bridge.utils import logger
@@ -62,7 +64,7 @@ class Command(BaseCommand):
         if options['all'] or options['marks'] or options['marks_s']:
             self.stdout.write('Safe marks population started')
             try:
-                res = PopulateSafeMarks()
+                res = PopulateSafeMarks(processes=os.cpu_count() or 1)
             except Exception as e:
                 logger.exception(e)
                 raise CommandError('Safe marks population failed: %s' % e)
@@ -72,7 +74,7 @@ class Command(BaseCommand):
         if options['all'] or options['marks'] or options['marks_u']:
             self.stdout.write('Unsafe marks population started')
             try:
-                res = PopulateUnsafeMarks()
+                res = PopulateUnsafeMarks(processes=os.cpu_count() or 1)
             except Exception as e:
                 logger.exception(e)
                 raise CommandError('Unsafe marks population failed: %s' % e)
@@ -82,7 +84,7 @@ class Command(BaseCommand):
         if options['all'] or options['marks'] or options['marks_f']:
             self.stdout.write('Unknown marks population started')
             try:
-                res = PopulateUnknownMarks()
+                res = PopulateUnknownMarks(processes=os.cpu_count() or 1)
             except Exception as e:
                 logger.exception(e)
                 raise CommandError('Unknown marks population failed: %s' % e)
@@ -554,9 +554,10 @@ $(document).ready(function () {
     });
 
     $('.page-link-icon').click(function () {
-        window.location.replace(
-            get_url_with_get_parameters(window.location.href, {'page': $(this).data('page-number')})
-        );
+        let page_params = {'page': $(this).data('page-number')};
+        // Lists of reports seek neighbouring pages by cursors
+        if ($(this).data('cursor')) page_params['cursor'] = $(this).data('cursor');
+        window.location.replace(get_url_with_get_parameters(window.location.href, page_params));
     });
 
     $('.view-type-buttons').each(function () {
@@ -17,11 +17,13 @@
 
 import os
 import json
+import pika
 
 from django.conf import settings
+from django.db import transaction
 from django.urls import reverse
 
-from bridge.utils import KleverTestCase
+from bridge.utils import KleverTestCase, RMQPublisher
 from bridge.vars import USER_ROLES
 
 from users.models import User
@@ -146,3 +148,116 @@ class TestPopulation(KleverTestCase):
         # Population after service and manager were created by function call
         response = self.client.post(reverse('population'))
         self.assertEqual(response.status_code, 200)
+
+
+class FakeRMQChannel:
+    def __init__(self, broker):
+        self.is_open = True
+        self._broker = broker
+
+    def basic_publish(self, exchange, routing_key, body, properties=None):
+        if self._broker.failures:
+            self._broker.failures -= 1
+            self.is_open = False
+            raise pika.exceptions.StreamLostError('Connection was lost')
+        self._broker.messages.append((exchange, routing_key, body))
+
+
+class FakeRMQConnection:
+    def __init__(self, broker):
+        self.is_open = True
+        self.channel = FakeRMQChannel(broker)
+
+    def process_data_events(self, time_limit=None):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+class FakeRMQBroker:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.connections = 0
+        self.messages = []
+
+    def connect(self):
+        self.connections += 1
+        rmq_connection = FakeRMQConnection(self)
+        return rmq_connection, rmq_connection.channel
+
+
+class TestRMQPublisher(KleverTestCase):
+    def test_publish_on_commit(self):
+        broker = FakeRMQBroker()
+        publisher = RMQPublisher(connection_factory=broker.connect)
+        with self.captureOnCommitCallbacks(execute=True):
+            publisher.publish('', 'queue', 'message 1')
+            publisher.publish('exchange', 'key', 'message 2')
+            # Nothing is sent until commit
+            self.assertEqual(broker.messages, [])
+        self.assertEqual(broker.messages, [('', 'queue', 'message 1'), ('exchange', 'key', 'message 2')])
+
+        # The pooled connection is reused
+        with self.captureOnCommitCallbacks(execute=True):
+            publisher.publish('', 'queue', 'message 3')
+        self.assertEqual(len(broker.messages), 3)
+        self.assertEqual(broker.connections, 1)
+
+    def test_rollback(self):
+        broker = FakeRMQBroker()
+        publisher = RMQPublisher(connection_factory=broker.connect)
+        with self.captureOnCommitCallbacks(execute=True):
+            publisher.publish('', 'queue', 'message 1')
+            try:
+                with transaction.atomic():
+                    publisher.publish('', 'queue', 'message 2')
+                    raise ValueError
+            except ValueError:
+                pass
+        # Messages published within the rolled back savepoint are not sent
+        self.assertEqual(broker.messages, [('', 'queue', 'message 1')])
+
+    def test_batching(self):
+        broker = FakeRMQBroker()
+        publisher = RMQPublisher(connection_factory=broker.connect)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            publisher.publish('', 'queue', 'message 1')
+            publisher.publish('exchange', 'key', 'message 2')
+            with transaction.atomic():
+                publisher.publish('', 'queue', 'message 3')
+                publisher.publish('', 'queue', 'message 4')
+            try:
+                with transaction.atomic():
+                    publisher.publish('', 'queue', 'message 5')
+                    publisher.publish('', 'queue', 'message 6')
+                    raise ValueError
+            except ValueError:
+                pass
+            publisher.publish('', 'queue', 'message 7')
+        # Messages of each savepoint are sent at once in the order of publishing
+        self.assertEqual(len(callbacks), 3)
+        self.assertEqual(broker.messages, [
+            ('', 'queue', 'message 1'), ('exchange', 'key', 'message 2'), ('', 'queue', 'message 3'),
+            ('', 'queue', 'message 4'), ('', 'queue', 'message 7')
+        ])
+
+    def test_reconnect(self):
+        broker = FakeRMQBroker(failures=1)
+        publisher = RMQPublisher(connection_factory=broker.connect)
+        publisher.send([('', 'queue', 'message 1'), ('', 'queue', 'message 2')])
+        self.assertEqual(broker.messages, [('', 'queue', 'message 1'), ('', 'queue', 'message 2')])
+        self.assertEqual(broker.connections, 2)
+
+        broker.failures = RMQPublisher.attempts
+        with self.assertRaises(pika.exceptions.StreamLostError):
+            publisher.send([('', 'queue', 'message 3')])
+
+    def test_failure_after_commit(self):
+        broker = FakeRMQBroker(failures=RMQPublisher.attempts)
+        publisher = RMQPublisher(connection_factory=broker.connect)
+        # The transaction is committed already, so the failure is logged rather than raised
+        with self.assertLogs('bridge', level='ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                publisher.publish('', 'queue', 'message 1')
+        self.assertEqual(broker.messages, [])
@@ -43,3 +43,4 @@ handler500 = 'bridge.views.error_500_view'
 
 with RMQConnect() as channel:
     channel.queue_declare(queue=settings.RABBIT_MQ_QUEUE, durable=True)
+    channel.exchange_declare(exchange=settings.RABBIT_MQ_TASKS_EXCHANGE, exchange_type='direct', durable=True)
@@ -16,12 +16,14 @@
 #
 
 import io
+import functools
 import hashlib
 import logging
 import os
 import pika
 import shutil
 import tempfile
+import threading
 import time
 import zipfile
 import json
@@ -30,7 +32,7 @@ from urllib.parse import quote
 from django.conf import settings
 from django.core.exceptions import PermissionDenied
 from django.core.files import File
-from django.db import connection
+from django.db import connection, transaction
 from django.db.models import FileField
 from django.db.transaction import Atomic
 from django.http import HttpResponseBadRequest, Http404
@@ -345,6 +347,122 @@ class RMQConnect:
         self._connection.close()
 
 
+class RMQPublisher:
+    """
+    Process-wide publisher of persistent RabbitMQ messages.
+
+    Connections with channels in the confirm mode are kept in a pool and reused by all threads, so there is no need to
+    connect to RabbitMQ for each message. Broken connections are replaced with new ones.
+    """
+    pool_size = 4
+    attempts = 3
+    # Heartbeats and the timeout of blocked connections let waiting for confirmations fail instead of hanging forever
+    heartbeat = 60
+    blocked_connection_timeout = 60
+
+    def __init__(self, connection_factory=None):
+        self._connection_factory = connection_factory or self.__connect
+        self._pool = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def __connect(self):
+        rmq_connection = pika.BlockingConnection(pika.ConnectionParameters(
+            host=settings.RABBIT_MQ['host'], heartbeat=self.heartbeat,
+            blocked_connection_timeout=self.blocked_connection_timeout,
+            credentials=pika.credentials.PlainCredentials(
+                settings.RABBIT_MQ['username'], settings.RABBIT_MQ['password']
+            )
+        ))
+        channel = rmq_connection.channel()
+        channel.confirm_delivery()
+        return rmq_connection, channel
+
+    def __acquire(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Connections of the parent process can't be used after fork
+                self._pool = []
+                self._pid = os.getpid()
+            while self._pool:
+                rmq_connection, channel = self._pool.pop()
+                if self.__is_alive(rmq_connection, channel):
+                    return rmq_connection, channel
+        return self._connection_factory()
+
+    def __is_alive(self, rmq_connection, channel):
+        if not rmq_connection.is_open or not channel.is_open:
+            return False
+        try:
+            # Process heartbeats missed while the connection was idle in the pool
+            rmq_connection.process_data_events(time_limit=0)
+        except pika.exceptions.AMQPError:
+            self.__close(rmq_connection)
+            return False
+        return rmq_connection.is_open and channel.is_open
+
+    def __release(self, rmq_connection, channel):
+        with self._lock:
+            if self._pid == os.getpid() and len(self._pool) < self.pool_size:
+                self._pool.append((rmq_connection, channel))
+                return
+        self.__close(rmq_connection)
+
+    def __close(self, rmq_connection):
+        try:
+            rmq_connection.close()
+        except pika.exceptions.AMQPError:
+            pass
+
+    def publish(self, exchange, routing_key, body):
+        """
+        Publish the message. Within a transaction it is sent just after commit and it is not sent at all at rollback,
+        so consumers always find in the database everything that the message is about. The data is committed already
+        when the message is sent, so failures are logged rather than raised.
+        """
+        message = (exchange, routing_key, body)
+        db_connection = transaction.get_connection()
+        if db_connection.in_atomic_block and db_connection.run_on_commit:
+            # Messages of the same savepoint are queued to the same callback and sent at once. Django discards callbacks
+            # of rolled back savepoints, so their messages are dropped with them. A new callback is registered when the
+            # savepoint differs or other callbacks were registered in between to keep the order of messages.
+            sids, callback = db_connection.run_on_commit[-1][:2]
+            if sids == set(db_connection.savepoint_ids) and getattr(callback, 'func', None) == self.__send_committed:
+                callback.args[0].append(message)
+                return
+        transaction.on_commit(functools.partial(self.__send_committed, [message]))
+
+    def __send_committed(self, messages):
+        try:
+            self.send(messages)
+        except pika.exceptions.AMQPError as e:
+            logger.exception('Publishing to RabbitMQ failed: {!r}'.format(e))
+
+    def send(self, messages):
+        sent = 0
+        for attempt in range(1, self.attempts + 1):
+            rmq_connection, channel = self.__acquire()
+            try:
+                for exchange, routing_key, body in messages[sent:]:
+                    channel.basic_publish(
+                        exchange=exchange, routing_key=routing_key, body=body,
+                        properties=pika.BasicProperties(delivery_mode=2)
+                    )
+                    sent += 1
+            except (pika.exceptions.AMQPConnectionError, pika.exceptions.AMQPChannelError) as e:
+                # The connection was lost or the broker closed the channel, repeat with a new connection
+                self.__close(rmq_connection)
+                if attempt == self.attempts:
+                    raise
+                logger.warning('Publishing to RabbitMQ failed, reconnecting: {!r}'.format(e))
+                continue
+            self.__release(rmq_connection, channel)
+            return
+
+
+rmq_publisher = RMQPublisher()
+
+
 class BridgeAPIPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
@@ -0,0 +1,13 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('caches', '0003_alter_reportsafecache_verdict_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportunknowncache', name='problem_description', field=models.TextField(null=True)
+        ),
+    ]
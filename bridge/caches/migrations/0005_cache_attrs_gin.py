@@ -0,0 +1,20 @@
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('caches', '0004_reportunknowncache_problem_description'),
+    ]
+
+    operations = [
+        migrations.AddIndex(model_name='reportsafecache', index=django.contrib.postgres.indexes.GinIndex(
+            fields=['attrs'], name='cache_safe_attrs_gin', opclasses=['jsonb_path_ops']
+        )),
+        migrations.AddIndex(model_name='reportunsafecache', index=django.contrib.postgres.indexes.GinIndex(
+            fields=['attrs'], name='cache_unsafe_attrs_gin', opclasses=['jsonb_path_ops']
+        )),
+        migrations.AddIndex(model_name='reportunknowncache', index=django.contrib.postgres.indexes.GinIndex(
+            fields=['attrs'], name='cache_unknown_attrs_gin', opclasses=['jsonb_path_ops']
+        )),
+    ]
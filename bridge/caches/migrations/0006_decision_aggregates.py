@@ -0,0 +1,233 @@
+#
+# Copyright (c) 2019 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Deltas of aggregates are got from transition tables of statement level triggers on leaves caches. Triggers just
+# append grouped deltas to delta tables, so writers of leaves caches of the same decision do not wait for each other on
+# locks of aggregate rows. Deltas are applied to aggregates by fold_decision_aggregates() before aggregates are read
+# and periodically.
+CHANGED_ROWS = {
+    'INSERT': ('REFERENCING NEW TABLE AS new_rows', 'SELECT *, 1 AS delta FROM new_rows'),
+    'UPDATE': (
+        'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows',
+        'SELECT *, 1 AS delta FROM new_rows UNION ALL SELECT *, -1 AS delta FROM old_rows'
+    ),
+    'DELETE': ('REFERENCING OLD TABLE AS old_rows', 'SELECT *, -1 AS delta FROM old_rows')
+}
+
+LEAF_AGGREGATES = [
+    ('cache_decision_verdicts', ['decision_id', 'leaf_type', 'verdict'], ['total', 'manual'], """
+SELECT decision_id, '{leaf_type}' AS leaf_type, verdict, SUM(delta) AS total,
+  SUM(CASE WHEN marks_confirmed > 0 THEN delta ELSE 0 END) AS manual
+FROM ({changes}) AS c GROUP BY decision_id, verdict
+HAVING SUM(delta) <> 0 OR SUM(CASE WHEN marks_confirmed > 0 THEN delta ELSE 0 END) <> 0
+ORDER BY decision_id, verdict"""),
+    ('cache_decision_tags', ['decision_id', 'leaf_type', 'tag'], ['number'], """
+SELECT decision_id, '{leaf_type}' AS leaf_type, t.tag, SUM(delta) AS number
+FROM ({changes}) AS c CROSS JOIN LATERAL jsonb_object_keys(c.tags) AS t(tag) GROUP BY decision_id, t.tag
+HAVING SUM(delta) <> 0 ORDER BY decision_id, t.tag"""),
+    ('cache_decision_attrs', ['decision_id', 'name', 'value'], ['safes', 'unsafes', 'unknowns'], """
+SELECT decision_id, attr.key AS name, attr.value AS value, {counters}
+FROM ({changes}) AS c CROSS JOIN LATERAL jsonb_each_text(c.attrs) AS attr GROUP BY decision_id, attr.key, attr.value
+HAVING SUM(delta) <> 0 ORDER BY decision_id, attr.key, attr.value""")
+]
+
+UNKNOWN_AGGREGATES = [
+    ('cache_decision_unknowns', ['decision_id', 'component'], ['total', 'unmarked'], """
+SELECT c.decision_id, r.component, SUM(c.delta) AS total,
+  SUM(CASE WHEN c.marks_total = 0 THEN c.delta ELSE 0 END) AS unmarked
+FROM ({changes}) AS c INNER JOIN report_unknown AS r ON r.report_ptr_id = c.report_id
+GROUP BY c.decision_id, r.component
+HAVING SUM(c.delta) <> 0 OR SUM(CASE WHEN c.marks_total = 0 THEN c.delta ELSE 0 END) <> 0
+ORDER BY c.decision_id, r.component"""),
+    ('cache_decision_problems', ['decision_id', 'component', 'problem'], ['number'], """
+SELECT c.decision_id, r.component, p.problem, SUM(c.delta) AS number
+FROM ({changes}) AS c INNER JOIN report_unknown AS r ON r.report_ptr_id = c.report_id
+  CROSS JOIN LATERAL jsonb_object_keys(c.problems) AS p(problem)
+GROUP BY c.decision_id, r.component, p.problem HAVING SUM(c.delta) <> 0
+ORDER BY c.decision_id, r.component, p.problem"""),
+    ('cache_decision_attrs', ['decision_id', 'name', 'value'], ['safes', 'unsafes', 'unknowns'], """
+SELECT decision_id, attr.key AS name, attr.value AS value, {counters}
+FROM ({changes}) AS c CROSS JOIN LATERAL jsonb_each_text(c.attrs) AS attr GROUP BY decision_id, attr.key, attr.value
+HAVING SUM(delta) <> 0 ORDER BY decision_id, attr.key, attr.value""")
+]
+
+CACHE_TABLES = [
+    ('cache_safe', LEAF_AGGREGATES, {'leaf_type': 'safe', 'attrs_column': 'safes'}),
+    ('cache_unsafe', LEAF_AGGREGATES, {'leaf_type': 'unsafe', 'attrs_column': 'unsafes'}),
+    ('cache_unknown', UNKNOWN_AGGREGATES, {'attrs_column': 'unknowns'})
+]
+
+
+def aggregated_rows(select_sql, changes, params):
+    counters = ', '.join('{} AS {}'.format('SUM(delta)' if column == params['attrs_column'] else '0', column)
+                         for column in ('safes', 'unsafes', 'unknowns'))
+    return select_sql.format(changes=changes, counters=counters, leaf_type=params.get('leaf_type'))
+
+
+def apply_sql(db_table, keys, counters, rows_sql):
+    return 'INSERT INTO {table} AS a ({columns}) {rows} ON CONFLICT ({keys}) DO UPDATE SET {changes};'.format(
+        table=db_table, rows=rows_sql, columns=', '.join(keys + counters), keys=', '.join(keys),
+        changes=', '.join('{0} = a.{0} + EXCLUDED.{0}'.format(column) for column in counters)
+    )
+
+
+def aggregate_tables():
+    # Each aggregate table is listed once with its keys and counters
+    tables = {}
+    for cache_table, aggregates, params in CACHE_TABLES:
+        for db_table, keys, counters, select_sql in aggregates:
+            tables[db_table] = (keys, counters)
+    return tables
+
+
+def delta_tables_sql():
+    sql = []
+    for db_table, (keys, counters) in aggregate_tables().items():
+        sql.append('CREATE TABLE {table}_delta AS SELECT {columns} FROM {table} WITH NO DATA;'.format(
+            table=db_table, columns=', '.join(keys + counters)
+        ))
+        sql.append('CREATE INDEX {0}_delta_decision_id ON {0}_delta (decision_id);'.format(db_table))
+    return sql
+
+
+def drop_delta_tables_sql():
+    return list('DROP TABLE IF EXISTS {}_delta;'.format(db_table) for db_table in aggregate_tables())
+
+
+def fold_function_sql():
+    # Deleted deltas are not applied twice by concurrent folds, and rows of deleted decisions are just dropped.
+    # Aggregate rows are locked in the same order by all folds.
+    statements = '\n'.join(
+        'WITH d AS (DELETE FROM {table}_delta WHERE folded_decision IS NULL OR decision_id = folded_decision '
+        'RETURNING *)\n{apply}'.format(table=db_table, apply=apply_sql(db_table, keys, counters, (
+            'SELECT {keys}, {sums} FROM d WHERE EXISTS (SELECT 1 FROM decision WHERE decision.id = d.decision_id) '
+            'GROUP BY {keys} ORDER BY {keys}'
+        ).format(keys=', '.join(keys), sums=', '.join('SUM({0}) AS {0}'.format(column) for column in counters))))
+        for db_table, (keys, counters) in aggregate_tables().items()
+    )
+    return ['CREATE FUNCTION fold_decision_aggregates(folded_decision integer) RETURNS void LANGUAGE plpgsql AS $$\n'
+            'BEGIN\n{}\nEND;\n$$;'.format(statements)]
+
+
+def triggers_sql():
+    sql = []
+    for cache_table, aggregates, params in CACHE_TABLES:
+        for operation, (referencing, changes) in CHANGED_ROWS.items():
+            function_name = '{}_{}_aggregates'.format(cache_table, operation.lower())
+            statements = '\n'.join(
+                'INSERT INTO {}_delta ({}) {};'.format(
+                    db_table, ', '.join(keys + counters), aggregated_rows(select_sql, changes, params)
+                ) for db_table, keys, counters, select_sql in aggregates
+            )
+            sql.append('CREATE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$\n'
+                       'BEGIN\n{statements}\nRETURN NULL;\nEND;\n$$;'.format(name=function_name, statements=statements))
+            sql.append('CREATE TRIGGER {name} AFTER {operation} ON {table} {referencing} '
+                       'FOR EACH STATEMENT EXECUTE PROCEDURE {name}();'.format(
+                           name=function_name, operation=operation, table=cache_table, referencing=referencing
+                       ))
+    return sql
+
+
+def drop_triggers_sql():
+    sql = []
+    for cache_table, aggregates, params in CACHE_TABLES:
+        for operation in CHANGED_ROWS:
+            function_name = '{}_{}_aggregates'.format(cache_table, operation.lower())
+            sql.append('DROP TRIGGER IF EXISTS {} ON {};'.format(function_name, cache_table))
+            sql.append('DROP FUNCTION IF EXISTS {}();'.format(function_name))
+    return sql
+
+
+def fill_aggregates_sql():
+    # Aggregate existing leaves caches
+    return list(
+        apply_sql(db_table, keys, counters, aggregated_rows(
+            select_sql, 'SELECT *, 1 AS delta FROM {}'.format(cache_table), params
+        ))
+        for cache_table, aggregates, params in CACHE_TABLES
+        for db_table, keys, counters, select_sql in aggregates
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('jobs', '0001_initial'),
+        ('reports', '0004_errortracecache'),
+        ('caches', '0005_cache_attrs_gin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(name='DecisionVerdictsCache', fields=[
+            ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ('leaf_type', models.CharField(max_length=6)),
+            ('verdict', models.CharField(max_length=1)),
+            ('total', models.IntegerField(default=0)),
+            ('manual', models.IntegerField(default=0)),
+            ('decision', models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobs.decision'
+            )),
+        ], options={
+            'db_table': 'cache_decision_verdicts', 'unique_together': {('decision', 'leaf_type', 'verdict')}
+        }),
+        migrations.CreateModel(name='DecisionTagsCache', fields=[
+            ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ('leaf_type', models.CharField(max_length=6)),
+            ('tag', models.CharField(max_length=1024)),
+            ('number', models.IntegerField(default=0)),
+            ('decision', models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobs.decision'
+            )),
+        ], options={'db_table': 'cache_decision_tags', 'unique_together': {('decision', 'leaf_type', 'tag')}}),
+        migrations.CreateModel(name='DecisionUnknownsCache', fields=[
+            ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ('component', models.CharField(max_length=20)),
+            ('total', models.IntegerField(default=0)),
+            ('unmarked', models.IntegerField(default=0)),
+            ('decision', models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobs.decision'
+            )),
+        ], options={'db_table': 'cache_decision_unknowns', 'unique_together': {('decision', 'component')}}),
+        migrations.CreateModel(name='DecisionProblemsCache', fields=[
+            ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ('component', models.CharField(max_length=20)),
+            ('problem', models.CharField(max_length=20)),
+            ('number', models.IntegerField(default=0)),
+            ('decision', models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobs.decision'
+            )),
+        ], options={
+            'db_table': 'cache_decision_problems', 'unique_together': {('decision', 'component', 'problem')}
+        }),
+        migrations.CreateModel(name='DecisionAttrsCache', fields=[
+            ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ('name', models.CharField(max_length=64)),
+            ('value', models.CharField(max_length=255)),
+            ('safes', models.IntegerField(default=0)),
+            ('unsafes', models.IntegerField(default=0)),
+            ('unknowns', models.IntegerField(default=0)),
+            ('decision', models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobs.decision'
+            )),
+        ], options={'db_table': 'cache_decision_attrs', 'unique_together': {('decision', 'name', 'value')}}),
+        migrations.RunSQL(delta_tables_sql(), drop_delta_tables_sql()),
+        migrations.RunSQL(fold_function_sql(), ['DROP FUNCTION IF EXISTS fold_decision_aggregates(integer);']),
+        migrations.RunSQL(triggers_sql(), drop_triggers_sql()),
+        migrations.RunSQL(fill_aggregates_sql(), migrations.RunSQL.noop),
+    ]
@@ -17,14 +17,15 @@
 
 import uuid
 
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from bridge.vars import SAFE_VERDICTS, UNSAFE_VERDICTS, UNSAFE_STATUS
 
 from jobs.models import Decision
-from reports.models import ReportSafe, ReportUnsafe, ReportUnknown
-from marks.models import MarkSafe, MarkUnsafe, MarkUnknown
+from reports.models import ReportSafe, ReportUnsafe, ReportUnknown, MAX_COMPONENT_LEN
+from marks.models import MarkSafe, MarkUnsafe, MarkUnknown, MAX_PROBLEM_LEN
 
 ASSOCIATION_CHANGE_KIND = (
     ('0', _('Changed')),
@@ -45,6 +46,7 @@ class ReportSafeCache(models.Model):
 
     class Meta:
         db_table = 'cache_safe'
+        indexes = [GinIndex(fields=['attrs'], opclasses=['jsonb_path_ops'], name='cache_safe_attrs_gin')]
 
 
 class ReportUnsafeCache(models.Model):
@@ -60,6 +62,7 @@ class ReportUnsafeCache(models.Model):
 
     class Meta:
         db_table = 'cache_unsafe'
+        indexes = [GinIndex(fields=['attrs'], opclasses=['jsonb_path_ops'], name='cache_unsafe_attrs_gin')]
 
 
 class ReportUnknownCache(models.Model):
@@ -70,9 +73,12 @@ class ReportUnknownCache(models.Model):
     marks_automatic = models.PositiveIntegerField(default=0)
     marks_total = models.PositiveIntegerField(default=0)
     problems = models.JSONField(default=dict)
+    # Problem description extracted from the report archive to match marks without unpacking it
+    problem_description = models.TextField(null=True)
 
     class Meta:
         db_table = 'cache_unknown'
+        indexes = [GinIndex(fields=['attrs'], opclasses=['jsonb_path_ops'], name='cache_unknown_attrs_gin')]
 
 
 class SafeMarkAssociationChanges(models.Model):
@@ -118,3 +124,69 @@ class UnknownMarkAssociationChanges(models.Model):
 
     class Meta:
         db_table = 'cache_unknown_mark_associations_changes'
+
+
+# Aggregates of leaves caches for decision pages. Database triggers on leaves caches tables append their deltas to
+# delta tables in the same transaction as leaves caches are changed (see migration 0006). Deltas are applied by
+# fold_decision_aggregates().
+
+class DecisionVerdictsCache(models.Model):
+    decision = models.ForeignKey(Decision, models.CASCADE, related_name='+')
+    # Either 'safe' or 'unsafe'
+    leaf_type = models.CharField(max_length=6)
+    verdict = models.CharField(max_length=1)
+    total = models.IntegerField(default=0)
+    # Number of leaves with confirmed marks
+    manual = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'cache_decision_verdicts'
+        unique_together = [('decision', 'leaf_type', 'verdict')]
+
+
+class DecisionTagsCache(models.Model):
+    decision = models.ForeignKey(Decision, models.CASCADE, related_name='+')
+    # Either 'safe' or 'unsafe'
+    leaf_type = models.CharField(max_length=6)
+    tag = models.CharField(max_length=1024)
+    number = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'cache_decision_tags'
+        unique_together = [('decision', 'leaf_type', 'tag')]
+
+
+class DecisionUnknownsCache(models.Model):
+    decision = models.ForeignKey(Decision, models.CASCADE, related_name='+')
+    component = models.CharField(max_length=MAX_COMPONENT_LEN)
+    total = models.IntegerField(default=0)
+    # Number of unknowns without marks
+    unmarked = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'cache_decision_unknowns'
+        unique_together = [('decision', 'component')]
+
+
+class DecisionProblemsCache(models.Model):
+    decision = models.ForeignKey(Decision, models.CASCADE, related_name='+')
+    component = models.CharField(max_length=MAX_COMPONENT_LEN)
+    problem = models.CharField(max_length=MAX_PROBLEM_LEN)
+    number = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'cache_decision_problems'
+        unique_together = [('decision', 'component', 'problem')]
+
+
+class DecisionAttrsCache(models.Model):
+    decision = models.ForeignKey(Decision, models.CASCADE, related_name='+')
+    name = models.CharField(max_length=64)
+    value = models.CharField(max_length=255)
+    safes = models.IntegerField(default=0)
+    unsafes = models.IntegerField(default=0)
+    unknowns = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'cache_decision_attrs'
+        unique_together = [('decision', 'name', 'value')]
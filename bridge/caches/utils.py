@@ -19,11 +19,12 @@ import copy
 import uuid
 from collections import defaultdict
 
-from django.db import transaction
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import connection, transaction
 from django.db.models import Q, F, Count
 from django.utils.functional import cached_property
 
-from bridge.vars import SAFE_VERDICTS, UNSAFE_VERDICTS, ASSOCIATION_TYPE
+from bridge.vars import SAFE_VERDICTS, UNSAFE_VERDICTS, ASSOCIATION_TYPE, MARK_UNSAFE
 
 from marks.models import (
     MarkSafe, MarkSafeHistory, MarkUnsafe, MarkUnsafeHistory, MarkUnknown,
@@ -612,6 +613,137 @@ class RecalculateUnknownCache:
         update_cache_atomic(cache_queryset, new_data)
 
 
+class BulkRecalculateCacheBase:
+    cache_model = None
+    markreport_model = None
+    mark_model = None
+    fields = ('marks_total', 'marks_automatic', 'marks_confirmed')
+    chunk_size = 10000
+
+    def __init__(self, reports_ids):
+        assert self.cache_model and self.markreport_model
+        reports_ids = sorted(reports_ids)
+        for i in range(0, len(reports_ids), self.chunk_size):
+            self.__recalculate(reports_ids[i:i + self.chunk_size])
+
+    def get_default_data(self):
+        return {'marks_total': 0, 'marks_automatic': 0, 'marks_confirmed': 0}
+
+    def get_aggregations(self):
+        return {}
+
+    def collect(self, new_data, reports_ids, aggregated):
+        pass
+
+    def get_tags(self, reports_ids):
+        # Numbers of associated marks tags for each report
+        tags_data = defaultdict(dict)
+        with connection.cursor() as cursor:
+            cursor.execute("""
+SELECT mr.report_id, t.tag, COUNT(*) FROM {markreport_table} AS mr
+  INNER JOIN {mark_table} AS m ON (m.id = mr.mark_id)
+  CROSS JOIN unnest(m.cache_tags) AS t(tag)
+  WHERE mr.report_id = ANY(%s) AND mr.associated AND mr.type IN %s
+  GROUP BY mr.report_id, t.tag;""".format(
+                markreport_table=self.markreport_model._meta.db_table, mark_table=self.mark_model._meta.db_table
+            ), [reports_ids, (ASSOCIATION_TYPE[2][0], ASSOCIATION_TYPE[3][0])])
+            for report_id, tag, number in cursor.fetchall():
+                tags_data[report_id][tag] = number
+        return tags_data
+
+    def __recalculate(self, reports_ids):
+        new_data = dict((report_id, self.get_default_data()) for report_id in reports_ids)
+
+        # Just automatic and confirmed associations can affect the cache
+        aggregated = self.markreport_model.objects.filter(
+            report_id__in=reports_ids, type__in=[ASSOCIATION_TYPE[2][0], ASSOCIATION_TYPE[3][0]]
+        ).order_by().values('report_id').annotate(
+            marks_automatic=Count('id', filter=Q(type=ASSOCIATION_TYPE[2][0])),
+            marks_total=Count('id', filter=Q(associated=True)),
+            marks_confirmed=Count('id', filter=Q(associated=True, type=ASSOCIATION_TYPE[3][0])),
+            **self.get_aggregations()
+        )
+        aggregated = dict((row['report_id'], row) for row in aggregated)
+        for report_id, row in aggregated.items():
+            for field in ('marks_automatic', 'marks_total', 'marks_confirmed'):
+                new_data[report_id][field] = row[field]
+        self.collect(new_data, reports_ids, aggregated)
+
+        with transaction.atomic():
+            cache_objects = list(self.cache_model.objects.filter(report_id__in=reports_ids).select_for_update())
+            for cache_obj in cache_objects:
+                for field, value in new_data[cache_obj.report_id].items():
+                    setattr(cache_obj, field, value)
+            self.cache_model.objects.bulk_update(cache_objects, self.fields)
+
+
+class BulkRecalculateSafeCache(BulkRecalculateCacheBase):
+    cache_model = ReportSafeCache
+    markreport_model = MarkSafeReport
+    mark_model = MarkSafe
+    fields = BulkRecalculateCacheBase.fields + ('verdict', 'tags')
+
+    def get_default_data(self):
+        data = super().get_default_data()
+        data.update({'verdict': SAFE_VERDICTS[4][0], 'tags': {}})
+        return data
+
+    def get_aggregations(self):
+        return {'verdicts': ArrayAgg('mark__verdict', distinct=True, filter=Q(associated=True))}
+
+    def collect(self, new_data, reports_ids, aggregated):
+        for report_id, row in aggregated.items():
+            new_data[report_id]['verdict'] = safe_verdicts_sum(*(row['verdicts'] or []))
+        for report_id, tags in self.get_tags(reports_ids).items():
+            new_data[report_id]['tags'] = tags
+
+
+class BulkRecalculateUnsafeCache(BulkRecalculateCacheBase):
+    cache_model = ReportUnsafeCache
+    markreport_model = MarkUnsafeReport
+    mark_model = MarkUnsafe
+    fields = BulkRecalculateCacheBase.fields + ('verdict', 'status', 'tags')
+
+    def get_default_data(self):
+        data = super().get_default_data()
+        data.update({'verdict': UNSAFE_VERDICTS[5][0], 'status': None, 'tags': {}})
+        return data
+
+    def get_aggregations(self):
+        is_bug = Q(mark__verdict=MARK_UNSAFE[1][0])
+        return {
+            'verdicts': ArrayAgg('mark__verdict', distinct=True, filter=Q(associated=True)),
+            'bug_statuses': ArrayAgg('mark__status', distinct=True, filter=Q(associated=True) & is_bug),
+            'not_bugs': Count('id', filter=Q(associated=True) & ~is_bug)
+        }
+
+    def collect(self, new_data, reports_ids, aggregated):
+        for report_id, row in aggregated.items():
+            new_data[report_id]['verdict'] = unsafe_verdicts_sum(*(row['verdicts'] or []))
+            new_data[report_id]['status'] = BugStatusCollector.aggregate(row['bug_statuses'] or [], row['not_bugs'])
+        for report_id, tags in self.get_tags(reports_ids).items():
+            new_data[report_id]['tags'] = tags
+
+
+class BulkRecalculateUnknownCache(BulkRecalculateCacheBase):
+    cache_model = ReportUnknownCache
+    markreport_model = MarkUnknownReport
+    fields = BulkRecalculateCacheBase.fields + ('problems',)
+
+    def get_default_data(self):
+        data = super().get_default_data()
+        data['problems'] = {}
+        return data
+
+    def collect(self, new_data, reports_ids, aggregated):
+        for report_id, problem, number in self.markreport_model.objects.filter(
+                report_id__in=reports_ids, associated=True,
+                type__in=[ASSOCIATION_TYPE[2][0], ASSOCIATION_TYPE[3][0]]
+        ).order_by().values('report_id', 'problem').annotate(number=Count('id'))\
+                .values_list('report_id', 'problem', 'number'):
+            new_data[report_id]['problems'][problem] = number
+
+
 class UpdateMarksTags:
     def __init__(self):
         queryset = Tag.objects.all()
@@ -685,3 +817,22 @@ class UpdateMarksTags:
                 markcache = UpdateUnsafeCachesOnMarkChange(mark_version.mark, report_links, report_links)
                 markcache.update_tags()
                 markcache.save()
+
+
+# Tables of aggregates of leaves caches for decision pages, each one has a table of deltas with the "_delta" suffix
+DECISION_AGGREGATES_TABLES = (
+    'cache_decision_verdicts', 'cache_decision_tags', 'cache_decision_attrs',
+    'cache_decision_unknowns', 'cache_decision_problems'
+)
+
+
+def fold_decision_aggregates(decision_id=None):
+    # Apply deltas that were accumulated by triggers on leaves caches, either for the decision or for all of them
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT fold_decision_aggregates(%s)', [decision_id])
+
+
+def clear_decision_aggregates_deltas(decisions_ids):
+    with connection.cursor() as cursor:
+        for db_table in DECISION_AGGREGATES_TABLES:
+            cursor.execute('DELETE FROM {}_delta WHERE decision_id = ANY(%s)'.format(db_table), [list(decisions_ids)])
@@ -15,20 +15,23 @@
 # limitations under the License.
 #
 
+import io
 import os
 import json
 import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 
 from django.conf import settings
 from django.core.files import File
-from django.db import transaction
+from django.db import connection, transaction
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 
 from rest_framework import exceptions
 
 from bridge.vars import JOB_UPLOAD_STATUS, DECISION_STATUS, PRESET_JOB_TYPE
-from bridge.utils import BridgeException, RequreLock, extract_archive
+from bridge.utils import BridgeException, RequreLock
 
 from jobs.models import JOBFILE_DIR, PresetJob, UploadedJobArchive
 from reports.models import (
@@ -38,7 +41,6 @@ from reports.models import (
 from service.models import Decision
 from caches.models import ReportSafeCache, ReportUnsafeCache, ReportUnknownCache
 
-from caches.utils import update_cache_atomic
 from jobs.DownloadSerializers import (
     validate_report_identifier, DecisionCacheSerializer, DownloadDecisionSerializer,
     DownloadJobSerializer, DownloadComputerSerializer, DownloadReportAttrSerializer, UploadReportComponentSerializer,
@@ -46,28 +48,36 @@ from jobs.DownloadSerializers import (
 )
 from jobs.serializers import JobFileSerializer
 from reports.coverage import FillCoverageStatistics
-from tools.utils import Recalculation
+from marks.tasks import ConnectSafeReports, ConnectUnsafeReports, ConnectUnknownReports
+from tools.utils import LeavesData
 
 
 class JobArchiveUploader:
-    reports_chunk_size = 500
+    reports_chunk_size = 1000
+    # Number of threads that extract files from the archive to the storage
+    files_workers = 4
 
     def __init__(self, upload_obj):
         self._upload_obj = upload_obj
         self._logger = UploadLogger(upload_obj)
         self.job = None
 
-        self._jobdir = None
+        self._archive = None
+        self._executor = None
         self._decisions = {}
         self._final_statuses = {}
         self._identifiers_in_use = {}
         self._original_sources = {}
         self._additional_sources = {}
         self.saved_reports = {}
-        self._leaves_ids = set()
         self._computers = {}
         self._reports_chunk = []
 
+        # Tree data of uploaded reports: report id -> (parent id, tree id, level)
+        self._tree = {}
+        self._leaves = LeavesData()
+        self._new_leaves = {ReportSafe: [], ReportUnsafe: [], ReportUnknown: []}
+
     def __enter__(self):
         self.job = None
         return self
@@ -89,20 +99,25 @@ class JobArchiveUploader:
         self._upload_obj.save()
 
     def upload(self):
-        # Extract job archive
+        # Files are read from the job archive directly without extracting it
         self._logger.log('=' * 30)
         self._logger.start(JOB_UPLOAD_STATUS[1][0])
+        if os.path.splitext(self._upload_obj.archive.name)[-1] != '.zip':
+            raise ValueError('Only zip archives are supported')
         with self._upload_obj.archive.file as fp:
-            job_dir = extract_archive(fp)
-        self._jobdir = job_dir.name
+            with zipfile.ZipFile(fp, mode='r') as zfp, ThreadPoolExecutor(self.files_workers) as executor:
+                self._archive = zfp
+                self._executor = executor
+                self.__upload_archive()
 
+    def __upload_archive(self):
         # Upload job files
         self._logger.start(JOB_UPLOAD_STATUS[2][0])
-        self.__upload_job_files(os.path.join(job_dir.name, JOBFILE_DIR))
+        self.__upload_job_files()
 
         # Save job
         self._logger.start(JOB_UPLOAD_STATUS[3][0])
-        serializer_data = self.__parse_job_json(os.path.join(job_dir.name, 'job.json'))
+        serializer_data = self.__parse_job_json()
         serializer = DownloadJobSerializer(data=serializer_data)
         serializer.is_valid(raise_exception=True)
         self.job = serializer.save(
@@ -121,11 +136,13 @@ class JobArchiveUploader:
         self._logger.end()
 
         self.__upload_reports()
-        self.__change_decision_statuses()
 
-        # Recalculate cache if job has decisions
+        # Caches of reports are filled while they are uploaded, so it is left just to finish reports trees
         self._logger.start(JOB_UPLOAD_STATUS[12][0])
-        Recalculation('all', list(self._decisions.values()))
+        self.__update_trees()
+        self._leaves.upload()
+        self.__change_decision_statuses()
+        self.__connect_marks()
         self._logger.finish_all()
 
     def __get_preset_id(self, preset_info):
@@ -153,23 +170,23 @@ class JobArchiveUploader:
         )
         return preset_dir.id
 
-    def __upload_job_files(self, files_dir):
-        if not os.path.isdir(files_dir):
-            # If 'JobFiles' doesn't exist then the job doesn't have decisions or archive is corrupted.
-            # It'll be checked while files tree is uploading on decisions creation.
-            return
-        for dir_path, dir_names, file_names in os.walk(files_dir):
-            for file_name in file_names:
-                with open(os.path.join(dir_path, file_name), mode='rb') as fp:
-                    serializer = JobFileSerializer(data={'file': File(fp, name=file_name)})
-                    serializer.is_valid(raise_exception=True)
-                    serializer.save()
-
-    def __parse_job_json(self, file_path):
-        if not os.path.exists(file_path):
+    def __upload_job_files(self):
+        # If 'JobFiles' doesn't exist then the job doesn't have decisions or archive is corrupted.
+        # It'll be checked while files tree is uploading on decisions creation.
+        files_prefix = JOBFILE_DIR + '/'
+        for file_info in self._archive.infolist():
+            if file_info.is_dir() or not file_info.filename.startswith(files_prefix):
+                continue
+            with self.__open_file(file_info.filename) as fp:
+                serializer = JobFileSerializer(data={'file': fp})
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+
+    def __parse_job_json(self):
+        job_data = self.__read_json_file('job.json')
+        if job_data is None:
             raise BridgeException('Required job.json file was not found in job archive')
-        with open(file_path, encoding='utf8') as fp:
-            return json.load(fp)
+        return job_data
 
     def __upload_decisions(self):
         decisions_data = self.__read_json_file('{}.json'.format(Decision.__name__))
@@ -225,7 +242,7 @@ class JobArchiveUploader:
                     src_obj = OriginalSources.objects.get(identifier=src_id)
                 except OriginalSources.DoesNotExist:
                     src_obj = OriginalSources(identifier=src_id)
-                    with open(self.__full_path(src_path), mode='rb') as fp:
+                    with self.__open_file(src_path) as fp:
                         src_obj.add_archive(fp, save=True)
             self._original_sources[src_id] = src_obj.id
 
@@ -284,39 +301,114 @@ class JobArchiveUploader:
             save_kwargs['original_sources_id'] = self._original_sources[report_data['original_sources']]
 
         if report_data.get('log'):
-            save_kwargs['log'] = self.__full_path(report_data['log'])
+            save_kwargs['log'] = self.__validate_file(report_data['log'])
 
         if report_data.get('verifier_files'):
-            save_kwargs['verifier_files'] = self.__full_path(report_data['verifier_files'])
+            save_kwargs['verifier_files'] = self.__validate_file(report_data['verifier_files'])
 
         return save_kwargs
 
     def __upload_reports_chunk(self):
-        with transaction.atomic():
-            with Report.objects.delay_mptt_updates():
-                for report_save_data in self._reports_chunk:
-                    log_file = report_save_data.pop('log', None)
-                    verifier_files_arch = report_save_data.pop('verifier_files', None)
-
-                    report = ReportComponent(**report_save_data)
-                    if log_file:
-                        with open(log_file, mode='rb') as fp:
-                            report.add_log(fp, save=False)
-                    if verifier_files_arch:
-                        with open(verifier_files_arch, mode='rb') as fp:
-                            report.add_verifier_files(fp, save=False)
-                    report.save()
-                    self.saved_reports[(report.decision_id, report.identifier)] = report.id
+        new_reports = []
+        report_files = []
+        for report_save_data in self._reports_chunk:
+            log_file = report_save_data.pop('log', None)
+            verifier_files_arch = report_save_data.pop('verifier_files', None)
+
+            report = ReportComponent(**report_save_data)
+            if log_file:
+                report_files.append((report.add_log, log_file))
+            if verifier_files_arch:
+                report_files.append((report.add_verifier_files, verifier_files_arch))
+            new_reports.append(report)
+        self.__save_files(report_files)
+        self.__create_reports(ReportComponent, new_reports)
+
+        for report in new_reports:
+            self.saved_reports[(report.decision_id, report.identifier)] = report.id
+            self._leaves.add_component(report)
         self._reports_chunk = []
 
+    def __create_reports(self, model, new_reports):
+        """
+        Save new reports in bulk. Nested sets of reports trees are calculated after all reports are saved.
+        Just roots of trees are saved one by one to get new trees identifiers.
+        """
+        children = []
+        for report in new_reports:
+            if report.parent_id is None:
+                report.save()
+            else:
+                parent_tree_id, parent_level = self._tree[report.parent_id][1:]
+                report.tree_id, report.level, report.lft, report.rght = parent_tree_id, parent_level + 1, 0, 0
+                children.append(report)
+
+        # Django can't bulk create instances of multi-table inherited models, so base reports are created at first
+        # and then rows of the report table are inserted with plain SQL
+        base_fields = list(f.attname for f in Report._meta.concrete_fields if not f.primary_key)
+        with transaction.atomic():
+            base_reports = Report.objects.bulk_create(list(
+                Report(**dict((name, getattr(report, name)) for name in base_fields)) for report in children
+            ))
+            for report, base_report in zip(children, base_reports):
+                report.id = report.report_ptr_id = base_report.id
+            self.__insert_rows(model, children)
+
+        for report in new_reports:
+            self._tree[report.id] = (report.parent_id, report.tree_id, report.level)
+
+    @staticmethod
+    def __insert_rows(model, reports):
+        # The base report rows with the same primary keys exist already
+        if not reports:
+            return
+        fields = list(f for f in model._meta.get_fields(include_parents=False) if f.concrete and not f.many_to_many)
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            connection.ops.quote_name(model._meta.db_table),
+            ', '.join(connection.ops.quote_name(f.column) for f in fields),
+            ', '.join(['%s'] * len(fields))
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, list(
+                list(f.get_db_prep_save(f.pre_save(report, True), connection) for f in fields) for report in reports
+            ))
+
+    def __update_trees(self):
+        children = {}
+        for report_id in sorted(self._tree):
+            children.setdefault(self._tree[report_id][0], []).append(report_id)
+
+        # Enumerate nodes of each tree in depth-first order as MPTT does
+        nested_sets = []
+        for root_id in children.get(None, []):
+            counter = 1
+            lft_values = {}
+            stack = [(root_id, False)]
+            while stack:
+                report_id, visited = stack.pop()
+                if visited:
+                    nested_sets.append(Report(id=report_id, lft=lft_values.pop(report_id), rght=counter))
+                else:
+                    lft_values[report_id] = counter
+                    stack.append((report_id, True))
+                    stack.extend((child_id, False) for child_id in reversed(children.get(report_id, [])))
+                counter += 1
+        Report.objects.bulk_update(nested_sets, ['lft', 'rght'], batch_size=self.reports_chunk_size)
+
+    def __save_files(self, files):
+        # Extraction of files is the longest part of reports uploading, so it is done in parallel
+        def save_file(add_method, rel_path):
+            with self.__open_file(rel_path) as fp:
+                add_method(fp, save=False)
+        list(self._executor.map(lambda args: save_file(*args), files))
+
     def __upload_safes(self):
         safes_data = self.__read_json_file('{}.json'.format(ReportSafe.__name__))
         if not safes_data:
             return
 
-        self._logger.start(JOB_UPLOAD_STATUS[7][0])
+        self._logger.start(JOB_UPLOAD_STATUS[7][0], len(safes_data))
 
-        safes_cache = []
         new_reports = []
         for report_data in safes_data:
             decision_id = self.__get_decision_id(report_data.get('decision'))
@@ -327,100 +419,80 @@ class JobArchiveUploader:
             new_reports.append(ReportSafe(
                 decision_id=decision_id, identifier=identifier, parent_id=parent_id, **serializer.validated_data
             ))
+            if len(new_reports) >= self.reports_chunk_size:
+                self.__upload_leaves_chunk(ReportSafe, new_reports, [])
+                new_reports = []
+        self.__upload_leaves_chunk(ReportSafe, new_reports, [])
+        self._logger.end()
 
-        with transaction.atomic():
-            with Report.objects.delay_mptt_updates():
-                for report in new_reports:
-                    report.save()
-
-        reports_qs = ReportSafe.objects.filter(decision_id__in=list(self._decisions.values()))\
-            .only('id', 'identifier', 'decision_id')
-        for report in reports_qs:
+    def __upload_leaves_chunk(self, model, new_reports, report_files):
+        self.__save_files(report_files)
+        self.__create_reports(model, new_reports)
+        for report in new_reports:
             self.saved_reports[(report.decision_id, report.identifier)] = report.id
-            self._leaves_ids.add(report.id)
-            safes_cache.append(ReportSafeCache(decision_id=report.decision_id, report_id=report.id))
-
-        ReportSafeCache.objects.bulk_create(safes_cache)
-        self._logger.end()
+            self._leaves.add_leaf(report)
+            self._new_leaves[model].append((report.decision_id, report.id))
+        self._logger.update(len(new_reports))
 
     def __upload_unsafes(self):
         unsafes_data = self.__read_json_file('{}.json'.format(ReportUnsafe.__name__))
         if not unsafes_data:
             return
-        self._logger.start(JOB_UPLOAD_STATUS[8][0])
+        self._logger.start(JOB_UPLOAD_STATUS[8][0], len(unsafes_data))
 
-        unsafes_cache = []
         new_reports = []
+        report_files = []
         for report_data in unsafes_data:
             decision_id = self.__get_decision_id(report_data.get('decision'))
             parent_id = self.saved_reports[(decision_id, report_data.pop('parent'))]
             identifier = self.__validate_report_identifier(decision_id, report_data.pop('identifier'))
-            error_trace = self.__full_path(report_data['error_trace'])
+            error_trace = self.__validate_file(report_data['error_trace'])
             serializer = UploadReportUnsafeSerializer(data=report_data)
             serializer.is_valid(raise_exception=True)
 
             report = ReportUnsafe(
                 identifier=identifier, decision_id=decision_id, parent_id=parent_id, **serializer.validated_data
             )
-            with open(error_trace, mode='rb') as fp:
-                report.add_trace(fp, save=False)
+            report_files.append((report.add_trace, error_trace))
             new_reports.append(report)
-
-        with transaction.atomic():
-            with Report.objects.delay_mptt_updates():
-                for report in new_reports:
-                    report.save()
-
-        reports_qs = ReportUnsafe.objects.filter(decision_id__in=list(self._decisions.values()))\
-            .only('id', 'identifier', 'decision_id')
-        for report in reports_qs:
-            self.saved_reports[(report.decision_id, report.identifier)] = report.id
-            self._leaves_ids.add(report.id)
-            unsafes_cache.append(ReportUnsafeCache(decision_id=report.decision_id, report_id=report.id))
-
-        ReportUnsafeCache.objects.bulk_create(unsafes_cache)
+            if len(new_reports) >= self.reports_chunk_size:
+                self.__upload_leaves_chunk(ReportUnsafe, new_reports, report_files)
+                new_reports = []
+                report_files = []
+        self.__upload_leaves_chunk(ReportUnsafe, new_reports, report_files)
         self._logger.end()
 
     def __upload_unknowns(self):
         unknowns_data = self.__read_json_file('{}.json'.format(ReportUnknown.__name__))
         if not unknowns_data:
             return
-        self._logger.start(JOB_UPLOAD_STATUS[9][0])
+        self._logger.start(JOB_UPLOAD_STATUS[9][0], len(unknowns_data))
 
-        unknowns_cache = []
         new_reports = []
+        report_files = []
         for report_data in unknowns_data:
             decision_id = self.__get_decision_id(report_data.get('decision'))
             parent_id = self.saved_reports[(decision_id, report_data.pop('parent'))]
             identifier = self.__validate_report_identifier(decision_id, report_data.pop('identifier'))
-            problem_description = self.__full_path(report_data['problem_description'])
+            problem_description = self.__validate_file(report_data['problem_description'])
             serializer = UploadReportUnknownSerializer(data=report_data)
             serializer.is_valid(raise_exception=True)
 
             report = ReportUnknown(
                 decision_id=decision_id, parent_id=parent_id, identifier=identifier, **serializer.validated_data
             )
-            with open(problem_description, mode='rb') as fp:
-                report.add_problem_desc(fp, save=False)
+            report_files.append((report.add_problem_desc, problem_description))
             new_reports.append(report)
-
-        with transaction.atomic():
-            with Report.objects.delay_mptt_updates():
-                for report in new_reports:
-                    report.save()
-
-        reports_qs = ReportUnknown.objects.filter(decision_id__in=list(self._decisions.values()))\
-            .only('id', 'identifier', 'decision_id')
-        for report in reports_qs:
-            self.saved_reports[(report.decision_id, report.identifier)] = report.id
-            self._leaves_ids.add(report.id)
-            unknowns_cache.append(ReportUnknownCache(decision_id=report.decision_id, report_id=report.id))
-
-        ReportUnknownCache.objects.bulk_create(unknowns_cache)
+            if len(new_reports) >= self.reports_chunk_size:
+                self.__upload_leaves_chunk(ReportUnknown, new_reports, report_files)
+                new_reports = []
+                report_files = []
+        self.__upload_leaves_chunk(ReportUnknown, new_reports, report_files)
         self._logger.end()
 
     def __upload_attrs(self):
         attrs_data = self.__read_json_file('{}.json'.format(ReportAttr.__name__), required=True)
+        leaves_ids = set(report_id for model in self._new_leaves for _, report_id in self._new_leaves[model])
         attrs_cache = {}
         new_attrs = []
         new_attr_files = {}
@@ -444,39 +516,39 @@ class JobArchiveUploader:
                         new_attr_files[file_key].append(cnt)
                     cnt += 1
 
-                    if report_id in self._leaves_ids:
-                        attrs_cache.setdefault(report_id, {'attrs': {}})
-                        attrs_cache[report_id]['attrs'][validated_data['name']] = validated_data['value']
+                    if report_id in leaves_ids:
+                        attrs_cache.setdefault(report_id, {})
+                        attrs_cache[report_id][validated_data['name']] = validated_data['value']
         self._logger.update(10)
 
-        attr_file_number = len(new_attr_files)
-        if attr_file_number > 0:
-            # Upload attributes' files
-            with transaction.atomic():
-                step_percent_number = int(attr_file_number / 70)
-                attr_file_cnt = 0
-                for decision_id, file_path in new_attr_files:
-                    attr_file_obj = AttrFile(decision_id=decision_id)
-                    with open(self.__full_path(file_path), mode='rb') as fp:
-                        attr_file_obj.file.save(os.path.basename(file_path), File(fp), save=True)
-
-                    for i in new_attr_files[(decision_id, file_path)]:
-                        # Add link to file for attributes that have it
-                        new_attrs[i].data_id = attr_file_obj.id
-                    attr_file_cnt += 1
-                    if attr_file_cnt > step_percent_number:
-                        self._logger.update(int(70 * attr_file_cnt / attr_file_number))
-                        attr_file_cnt = 0
-        else:
-            self._logger.update(70)
-
-        ReportAttr.objects.bulk_create(new_attrs)
+        # Upload attributes' files
+        new_files_objects = []
+        attr_files = []
+        for decision_id, file_path in new_attr_files:
+            attr_file_obj = AttrFile(decision_id=decision_id)
+            attr_files.append((attr_file_obj.file.save, os.path.basename(file_path), file_path))
+            new_files_objects.append(attr_file_obj)
+
+        def save_attr_file(save_method, file_name, rel_path):
+            with self.__open_file(rel_path) as fp:
+                save_method(file_name, fp, save=False)
+        list(self._executor.map(lambda args: save_attr_file(*args), attr_files))
+        AttrFile.objects.bulk_create(new_files_objects)
+        for (decision_id, file_path), attr_file_obj in zip(new_attr_files, new_files_objects):
+            for i in new_attr_files[(decision_id, file_path)]:
+                # Add link to file for attributes that have it
+                new_attrs[i].data_id = attr_file_obj.id
+        self._logger.update(70)
+
+        ReportAttr.objects.bulk_create(new_attrs, batch_size=self.reports_chunk_size)
         self._logger.update(10)
 
-        decisions_ids = list(self._decisions.values())
-        update_cache_atomic(ReportSafeCache.objects.filter(report__decision_id__in=decisions_ids), attrs_cache)
-        update_cache_atomic(ReportUnsafeCache.objects.filter(report__decision_id__in=decisions_ids), attrs_cache)
-        update_cache_atomic(ReportUnknownCache.objects.filter(report__decision_id__in=decisions_ids), attrs_cache)
+        # Create caches of leaves with their attributes at once
+        for model, cache_model in ((ReportSafe, ReportSafeCache), (ReportUnsafe, ReportUnsafeCache),
+                                   (ReportUnknown, ReportUnknownCache)):
+            cache_model.objects.bulk_create(list(cache_model(
+                decision_id=decision_id, report_id=report_id, attrs=attrs_cache.get(report_id, {})
+            ) for decision_id, report_id in self._new_leaves[model]), batch_size=self.reports_chunk_size)
         self._logger.update(10)
         self._logger.end()
 
@@ -492,7 +564,7 @@ class JobArchiveUploader:
                 report_id=self.saved_reports[(decision_id, coverage['report'])],
                 identifier=coverage['identifier'], name=coverage.get('name', '...')
             )
-            with open(self.__full_path(coverage['archive']), mode='rb') as fp:
+            with self.__open_file(coverage['archive']) as fp:
                 instance.add_coverage(fp, save=False)
             instance.save()
 
@@ -529,29 +601,44 @@ class JobArchiveUploader:
     def __get_additional_sources(self, decision_id, rel_path):
         if rel_path not in self._additional_sources:
             add_inst = AdditionalSources(decision_id=decision_id)
-            with open(self.__full_path(rel_path), mode='rb') as fp:
+            with self.__open_file(rel_path) as fp:
                 add_inst.add_archive(fp, save=True)
             self._additional_sources[rel_path] = add_inst
         return self._additional_sources[rel_path]
 
-    def __full_path(self, rel_path):
-        full_path = os.path.join(self._jobdir, rel_path)
-        if not os.path.exists(full_path):
+    def __connect_marks(self):
+        # Marks are associated in bulk before the upload is finished, the upload is run in background anyway
+        ConnectSafeReports(list(report_id for _, report_id in self._new_leaves[ReportSafe]))
+        ConnectUnsafeReports(list(report_id for _, report_id in self._new_leaves[ReportUnsafe]))
+        ConnectUnknownReports(list(report_id for _, report_id in self._new_leaves[ReportUnknown]))
+
+    def __validate_file(self, rel_path):
+        try:
+            self._archive.getinfo(rel_path)
+        except KeyError:
             raise BridgeException(
                 _('Required file was not found in job archive: %(filename)s') % {'filename': rel_path}
             )
-        return full_path
+        return rel_path
+
+    def __open_file(self, rel_path):
+        file_info = self._archive.getinfo(self.__validate_file(rel_path))
+        fp = File(self._archive.open(file_info), name=os.path.basename(rel_path))
+        # Otherwise the size is calculated by decompressing the whole file
+        fp.size = file_info.file_size
+        return fp
 
     def __read_json_file(self, rel_path, required=False):
-        full_path = os.path.join(self._jobdir, rel_path)
-        if os.path.exists(full_path):
-            with open(full_path, encoding='utf8') as fp:
-                return json.load(fp)
-        if required:
-            raise BridgeException(
-                _('Required file was not found in job archive: %(filename)s') % {'filename': rel_path}
-            )
-        return None
+        try:
+            self._archive.getinfo(rel_path)
+        except KeyError:
+            if required:
+                raise BridgeException(
+                    _('Required file was not found in job archive: %(filename)s') % {'filename': rel_path}
+                )
+            return None
+        with self._archive.open(rel_path) as fp:
+            return json.load(io.TextIOWrapper(fp, encoding='utf8'))
 
 
 class UploadLogger:
@@ -17,7 +17,8 @@
 
 from urllib.parse import quote
 
-from django.db.models import Count, Case, When, F
+from django.db.models import Count, Case, When, F, Sum
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
@@ -26,7 +27,11 @@ from bridge.vars import DECISION_WEIGHT
 
 from reports.models import ReportSafe, ReportUnsafe, ReportUnknown, ReportComponent, Report, DecisionCache
 from marks.models import MarkUnknownReport, Tag
-from caches.models import ReportSafeCache, ReportUnsafeCache
+from caches.models import (
+    ReportSafeCache, ReportUnsafeCache, DecisionVerdictsCache, DecisionTagsCache, DecisionUnknownsCache,
+    DecisionProblemsCache, DecisionAttrsCache
+)
+from caches.utils import fold_decision_aggregates
 
 from users.utils import HumanizedValue
 from reports.verdicts import safe_color, unsafe_color, SafeColumns, UnsafeColumns
@@ -45,15 +50,10 @@ class SafesInfo:
         self._base_url = base_url
         self._detailed = 'hidden' not in view or 'detailed_verdicts' not in view['hidden']
 
-    def __collect_detailed_info(self, **kwargs):
+    def __collect_detailed_info(self, rows):
         columns = SafeColumns(detailed=True)
-        queryset = ReportSafe.objects.filter(**kwargs).values('cache__verdict').annotate(
-            total=Count('id', distinct=True),
-            manual=Count(Case(When(cache__marks_confirmed__gt=0, then=F('id')), default=None), distinct=True)
-        ).order_by('cache__verdict').values_list('cache__verdict', 'manual', 'total')
-
         info_data = []
-        for verdict, manual_num, total_num in queryset:
+        for verdict, manual_num, total_num in rows:
             column = columns.get_verdict_column(verdict)
             verdict_url = "{}?verdict={}".format(self._base_url, verdict)
             verdict_data = {
@@ -79,14 +79,10 @@ class SafesInfo:
             info_data.append(verdict_data)
         return info_data
 
-    def __collect_simple_info(self, **kwargs):
+    def __collect_simple_info(self, rows):
         columns = SafeColumns()
-        queryset = ReportSafe.objects.filter(**kwargs).values('cache__verdict').annotate(
-            total=Count('id', distinct=True)
-        ).order_by('cache__verdict').values_list('cache__verdict', 'total')
-
         info_data = []
-        for verdict, total_num in queryset:
+        for verdict, total_num in rows:
             column = columns.get_verdict_column(verdict)
             info_data.append({
                 'title': columns.titles.get(column, column),
@@ -97,9 +93,22 @@ class SafesInfo:
         return info_data
 
     def collect_info(self, **kwargs):
+        queryset = ReportSafe.objects.filter(**kwargs).values('cache__verdict').order_by('cache__verdict')
         if self._detailed:
-            return self.__collect_detailed_info(**kwargs)
-        return self.__collect_simple_info(**kwargs)
+            return self.__collect_detailed_info(queryset.annotate(
+                total=Count('id', distinct=True),
+                manual=Count(Case(When(cache__marks_confirmed__gt=0, then=F('id')), default=None), distinct=True)
+            ).values_list('cache__verdict', 'manual', 'total'))
+        return self.__collect_simple_info(
+            queryset.annotate(total=Count('id', distinct=True)).values_list('cache__verdict', 'total')
+        )
+
+    def collect_decision_info(self, decision):
+        rows = DecisionVerdictsCache.objects.filter(decision=decision, leaf_type='safe', total__gt=0)\
+            .order_by('verdict').values_list('verdict', 'manual', 'total')
+        if self._detailed:
+            return self.__collect_detailed_info(rows)
+        return self.__collect_simple_info((verdict, total_num) for verdict, manual_num, total_num in rows)
 
 
 class UnsafesInfo:
@@ -107,15 +116,10 @@ class UnsafesInfo:
         self._base_url = base_url
         self._detailed = 'hidden' not in view or 'detailed_verdicts' not in view['hidden']
 
-    def __collect_detailed_info(self, **kwargs):
+    def __collect_detailed_info(self, rows):
         columns = UnsafeColumns(detailed=True)
-        queryset = ReportUnsafe.objects.filter(**kwargs).values('cache__verdict').annotate(
-            total=Count('id', distinct=True),
-            manual=Count(Case(When(cache__marks_confirmed__gt=0, then=F('id')), default=None), distinct=True)
-        ).order_by('cache__verdict').values_list('cache__verdict', 'manual', 'total')
-
         info_data = []
-        for verdict, manual_num, total_num in queryset:
+        for verdict, manual_num, total_num in rows:
             column = columns.get_verdict_column(verdict)
             verdict_url = "{}?verdict={}".format(self._base_url, verdict)
             verdict_data = {
@@ -141,14 +145,10 @@ class UnsafesInfo:
             info_data.append(verdict_data)
         return info_data
 
-    def __collect_simple_info(self, **kwargs):
+    def __collect_simple_info(self, rows):
         columns = UnsafeColumns()
-        queryset = ReportUnsafe.objects.filter(**kwargs).values('cache__verdict').annotate(
-            total=Count('id', distinct=True)
-        ).order_by('cache__verdict').values_list('cache__verdict', 'total')
-
         info_data = []
-        for verdict, total_num in queryset:
+        for verdict, total_num in rows:
             column = columns.get_verdict_column(verdict)
             info_data.append({
                 'title': columns.titles.get(column, column),
@@ -159,9 +159,22 @@ class UnsafesInfo:
         return info_data
 
     def collect_info(self, **kwargs):
+        queryset = ReportUnsafe.objects.filter(**kwargs).values('cache__verdict').order_by('cache__verdict')
+        if self._detailed:
+            return self.__collect_detailed_info(queryset.annotate(
+                total=Count('id', distinct=True),
+                manual=Count(Case(When(cache__marks_confirmed__gt=0, then=F('id')), default=None), distinct=True)
+            ).values_list('cache__verdict', 'manual', 'total'))
+        return self.__collect_simple_info(
+            queryset.annotate(total=Count('id', distinct=True)).values_list('cache__verdict', 'total')
+        )
+
+    def collect_decision_info(self, decision):
+        rows = DecisionVerdictsCache.objects.filter(decision=decision, leaf_type='unsafe', total__gt=0)\
+            .order_by('verdict').values_list('verdict', 'manual', 'total')
         if self._detailed:
-            return self.__collect_detailed_info(**kwargs)
-        return self.__collect_simple_info(**kwargs)
+            return self.__collect_detailed_info(rows)
+        return self.__collect_simple_info((verdict, total_num) for verdict, manual_num, total_num in rows)
 
 
 class UnknownsInfo:
@@ -191,7 +204,7 @@ class UnknownsInfo:
             return {}
         return {'component__{}'.format(self._view['unknown_component'][0]): self._view['unknown_component'][1]}
 
-    def __filter_problem(self, problem):
+    def _filter_problem(self, problem):
         if 'unknown_problem' not in self._view:
             return True
         if self._view['unknown_problem'][0] == 'iexact':
@@ -202,11 +215,10 @@ class UnknownsInfo:
             return self._view['unknown_problem'][1].lower() in problem.lower()
         return True
 
-    def __unknowns_info(self):
+    def _collect_data(self):
         unknowns_qs = self._queryset.filter(**self._component_filter)\
             .select_related('cache').only('component', 'cache__marks_total', 'cache__problems')
 
-        # Collect unknowns data
         cache_data = {}
         unmarked = {}
         totals = {}
@@ -222,11 +234,15 @@ class UnknownsInfo:
             for problem in sorted(unknown.cache.problems):
                 if problem in skipped_problems:
                     continue
-                if not self.__filter_problem(problem):
+                if not self._filter_problem(problem):
                     skipped_problems.add(problem)
                     continue
                 cache_data[unknown.component].setdefault(problem, 0)
                 cache_data[unknown.component][problem] += 1
+        return cache_data, unmarked, totals
+
+    def __unknowns_info(self):
+        cache_data, unmarked, totals = self._collect_data()
 
         # Sort unknowns data for html
         unknowns_data = []
@@ -255,6 +271,38 @@ class UnknownsInfo:
         return unknowns_data
 
 
+class DecisionUnknownsInfo(UnknownsInfo):
+    """
+    Unknowns info of the decision that is got from its aggregates instead of its unknowns.
+    """
+
+    def __init__(self, view, base_url, decision):
+        self._decision = decision
+        super().__init__(view, base_url, None)
+
+    def _collect_data(self):
+        cache_data = {}
+        unmarked = {}
+        totals = {}
+        components_qs = DecisionUnknownsCache.objects\
+            .filter(decision=self._decision, total__gt=0, **self._component_filter)\
+            .values_list('component', 'total', 'unmarked')
+        for component, total_num, unmarked_num in components_qs:
+            cache_data[component] = {}
+            if not self._total_hidden:
+                totals[component] = total_num
+            if not self._nomark_hidden and unmarked_num:
+                unmarked[component] = unmarked_num
+
+        problems_qs = DecisionProblemsCache.objects\
+            .filter(decision=self._decision, number__gt=0, **self._component_filter)\
+            .values_list('component', 'problem', 'number')
+        for component, problem, number in problems_qs:
+            if component in cache_data and self._filter_problem(problem):
+                cache_data[component][problem] = number
+        return cache_data, unmarked, totals
+
+
 class TagsInfo:
     def __init__(self, base_url, cache_qs, tags_filter):
         self._tags_filter = tags_filter
@@ -299,29 +347,49 @@ class TagsInfo:
     def _db_tags_names(self):
         return dict((self._db_tags[t_id]['name'], t_id) for t_id in self._db_tags)
 
-    def __get_tags_info(self):
-        tags_data = {}
+    def _tags_numbers(self):
         for cache_obj in self._cache_qs.only('tags'):
             for tag in cache_obj.tags:
-                if tag not in self._db_tags_names:
-                    continue
-                tag_id = self._db_tags_names[tag]
-                parent_id = tag_id
-                while parent_id:
-                    if parent_id in tags_data:
-                        break
-                    tags_data[parent_id] = {
-                        'parent': self._db_tags[parent_id]['parent'],
-                        'name': self._db_tags[parent_id]['shortname'],
-                        'description': self._db_tags[parent_id]['description'],
-                        'value': 0,
-                        'url': '{}?tag={}'.format(self._base_url, quote(self._db_tags[parent_id]['name']))
-                    }
-                    parent_id = self._db_tags[parent_id]['parent']
-                tags_data[tag_id]['value'] += 1
+                yield tag, 1
+
+    def __get_tags_info(self):
+        tags_data = {}
+        for tag, number in self._tags_numbers():
+            if tag not in self._db_tags_names:
+                continue
+            tag_id = self._db_tags_names[tag]
+            parent_id = tag_id
+            while parent_id:
+                if parent_id in tags_data:
+                    break
+                tags_data[parent_id] = {
+                    'parent': self._db_tags[parent_id]['parent'],
+                    'name': self._db_tags[parent_id]['shortname'],
+                    'description': self._db_tags[parent_id]['description'],
+                    'value': 0,
+                    'url': '{}?tag={}'.format(self._base_url, quote(self._db_tags[parent_id]['name']))
+                }
+                parent_id = self._db_tags[parent_id]['parent']
+            tags_data[tag_id]['value'] += number
         return tags_data
 
 
+class DecisionTagsInfo(TagsInfo):
+    """
+    Tags info of the decision that is got from its aggregates instead of its leaves caches.
+    """
+
+    def __init__(self, base_url, decision, leaf_type, tags_filter):
+        self._decision = decision
+        self._leaf_type = leaf_type
+        super().__init__(base_url, None, tags_filter)
+
+    def _tags_numbers(self):
+        return DecisionTagsCache.objects\
+            .filter(decision=self._decision, leaf_type=self._leaf_type, number__gt=0)\
+            .values_list('tag', 'number')
+
+
 class ResourcesInfo:
     def __init__(self, user, view, data):
         self.user = user
@@ -407,21 +475,42 @@ class AttrStatisticsInfo:
         attr_name_q = quote(self.attr_name)
 
         data = {}
+        for attr_value, numbers in self._attr_numbers():
+            if not self.__filter_attr(attr_value):
+                continue
+            if attr_value not in data:
+                data[attr_value] = {
+                    'attr_value': attr_value, 'safes': 0, 'unsafes': 0, 'unknowns': 0,
+                    'url_params': '?attr_name={}&attr_value={}'.format(attr_name_q, quote(attr_value))
+                }
+            for column in numbers:
+                data[attr_value][column] += numbers[column]
+        return list(data[a_val] for a_val in sorted(data))
+
+    def _attr_numbers(self):
         for model, column in [(ReportSafe, 'safes'), (ReportUnsafe, 'unsafes'), (ReportUnknown, 'unknowns')]:
             queryset = model.objects.filter(
                 cache__attrs__has_key=self.attr_name, **self._qs_kwargs
             ).values_list('cache__attrs', flat=True)
             for report_attrs in queryset:
-                attr_value = report_attrs[self.attr_name]
-                if not self.__filter_attr(attr_value):
-                    continue
-                if attr_value not in data:
-                    data[attr_value] = {
-                        'attr_value': attr_value, 'safes': 0, 'unsafes': 0, 'unknowns': 0,
-                        'url_params': '?attr_name={}&attr_value={}'.format(attr_name_q, quote(attr_value))
-                    }
-                data[attr_value][column] += 1
-        return list(data[a_val] for a_val in sorted(data))
+                yield report_attrs[self.attr_name], {column: 1}
+
+
+class DecisionAttrStatisticsInfo(AttrStatisticsInfo):
+    """
+    Attribute statistics of the decision that is got from its aggregates instead of its leaves caches.
+    """
+
+    def __init__(self, view, decision):
+        self._decision = decision
+        super().__init__(view)
+
+    def _attr_numbers(self):
+        queryset = DecisionAttrsCache.objects.filter(decision=self._decision, name=self.attr_name)\
+            .values_list('value', 'safes', 'unsafes', 'unknowns')
+        for attr_value, safes, unsafes, unknowns in queryset:
+            if safes or unsafes or unknowns:
+                yield attr_value, {'safes': safes, 'unsafes': unsafes, 'unknowns': unknowns}
 
 
 class ViewJobData:
@@ -431,6 +520,8 @@ class ViewJobData:
         self.decision = decision
         self.report = ReportComponent.objects.filter(decision=decision, parent=None)\
             .only('id', 'identifier', 'component').first()
+        # Apply changes of leaves that were not applied to aggregates periodically yet
+        fold_decision_aggregates(decision.id)
 
     @cached_property
     def core_link(self):
@@ -459,7 +550,14 @@ class ViewJobData:
 
     @cached_property
     def totals(self):
-        return get_leaves_totals(decision=self.decision)
+        data = {'safes': 0, 'unsafes': 0}
+        leaves_qs = DecisionVerdictsCache.objects.filter(decision=self.decision)\
+            .values('leaf_type').annotate(number=Sum('total')).values_list('leaf_type', 'number')
+        for leaf_type, number in leaves_qs:
+            data['{}s'.format(leaf_type)] = number
+        data.update(DecisionUnknownsCache.objects.filter(decision=self.decision)
+                    .aggregate(unknowns=Coalesce(Sum('total'), 0)))
+        return data
 
     @cached_property
     def problems(self):
@@ -476,24 +574,20 @@ class ViewJobData:
 
     @property
     def has_unmarked(self):
-        return ReportUnknown.objects.filter(cache__marks_total=0, decision=self.decision).count() > 0
+        return DecisionUnknownsCache.objects.filter(decision=self.decision, unmarked__gt=0).exists()
 
     def __safe_tags_info(self):
         if not self.report:
             return []
-        return TagsInfo(
-            reverse('reports:safes', args=[self.report.id]),
-            ReportSafeCache.objects.filter(report__decision=self.decision),
-            self.view['safe_tag']
+        return DecisionTagsInfo(
+            reverse('reports:safes', args=[self.report.id]), self.decision, 'safe', self.view['safe_tag']
         ).info
 
     def __unsafe_tags_info(self):
         if not self.report:
             return []
-        return TagsInfo(
-            reverse('reports:unsafes', args=[self.report.id]),
-            ReportUnsafeCache.objects.filter(report__decision=self.decision),
-            self.view['unsafe_tag']
+        return DecisionTagsInfo(
+            reverse('reports:unsafes', args=[self.report.id]), self.decision, 'unsafe', self.view['unsafe_tag']
         ).info
 
     def __resource_info(self):
@@ -511,27 +605,26 @@ class ViewJobData:
     def __unknowns_info(self):
         if not self.report:
             return []
-        return UnknownsInfo(
-            self.view, reverse('reports:unknowns', args=[self.report.id]),
-            ReportUnknown.objects.filter(decision=self.decision)
+        return DecisionUnknownsInfo(
+            self.view, reverse('reports:unknowns', args=[self.report.id]), self.decision
         ).info
 
     def __safes_info(self):
         if not self.report:
             return []
         verdicts_collector = SafesInfo(self.view, reverse('reports:safes', args=[self.report.pk]))
-        return verdicts_collector.collect_info(decision=self.decision)
+        return verdicts_collector.collect_decision_info(self.decision)
 
     def __unsafes_info(self):
         if not self.report:
             return []
         verdicts_collector = UnsafesInfo(self.view, reverse('reports:unsafes', args=[self.report.pk]))
-        return verdicts_collector.collect_info(decision=self.decision)
+        return verdicts_collector.collect_decision_info(self.decision)
 
     def __attr_statistic(self):
         if not self.report:
             return None
-        return AttrStatisticsInfo(self.view, decision=self.decision).info
+        return DecisionAttrStatisticsInfo(self.view, self.decision).info
 
 
 class ViewReportData:
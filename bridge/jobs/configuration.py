@@ -36,7 +36,7 @@ from reports.models import Decision
 #   scheduler - see bridge.vars.SCHEDULER_TYPE for available values (task scheduler),
 #   max_tasks - positive number (max solving tasks per sub-job),
 #   weight - see vars.DECISION_WEIGHT for available values (weight of decision),
-#   parallelism: [Sub-jobs processing, Tasks generation, Weaving, Results processing]
+#   parallelism: [Sub-jobs processing, Tasks generation, Weaving, Results processing, Environment models translation]
 #   memory - memory size in GB,
 #   cpu_num - number of CPU cores; if number is None then any,
 #   disk_size - disk memory size in GB,
@@ -64,10 +64,10 @@ DEFAULT_FORMATTER = (
                                   "(%(process)d) %(levelname)5s> %(message)s")
 )
 PARALLELISM_PACKS = [
-    ('sequential', _('Sequentially'), ('1', '1', '1', '1')),
-    ('slow', _('Slowly'), ('1', '1', '1', '1')),
-    ('quick', _('Quickly'), ('1', '4', '2', '1')),
-    ('very quick', _('Very quickly'), ('1', '1.0', '0.5', '2'))
+    ('sequential', _('Sequentially'), ('1', '1', '1', '1', '1')),
+    ('slow', _('Slowly'), ('1', '1', '1', '1', '1')),
+    ('quick', _('Quickly'), ('1', '4', '2', '1', '1')),
+    ('very quick', _('Very quickly'), ('1', '1.0', '0.5', '2', '0.5'))
 ]
 KLEVER_CORE_DEF_MODES = [
     {
@@ -77,7 +77,7 @@ KLEVER_CORE_DEF_MODES = [
             'scheduler': SCHEDULER_TYPE[0][0],
             'max_tasks': 100,
             'weight': DECISION_WEIGHT[1][0],
-            'parallelism': ['1', '3', '2', '1'],
+            'parallelism': ['1', '3', '2', '1', '1'],
             'memory': 3,
             'cpu_num': None,
             'disk_size': 100,
@@ -103,7 +103,7 @@ KLEVER_CORE_DEF_MODES = [
             'scheduler': SCHEDULER_TYPE[0][0],
             'max_tasks': 100,
             'weight': DECISION_WEIGHT[0][0],
-            'parallelism': ['1', '5', '0.5', '2'],
+            'parallelism': ['1', '5', '0.5', '2', '1'],
             'memory': 5,
             'cpu_num': None,
             'disk_size': 20,
@@ -129,7 +129,7 @@ KLEVER_CORE_DEF_MODES = [
             'scheduler': SCHEDULER_TYPE[0][0],
             'max_tasks': 100,
             'weight': DECISION_WEIGHT[0][0],
-            'parallelism': ['1', '5', '0.5', '2'],
+            'parallelism': ['1', '5', '0.5', '2', '1'],
             'memory': 5,
             'cpu_num': None,
             'disk_size': 20,
@@ -159,7 +159,8 @@ def get_configuration_value(name, value):
                     'parallelism_0': p_val[0],
                     'parallelism_1': p_val[1],
                     'parallelism_2': p_val[2],
-                    'parallelism_3': p_val[3]
+                    'parallelism_3': p_val[3],
+                    'parallelism_4': p_val[4]
                 }
     elif name == 'def_console_formatter':
         for f_id, __, f_val in DEFAULT_FORMATTER:
@@ -186,7 +187,7 @@ class ConfigurationSerializer(serializers.Serializer):
     max_tasks = fields.IntegerField(min_value=1)
     weight = fields.ChoiceField(DECISION_WEIGHT)
 
-    parallelism = fields.ListField(child=fields.RegexField(r'^\d+(\.\d+)?$'), min_length=4, max_length=4)
+    parallelism = fields.ListField(child=fields.RegexField(r'^\d+(\.\d+)?$'), min_length=5, max_length=5)
 
     memory = fields.FloatField()
     cpu_num = fields.IntegerField(allow_null=True, min_value=1)
@@ -263,6 +264,8 @@ class GetConfiguration:
                 str(filedata['parallelism']['Tasks generation']),
                 str(filedata['parallelism']['Weaving']),
                 str(filedata['parallelism']['Results processing']),
+                # Configurations of older versions do not have it
+                str(filedata['parallelism'].get('Environment models translation', 1))
             ],
             'memory': filedata['resource limits']['memory size'] / 10 ** 9,
             'cpu_num': filedata['resource limits']['number of CPU cores'],
@@ -303,7 +306,8 @@ class GetConfiguration:
                 'Sub-jobs processing': self.__str_to_int_or_float(self.configuration['parallelism'][0]),
                 'Tasks generation': self.__str_to_int_or_float(self.configuration['parallelism'][1]),
                 'Weaving': self.__str_to_int_or_float(self.configuration['parallelism'][2]),
-                'Results processing': self.__str_to_int_or_float(self.configuration['parallelism'][3])
+                'Results processing': self.__str_to_int_or_float(self.configuration['parallelism'][3]),
+                'Environment models translation': self.__str_to_int_or_float(self.configuration['parallelism'][4])
             },
             'logging': {
                 'formatters': [
@@ -17,7 +17,6 @@
 
 import json
 import os
-import pika
 
 from django.conf import settings
 from django.db.models import Q
@@ -30,7 +29,7 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers, exceptions, fields
 
 from bridge.vars import DECISION_STATUS
-from bridge.utils import logger, file_checksum, file_get_or_create, RMQConnect, BridgeException
+from bridge.utils import logger, file_checksum, file_get_or_create, rmq_publisher, BridgeException
 from bridge.serializers import DynamicFieldsModelSerializer
 
 from jobs.models import (
@@ -39,6 +38,10 @@ from jobs.models import (
 )
 from reports.models import Report, AttrFile, AdditionalSources, CompareDecisionsInfo, DecisionCache
 from service.models import Task
+from caches.models import (
+    DecisionVerdictsCache, DecisionTagsCache, DecisionUnknownsCache, DecisionProblemsCache, DecisionAttrsCache
+)
+from caches.utils import clear_decision_aggregates_deltas
 
 from jobs.configuration import get_default_configuration, GetConfiguration
 from jobs.utils import JSTreeConverter, validate_scheduler, copy_files_with_replace
@@ -49,11 +52,9 @@ ARCHIVE_FORMAT = 13
 
 def decision_status_changed(decision):
     if decision.status in {DECISION_STATUS[1][0], DECISION_STATUS[5][0], DECISION_STATUS[6][0]}:
-        with RMQConnect() as channel:
-            channel.basic_publish(
-                exchange='', routing_key=settings.RABBIT_MQ_QUEUE, properties=pika.BasicProperties(delivery_mode=2),
-                body="job {} {} {}".format(decision.identifier, decision.status, decision.scheduler.type)
-            )
+        rmq_publisher.publish('', settings.RABBIT_MQ_QUEUE, "job {} {} {}".format(
+            decision.identifier, decision.status, decision.scheduler.type
+        ))
 
 
 def create_default_decision(request, job, configuration):
@@ -289,6 +290,13 @@ class RestartDecisionSerializer(serializers.ModelSerializer):
         AdditionalSources.objects.filter(decision=instance).delete()
         CompareDecisionsInfo.objects.filter(Q(decision1=instance) | Q(decision2=instance)).delete()
         DecisionCache.objects.filter(decision=instance).delete()
+        DecisionVerdictsCache.objects.filter(decision=instance).delete()
+        DecisionTagsCache.objects.filter(decision=instance).delete()
+        DecisionAttrsCache.objects.filter(decision=instance).delete()
+        DecisionUnknownsCache.objects.filter(decision=instance).delete()
+        DecisionProblemsCache.objects.filter(decision=instance).delete()
+        # Deltas of deleted leaves
+        clear_decision_aggregates_deltas([instance.id])
         Task.objects.filter(decision=instance).delete()
 
     def validate(self, attrs):
@@ -23,7 +23,7 @@ from bridge.utils import require_lock
 from reports.models import ReportSafe
 from marks.models import MarkSafeHistory, MarkSafeReport
 
-from marks.utils import ConfirmAssociationBase, UnconfirmAssociationBase
+from marks.utils import ConfirmAssociationBase, UnconfirmAssociationBase, BulkConnectMarksBase, attrs_contained
 from caches.utils import UpdateSafeCachesOnMarkChange, RecalculateSafeCache
 
 
@@ -145,3 +145,25 @@ class ConnectSafeMark:
                 report_id=prime_id, associated=True, type=ASSOCIATION_TYPE[2][0]
             ).update(associated=False)
         return new_links
+
+
+def match_safe_marks(marks_data, reports_data):
+    results = []
+    for report_id, report_attrs in reports_data:
+        for mark_id, mark_attrs in marks_data:
+            if attrs_contained(mark_attrs, report_attrs):
+                results.append((mark_id, report_id, {'type': ASSOCIATION_TYPE[2][0], 'associated': True}))
+    return results
+
+
+class BulkConnectSafeMarks(BulkConnectMarksBase):
+    history_model = MarkSafeHistory
+    report_model = ReportSafe
+    markreport_model = MarkSafeReport
+    compare_function = staticmethod(match_safe_marks)
+
+    def get_marks_data(self):
+        return list((mark.id, mark.cache_attrs) for mark in self._marks)
+
+    def get_reports_data(self, reports):
+        return list((report.id, report.cache.attrs) for report in reports)
@@ -16,6 +16,7 @@
 #
 
 import copy
+import functools
 import json
 import re
 
@@ -26,10 +27,14 @@ from bridge.utils import BridgeException, logger, ArchiveFileContent, require_lo
 
 from reports.models import ReportUnknown
 from marks.models import MAX_PROBLEM_LEN, MarkUnknownHistory, MarkUnknownReport
+from caches.models import ReportUnknownCache
 
-from marks.utils import ConfirmAssociationBase, UnconfirmAssociationBase
+from marks.utils import ConfirmAssociationBase, UnconfirmAssociationBase, BulkConnectMarksBase, attrs_contained
 from caches.utils import RecalculateUnknownCache, UpdateUnknownCachesOnMarkChange
 
+# Maximum number of compiled functions of regexp marks kept by each process
+UNKNOWN_PATTERNS_CACHE_SIZE = 1024
+
 
 def perform_unknown_mark_create(user, report, serializer):
     mark = serializer.save(job=report.decision.job, component=report.component)
@@ -104,39 +109,88 @@ class UnconfirmUnknownMark(UnconfirmAssociationBase):
         RecalculateUnknownCache(report_id)
 
 
+@functools.lru_cache(maxsize=UNKNOWN_PATTERNS_CACHE_SIZE)
+def compile_unknown_pattern(function):
+    return re.compile(function, re.MULTILINE)
+
+
+def read_unknown_desc(report):
+    # Problem description is extracted from the archive just once, then it is taken from the report cache
+    cache_obj = report.cache
+    if cache_obj.problem_description is None:
+        try:
+            problem_desc = ArchiveFileContent(report, 'problem_description', PROBLEM_DESC_FILE).content.decode('utf8')
+        except Exception as e:
+            raise BridgeException("Can't get problem description for unknown '{}': {}".format(report.pk, e))
+        ReportUnknownCache.objects.filter(id=cache_obj.id).update(problem_description=problem_desc)
+        cache_obj.problem_description = problem_desc
+    return cache_obj.problem_description
+
+
+def get_unknown_desc(report):
+    try:
+        return read_unknown_desc(report)
+    except BridgeException as e:
+        logger.error(str(e))
+        return None
+
+
 class MatchUnknown:
     def __init__(self, description, func, pattern, is_regexp):
         self.description = description
         self.function = func
         self.pattern = pattern
-        if is_regexp:
-            self.problem = self.__match_desc_regexp()
-        else:
-            self.problem = self.__match_desc()
+        self.problem = self.get_problem(self.search(description, func, is_regexp), pattern, is_regexp)
 
-        if isinstance(self.problem, str) and len(self.problem) == 0:
-            self.problem = None
-        if isinstance(self.problem, str) and len(self.problem) > MAX_PROBLEM_LEN:
-            logger.error("Generated problem '%s' is too long" % self.problem)
-            self.problem = 'Too long!'
-
-    def __match_desc_regexp(self):
+    @staticmethod
+    def search(description, func, is_regexp):
+        # Returns None if description does not match the function, groups of the match for regexps and True otherwise
+        if not is_regexp:
+            return True if description.find(func) >= 0 else None
         try:
-            m = re.search(self.function, self.description, re.MULTILINE)
+            m = compile_unknown_pattern(func).search(description)
         except Exception as e:
             logger.exception("Regexp error: %s" % e, stack_info=True)
             return None
-        if m is None:
+        return None if m is None else m.groups()
+
+    @staticmethod
+    def get_problem(match, pattern, is_regexp):
+        if match is None:
             return None
-        try:
-            return self.pattern.format(*m.groups())
-        except IndexError:
-            return self.pattern
+        problem = pattern
+        if is_regexp:
+            try:
+                problem = pattern.format(*match)
+            except IndexError:
+                pass
 
-    def __match_desc(self):
-        if self.description.find(self.function) < 0:
+        if isinstance(problem, str) and len(problem) == 0:
             return None
-        return self.pattern
+        if isinstance(problem, str) and len(problem) > MAX_PROBLEM_LEN:
+            logger.error("Generated problem '%s' is too long" % problem)
+            return 'Too long!'
+        return problem
+
+
+class UnknownMarksMatcher:
+    def __init__(self, marks_data):
+        # Marks with the same function share the search of it in the problem description
+        self._searches = {}
+        for mark_id, function, pattern, is_regexp in marks_data:
+            self._searches.setdefault((function, bool(is_regexp)), []).append((mark_id, pattern))
+
+    def match(self, description):
+        problems = []
+        for (function, is_regexp), marks in self._searches.items():
+            match = MatchUnknown.search(description, function, is_regexp)
+            if match is None:
+                continue
+            for mark_id, pattern in marks:
+                problem = MatchUnknown.get_problem(match, pattern, is_regexp)
+                if problem:
+                    problems.append((mark_id, problem))
+        return problems
 
 
 class ConnectUnknownMark:
@@ -151,13 +205,6 @@ class ConnectUnknownMark:
         mark_reports_qs.delete()
         return reports
 
-    def __get_unknown_desc(self, report):
-        try:
-            return ArchiveFileContent(report, 'problem_description', PROBLEM_DESC_FILE).content.decode('utf8')
-        except Exception as e:
-            logger.error("Can't get problem description for unknown '%s': %s" % (report.id, e))
-            return None
-
     def __add_new_associations(self, prime_id, author):
         if author is None:
             last_version = MarkUnknownHistory.objects.get(mark=self._mark, version=self._mark.version)
@@ -167,8 +214,9 @@ class ConnectUnknownMark:
         associations = []
         for report in ReportUnknown.objects\
                 .filter(component=self._mark.component, cache__attrs__contains=self._mark.cache_attrs)\
-                .select_related('cache').only('id', 'problem_description', 'cache__marks_confirmed'):
-            unknown_desc = self.__get_unknown_desc(report)
+                .select_related('cache')\
+                .only('id', 'problem_description', 'cache__marks_confirmed', 'cache__problem_description'):
+            unknown_desc = get_unknown_desc(report)
             if not unknown_desc:
                 continue
             problem = MatchUnknown(
@@ -197,9 +245,56 @@ class ConnectUnknownMark:
         return new_links
 
 
+def match_unknown_marks(marks_data, reports_data):
+    # Marks are grouped by component and attributes, so all marks of the group are matched together
+    matchers = []
+    for (component, attrs), group_data in marks_data:
+        matchers.append((component, attrs, UnknownMarksMatcher(group_data)))
+
+    results = []
+    for report_id, component, report_attrs, unknown_desc in reports_data:
+        for mark_component, mark_attrs, matcher in matchers:
+            if mark_component != component or not attrs_contained(mark_attrs, report_attrs):
+                continue
+            for mark_id, problem in matcher.match(unknown_desc):
+                results.append((mark_id, report_id, {
+                    'type': ASSOCIATION_TYPE[2][0], 'problem': problem, 'associated': True
+                }))
+    return results
+
+
+class BulkConnectUnknownMarks(BulkConnectMarksBase):
+    history_model = MarkUnknownHistory
+    report_model = ReportUnknown
+    markreport_model = MarkUnknownReport
+    compare_function = staticmethod(match_unknown_marks)
+    report_fields = ('component', 'problem_description', 'cache__problem_description')
+
+    def get_marks_data(self):
+        marks_groups = {}
+        for mark in self._marks:
+            marks_groups.setdefault((mark.component, json.dumps(mark.cache_attrs, sort_keys=True)), []).append(
+                (mark.id, mark.function, mark.problem_pattern, mark.is_regexp)
+            )
+        return list(((component, json.loads(attrs)), group_data)
+                    for (component, attrs), group_data in marks_groups.items())
+
+    def get_reports_qs(self):
+        return super().get_reports_qs().filter(component__in=set(mark.component for mark in self._marks))
+
+    def get_reports_data(self, reports):
+        reports_data = []
+        for report in reports:
+            # Problem description is read just once for all marks
+            unknown_desc = get_unknown_desc(report)
+            if unknown_desc:
+                reports_data.append((report.id, report.component, report.cache.attrs, unknown_desc))
+        return reports_data
+
+
 class CheckUnknownFunction:
     def __init__(self, report, mark_function, pattern, is_regexp):
-        self._desc = self.__read_unknown_desc(report)
+        self._desc = read_unknown_desc(report)
         self._func = mark_function
         self._pattern = pattern
         self._regexp = json.loads(is_regexp)
@@ -213,15 +308,9 @@ class CheckUnknownFunction:
         if self.problem and len(self.problem) > 20:
             raise BridgeException(_('The problem length must be less than 20 characters'))
 
-    def __read_unknown_desc(self, report):
-        try:
-            return ArchiveFileContent(report, 'problem_description', PROBLEM_DESC_FILE).content.decode('utf8')
-        except Exception as e:
-            raise BridgeException("Can't get problem description for unknown '{}': {}".format(report.pk, e))
-
     def __match_desc_regexp(self):
         try:
-            m = re.search(self._func, self._desc, re.MULTILINE)
+            m = compile_unknown_pattern(self._func).search(self._desc)
         except Exception as e:
             logger.exception("Regexp error: %s" % e, stack_info=True)
             return None, str(e)
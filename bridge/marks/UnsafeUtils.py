@@ -19,6 +19,7 @@ import io
 import json
 import copy
 import hashlib
+import random
 import re
 
 from collections import OrderedDict
@@ -33,12 +34,24 @@ from bridge.utils import logger, BridgeException, ArchiveFileContent, RequreLock
 from reports.models import ReportUnsafe
 from marks.models import MarkUnsafe, MarkUnsafeHistory, MarkUnsafeReport, UnsafeConvertionCache, ConvertedTrace
 
-from marks.utils import ConfirmAssociationBase, UnconfirmAssociationBase
+from marks.utils import ConfirmAssociationBase, UnconfirmAssociationBase, BulkConnectMarksBase, attrs_contained
 from caches.utils import RecalculateUnsafeCache, UpdateUnsafeCachesOnMarkChange
 
 
 ET_FILE_NAME = 'converted-error-trace.json'
 
+# MinHash signatures consist of LSH_BANDS * LSH_ROWS values. Error traces with Jaccard index of call forests s become
+# candidates for comparison with probability 1 - (1 - s^LSH_ROWS)^LSH_BANDS, i.e. 99.8% for s = 0.3.
+LSH_BANDS = 64
+LSH_ROWS = 2
+# Marks with lower thresholds are compared with all reports since LSH can miss too much of them
+LSH_MIN_THRESHOLD = 0.3
+MINHASH_PRIME = (1 << 61) - 1
+MINHASH_PERMUTATIONS = tuple(
+    (rnd.randrange(1, MINHASH_PRIME), rnd.randrange(MINHASH_PRIME))
+    for rnd in [random.Random(LSH_BANDS * LSH_ROWS)] for _ in range(LSH_BANDS * LSH_ROWS)
+)
+
 
 def perform_unsafe_mark_create(user, report, serializer):
     error_trace = None
@@ -78,10 +91,11 @@ def perform_unsafe_mark_update(user, serializer):
     # Change the mark
     mark = serializer.save()
 
-    # Update reports cache
+    # Update reports cache. Reports skipped due to the former threshold were not compared with the mark at all.
     if old_cache['attrs'] != mark.cache_attrs \
             or old_cache['error_trace'] != mark.error_trace_id \
-            or old_cache['regexp'] != mark.regexp:
+            or old_cache['regexp'] != mark.regexp \
+            or mark.threshold < old_cache['threshold'] and old_cache['threshold'] >= LSH_MIN_THRESHOLD:
         res = ConnectUnsafeMark(mark, author=user)
         cache_upd = UpdateUnsafeCachesOnMarkChange(mark, res.old_links, res.new_links)
         cache_upd.update_all()
@@ -115,6 +129,27 @@ def jaccard(forest1: set, forest2: set):
     return similar / res
 
 
+def minhash_signature(forest):
+    # Call forests are represented by their MD5 sums, so their prefixes are good enough hashes
+    values = list(int(forest_hash[:15], 16) for forest_hash in forest)
+    if not values:
+        return []
+    return list(min((a * x + b) % MINHASH_PRIME for x in values) for a, b in MINHASH_PERMUTATIONS)
+
+
+def forest_hashes(forest):
+    # Keys of the inverted index from call forests to error traces
+    return sorted(set(int.from_bytes(bytes.fromhex(forest_hash[:16]), 'big', signed=True) for forest_hash in forest))
+
+
+def lsh_buckets(signature):
+    buckets = []
+    for band in range(len(signature) // LSH_ROWS):
+        band_str = '{}:{}'.format(band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+        buckets.append(int.from_bytes(hashlib.md5(band_str.encode('utf8')).digest()[:8], 'big', signed=True))
+    return buckets
+
+
 def regexp_match(error_trace_text: str, regexp: str):
     return int(bool(re.search(re.escape(regexp[1:-1]) if regexp[0] == regexp[-1] == '"'
                               else re.compile(regexp, flags=re.M | re.S), error_trace_text)))
@@ -150,7 +185,9 @@ class ErrorTraceConverter:
                 forest_str = json.dumps(forest, ensure_ascii=False)
                 forest_hash = hashlib.md5(forest_str.encode('utf8')).hexdigest()
                 forests_hashsums.append(forest_hash)
-            conv.trace_cache = {'forest': forests_hashsums}
+            conv.trace_cache = {'forest': forests_hashsums, 'minhash': minhash_signature(forests_hashsums)}
+            conv.lsh_buckets = lsh_buckets(conv.trace_cache['minhash'])
+            conv.forest_hashes = forest_hashes(forests_hashsums)
 
         conv.file.save(ET_FILE_NAME, File(fp), save=True)
         return conv
@@ -222,8 +259,11 @@ class ConnectUnsafeMark:
             last_version = MarkUnsafeHistory.objects.get(mark=self._mark, version=self._mark.version)
             author = last_version.author
 
-        reports_qs = ReportUnsafe.objects.filter(cache__attrs__contains=self._mark.cache_attrs).select_related('cache')
-        compare_results = CompareMark(self._mark).compare(reports_qs)
+        comparison = CompareMark(self._mark)
+        reports_qs = comparison.candidates(
+            ReportUnsafe.objects.filter(cache__attrs__contains=self._mark.cache_attrs).select_related('cache')
+        )
+        compare_results = comparison.compare(reports_qs)
 
         new_links = set()
         associations = []
@@ -248,6 +288,105 @@ class ConnectUnsafeMark:
         return new_links
 
 
+def compare_unsafe_marks(marks_data, reports_data):
+    results = []
+    for report_id, report_attrs, report_traces in reports_data:
+        for mark_id, mark_attrs, convert_function, mark_forests, regexp, threshold in marks_data:
+            if not attrs_contained(mark_attrs, report_attrs):
+                continue
+            if report_traces[convert_function] is None:
+                results.append((mark_id, report_id, {
+                    'type': ASSOCIATION_TYPE[0][0], 'result': 0, 'error': str(UNKNOWN_ERROR), 'associated': False
+                }))
+                continue
+            if mark_forests is None:
+                res = regexp_match(report_traces[convert_function], regexp)
+            else:
+                res = jaccard(mark_forests, report_traces[convert_function])
+                if res == 0:
+                    # Error traces without common call forests are not compared, like in CompareMark.candidates()
+                    continue
+            is_associated = bool(res > 0 and res >= threshold)
+            results.append((mark_id, report_id, {
+                'type': is_associated and ASSOCIATION_TYPE[2][0] or ASSOCIATION_TYPE[0][0],
+                'result': res, 'error': None, 'associated': is_associated
+            }))
+    return results
+
+
+class BulkConnectUnsafeMarks(BulkConnectMarksBase):
+    history_model = MarkUnsafeHistory
+    report_model = ReportUnsafe
+    markreport_model = MarkUnsafeReport
+    compare_function = staticmethod(compare_unsafe_marks)
+    report_fields = ('error_trace',)
+
+    def __init__(self, marks, processes=1):
+        # Ignore non-regexp marks without error trace
+        super().__init__(
+            list(mark for mark in marks if mark.function == 'regexp_match' or mark.error_trace), processes=processes
+        )
+
+    @cached_property
+    def _convert_functions(self):
+        return set(COMPARE_FUNCTIONS[mark.function]['convert'] for mark in self._marks)
+
+    def get_marks_data(self):
+        marks_data = []
+        for mark in self._marks:
+            mark_forests = None
+            if mark.function != 'regexp_match':
+                mark_forests = set(mark.error_trace.trace_cache['forest'])
+            marks_data.append((
+                mark.id, mark.cache_attrs, COMPARE_FUNCTIONS[mark.function]['convert'],
+                mark_forests, mark.regexp, mark.threshold
+            ))
+        return marks_data
+
+    def __get_trace_data(self, conv, data_cache):
+        # Converted error traces are shared by reports with the same error traces
+        if conv.id not in data_cache:
+            if conv.function == 'raw_text_extraction':
+                with open(conv.file.path, mode='r', encoding='utf-8') as fp:
+                    data_cache[conv.id] = fp.read()
+            else:
+                data_cache[conv.id] = set(conv.trace_cache['forest'])
+        return data_cache[conv.id]
+
+    def get_reports_data(self, reports):
+        converted = {}
+        for conv in UnsafeConvertionCache.objects.filter(
+                unsafe_id__in=list(report.id for report in reports),
+                converted__function__in=self._convert_functions
+        ).select_related('converted'):
+            converted[(conv.unsafe_id, conv.converted.function)] = conv.converted
+
+        reports_data = []
+        new_cache = []
+        data_cache = {}
+        for report in reports:
+            report_traces = {}
+            error_trace = None
+            for convert_function in sorted(self._convert_functions):
+                conv = converted.get((report.id, convert_function))
+                if conv is None:
+                    # Error trace is read just once for all convert functions
+                    try:
+                        if error_trace is None:
+                            error_trace = get_report_trace(report)
+                        conv = ErrorTraceConverter(convert_function).convert(error_trace)
+                    except Exception as e:
+                        logger.exception(e)
+                        report_traces[convert_function] = None
+                        continue
+                    new_cache.append(UnsafeConvertionCache(unsafe_id=report.id, converted_id=conv.id))
+                report_traces[convert_function] = self.__get_trace_data(conv, data_cache)
+            reports_data.append((report.id, report.cache.attrs, report_traces))
+        if new_cache:
+            UnsafeConvertionCache.objects.bulk_create(new_cache)
+        return reports_data
+
+
 class ThreadCallForests:
     def __init__(self, error_trace):
         self._trace = error_trace
@@ -424,6 +563,26 @@ class CompareMark:
             UnsafeConvertionCache.objects.bulk_create(new_cache)
         return reports_cache
 
+    def candidates(self, reports_qs):
+        # Skip reports which error traces are surely not similar enough to the mark one
+        if self._mark.function == 'regexp_match' or not self._mark.error_trace:
+            return reports_qs
+
+        conv = self._mark.error_trace
+        converted_qs = UnsafeConvertionCache.objects\
+            .filter(converted__function=COMPARE_FUNCTIONS[self._mark.function]['convert'])
+        if conv.forest_hashes:
+            # Reports can be associated only if they have at least one call forest in common with the mark
+            similar_qs = converted_qs.filter(converted__forest_hashes__overlap=conv.forest_hashes)
+            if self._mark.threshold >= LSH_MIN_THRESHOLD:
+                similar_qs = similar_qs.filter(converted__lsh_buckets__overlap=conv.lsh_buckets)
+        else:
+            # Only empty call forests are similar to empty ones
+            similar_qs = converted_qs.filter(converted__forest_hashes=[])
+
+        # Reports without converted error traces should be compared to get them
+        return reports_qs.filter(Q(id__in=similar_qs.values('unsafe_id')) | ~Q(id__in=converted_qs.values('unsafe_id')))
+
     def compare(self, reports_qs):
         results = {}
         reports_cache = self.__get_reports_cache(reports_qs)
@@ -467,7 +626,7 @@ class CompareReport:
         self._report = report
         self._new_converted_cache = []
         self._raw_trace_cache = {}
-        self._trace_forests_cache = {}
+        self._converted_cache = {}
 
     @cached_property
     def _error_trace(self):
@@ -486,17 +645,40 @@ class CompareReport:
                     self._raw_trace_cache[convert_function] = fp.read()
         return self._raw_trace_cache[convert_function]
 
-    def __get_trace_forests(self, convert_function):
-        if convert_function not in self._trace_forests_cache:
+    def __get_converted_trace(self, convert_function):
+        if convert_function not in self._converted_cache:
             try:
                 conv = ErrorTraceConverter(convert_function).convert(self._error_trace)
             except Exception as e:
                 logger.exception(e)
-                self._trace_forests_cache[convert_function] = None
+                self._converted_cache[convert_function] = None
             else:
                 self._new_converted_cache.append(UnsafeConvertionCache(unsafe=self._report, converted_id=conv.id))
-                self._trace_forests_cache[convert_function] = set(conv.trace_cache['forest'])
-        return self._trace_forests_cache[convert_function]
+                self._converted_cache[convert_function] = conv
+        return self._converted_cache[convert_function]
+
+    def __get_trace_forests(self, convert_function):
+        conv = self.__get_converted_trace(convert_function)
+        return set(conv.trace_cache['forest']) if conv else None
+
+    def candidates(self, marks_qs):
+        # Skip marks which error traces are surely not similar enough to the report one
+        filters = Q(function='regexp_match') | Q(error_trace=None)
+        functions_qs = marks_qs.exclude(function='regexp_match').order_by().values_list('function', flat=True)
+        for function in functions_qs.distinct():
+            conv = self.__get_converted_trace(COMPARE_FUNCTIONS[function]['convert'])
+            if conv is None:
+                # Comparison will fail for all such marks
+                filters |= Q(function=function)
+            elif conv.forest_hashes:
+                # Marks can be associated only if they have at least one call forest in common with the report
+                filters |= Q(function=function, error_trace__forest_hashes__overlap=conv.forest_hashes) & (
+                    Q(threshold__lt=LSH_MIN_THRESHOLD) | Q(error_trace__lsh_buckets__overlap=conv.lsh_buckets)
+                )
+            else:
+                # Only empty call forests are similar to empty ones
+                filters |= Q(function=function, error_trace__forest_hashes=[])
+        return marks_qs.filter(filters)
 
     def compare(self, marks_qs):
         # WARNING: ensure there is select_related('error_trace') for marks queryset
@@ -0,0 +1,46 @@
+#
+# Copyright (c) 2019 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def fill_lsh_buckets(apps, schema_editor):
+    from marks.UnsafeUtils import minhash_signature, lsh_buckets
+
+    ConvertedTrace = apps.get_model('marks', 'ConvertedTrace')
+    for conv in ConvertedTrace.objects.filter(trace_cache__has_key='forest').iterator():
+        conv.trace_cache['minhash'] = minhash_signature(conv.trace_cache['forest'])
+        conv.lsh_buckets = lsh_buckets(conv.trace_cache['minhash'])
+        conv.save(update_fields=['trace_cache', 'lsh_buckets'])
+
+
+class Migration(migrations.Migration):
+    dependencies = [('marks', '0004_alter_marksafe_verdict_alter_marksafehistory_verdict_and_more')]
+
+    operations = [
+        migrations.AddField(
+            model_name='convertedtrace', name='lsh_buckets',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, size=None)
+        ),
+        migrations.RunPython(fill_lsh_buckets, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='convertedtrace',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['lsh_buckets'], name='cache_marks_lsh_buc_94fc24_gin')
+        ),
+    ]
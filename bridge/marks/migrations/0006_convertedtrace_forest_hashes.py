@@ -0,0 +1,45 @@
+#
+# Copyright (c) 2019 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def fill_forest_hashes(apps, schema_editor):
+    from marks.UnsafeUtils import forest_hashes
+
+    ConvertedTrace = apps.get_model('marks', 'ConvertedTrace')
+    for conv in ConvertedTrace.objects.filter(trace_cache__has_key='forest').iterator():
+        conv.forest_hashes = forest_hashes(conv.trace_cache['forest'])
+        conv.save(update_fields=['forest_hashes'])
+
+
+class Migration(migrations.Migration):
+    dependencies = [('marks', '0005_convertedtrace_lsh_buckets')]
+
+    operations = [
+        migrations.AddField(
+            model_name='convertedtrace', name='forest_hashes',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, size=None)
+        ),
+        migrations.RunPython(fill_forest_hashes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='convertedtrace',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['forest_hashes'], name='cache_marks_forest__4cd813_gin')
+        ),
+    ]
@@ -20,6 +20,7 @@ import uuid
 from django.db import models
 from django.db.models.signals import post_delete
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.urls import reverse
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
@@ -42,9 +43,14 @@ class ConvertedTrace(WithFilesMixin, models.Model):
     file = models.FileField(upload_to=CONVERTED_DIR, null=False)
     function = models.CharField(max_length=30, db_index=True, verbose_name=_('Convert trace function'))
     trace_cache = models.JSONField()
+    # LSH buckets of MinHash signature of call forests to find similar error traces quickly
+    lsh_buckets = ArrayField(models.BigIntegerField(), default=list)
+    # Hashes of call forests to find error traces having common call forests quickly
+    forest_hashes = ArrayField(models.BigIntegerField(), default=list)
 
     class Meta:
         db_table = 'cache_marks_trace'
+        indexes = [GinIndex(fields=['lsh_buckets']), GinIndex(fields=['forest_hashes'])]
 
     def __str__(self):
         return self.hash_sum
@@ -28,11 +28,11 @@ from bridge.utils import logger, BridgeException
 from marks.models import MarkSafe, MarkUnsafe, MarkUnknown
 
 from marks.serializers import SafeMarkSerializer, UnsafeMarkSerializer, UnknownMarkSerializer
-from marks.SafeUtils import ConnectSafeMark
-from marks.UnsafeUtils import ConnectUnsafeMark
-from marks.UnknownUtils import ConnectUnknownMark
+from marks.SafeUtils import BulkConnectSafeMarks
+from marks.UnsafeUtils import BulkConnectUnsafeMarks
+from marks.UnknownUtils import BulkConnectUnknownMarks
 from marks.tags import get_all_tags, UploadTagsTree
-from caches.utils import UpdateCachesOnMarkPopulate
+from caches.utils import BulkRecalculateSafeCache, BulkRecalculateUnsafeCache, BulkRecalculateUnknownCache
 
 
 def get_presets_dir():
@@ -52,16 +52,18 @@ def populate_tags():
 
 
 class PopulateSafeMarks:
-    def __init__(self, user=None):
+    def __init__(self, user=None, processes=1):
         self.created = 0
         self.total = 0
         self._author = user
+        self._processes = processes
         self._tags_tree, self._tags_names = get_all_tags()
         self.__populate()
 
     def __populate(self):
         presets_dir = os.path.join(get_presets_dir(), 'safes')
         serializer_fields = ('is_modifiable', 'verdict', 'mark_version')
+        new_marks = []
 
         for mark_filename in os.listdir(presets_dir):
             mark_path = os.path.join(presets_dir, mark_filename)
@@ -89,22 +91,27 @@ class PopulateSafeMarks:
             }, fields=serializer_fields)
             serializer.is_valid(raise_exception=True)
             mark = serializer.save(identifier=identifier, author=self._author, source=MARK_SOURCE[1][0])
-            res = ConnectSafeMark(mark)
-            UpdateCachesOnMarkPopulate(mark, res.new_links).update()
+            new_marks.append(mark)
             self.created += 1
 
+        # Reports are associated with all new marks at once
+        res = BulkConnectSafeMarks(new_marks, processes=self._processes)
+        BulkRecalculateSafeCache(res.affected)
+
 
 class PopulateUnsafeMarks:
-    def __init__(self, user=None):
+    def __init__(self, user=None, processes=1):
         self.created = 0
         self.total = 0
         self._author = user
+        self._processes = processes
         self._tags_tree, self._tags_names = get_all_tags()
         self.__populate()
 
     def __populate(self):
         presets_dir = os.path.join(get_presets_dir(), 'unsafes')
         serializer_fields = ('is_modifiable', 'verdict', 'mark_version', 'function', 'error_trace', 'regexp')
+        new_marks = []
 
         for mark_filename in os.listdir(presets_dir):
             mark_path = os.path.join(presets_dir, mark_filename)
@@ -141,16 +148,20 @@ class PopulateUnsafeMarks:
                 logger.error(f'Population of mark "{mark_filename}" failed!')
                 raise
             mark = serializer.save(identifier=identifier, author=self._author, source=MARK_SOURCE[1][0])
-            res = ConnectUnsafeMark(mark)
-            UpdateCachesOnMarkPopulate(mark, res.new_links).update()
+            new_marks.append(mark)
             self.created += 1
 
+        # Reports are associated with all new marks at once
+        res = BulkConnectUnsafeMarks(new_marks, processes=self._processes)
+        BulkRecalculateUnsafeCache(res.affected)
+
 
 class PopulateUnknownMarks:
-    def __init__(self, user=None):
+    def __init__(self, user=None, processes=1):
         self.created = 0
         self.total = 0
         self._author = user
+        self._processes = processes
         self.__populate()
 
     def __populate(self):
@@ -159,6 +170,7 @@ class PopulateUnknownMarks:
             'component', 'is_modifiable', 'mark_version',
             'function', 'is_regexp', 'problem_pattern', 'link'
         )
+        new_marks = []
 
         for component in os.listdir(presets_dir):
             component_dir = os.path.join(presets_dir, component)
@@ -191,6 +203,9 @@ class PopulateUnknownMarks:
                 serializer = UnknownMarkSerializer(data=mark_data, fields=serializer_fields)
                 serializer.is_valid(raise_exception=True)
                 mark = serializer.save(identifier=identifier, author=self._author, source=MARK_SOURCE[1][0])
-                res = ConnectUnknownMark(mark)
-                UpdateCachesOnMarkPopulate(mark, res.new_links).update()
+                new_marks.append(mark)
                 self.created += 1
+
+        # Reports are associated with all new marks at once
+        res = BulkConnectUnknownMarks(new_marks, processes=self._processes)
+        BulkRecalculateUnknownCache(res.affected)
@@ -17,54 +17,114 @@
 
 from celery import shared_task
 
-from bridge.vars import PROBLEM_DESC_FILE, ASSOCIATION_TYPE
-from bridge.utils import BridgeException, ArchiveFileContent
+from bridge.vars import ASSOCIATION_TYPE
 
 from reports.models import ReportSafe, ReportUnsafe, ReportUnknown
 from marks.models import MarkSafe, MarkSafeReport, MarkUnsafe, MarkUnsafeReport, MarkUnknown, MarkUnknownReport
 
 from marks.UnsafeUtils import CompareReport
-from marks.UnknownUtils import MatchUnknown
+from marks.UnknownUtils import read_unknown_desc, UnknownMarksMatcher
 from caches.utils import RecalculateSafeCache, RecalculateUnsafeCache, RecalculateUnknownCache
 
 
-@shared_task
-def connect_safe_report(report_id):
-    report = ReportSafe.objects.select_related('cache').get(pk=report_id)
+def safe_associations(report):
     marks_qs = MarkSafe.objects.filter(cache_attrs__contained_by=report.cache.attrs)
-    MarkSafeReport.objects.bulk_create(list(
+    return list(
         MarkSafeReport(mark_id=m_id, report=report, associated=True, type=ASSOCIATION_TYPE[2][0])
         for m_id in marks_qs.values_list('id', flat=True)
-    ))
+    )
+
+
+def unsafe_associations(report):
+    comparison = CompareReport(report)
+    marks_qs = comparison.candidates(
+        MarkUnsafe.objects.filter(cache_attrs__contained_by=report.cache.attrs).select_related('error_trace')
+    )
+    compare_results = comparison.compare(marks_qs)
+    return list(MarkUnsafeReport(
+        mark_id=mark_id, report=report, **compare_results[mark_id]
+    ) for mark_id in compare_results)
+
+
+def unknown_associations(report):
+    problem_desc = read_unknown_desc(report)
+    marks_qs = MarkUnknown.objects.filter(component=report.component, cache_attrs__contained_by=report.cache.attrs)
+    matcher = UnknownMarksMatcher(marks_qs.values_list('id', 'function', 'problem_pattern', 'is_regexp'))
+    return list(MarkUnknownReport(
+        mark_id=mark_id, report=report, problem=problem, associated=True, type=ASSOCIATION_TYPE[2][0]
+    ) for mark_id, problem in matcher.match(problem_desc))
+
+
+@shared_task
+def connect_safe_report(report_id):
+    report = ReportSafe.objects.select_related('cache').get(pk=report_id)
+    MarkSafeReport.objects.bulk_create(safe_associations(report))
     RecalculateSafeCache(report.id)
 
 
 @shared_task
 def connect_unsafe_report(report_id):
     report = ReportUnsafe.objects.select_related('cache').get(pk=report_id)
-    marks_qs = MarkUnsafe.objects.filter(cache_attrs__contained_by=report.cache.attrs).select_related('error_trace')
-    compare_results = CompareReport(report).compare(marks_qs)
-
-    MarkUnsafeReport.objects.bulk_create(list(MarkUnsafeReport(
-        mark_id=mark.id, report=report, **compare_results[mark.id]
-    ) for mark in marks_qs))
+    MarkUnsafeReport.objects.bulk_create(unsafe_associations(report))
     RecalculateUnsafeCache(report.id)
 
 
 @shared_task
 def connect_unknown_report(report_id):
     report = ReportUnknown.objects.select_related('cache').get(pk=report_id)
-    try:
-        problem_desc = ArchiveFileContent(report, 'problem_description', PROBLEM_DESC_FILE).content.decode('utf8')
-    except Exception as e:
-        raise BridgeException("Can't read problem description for unknown '{}': {}".format(report.id, e))
-    new_markreports = []
-    for mark in MarkUnknown.objects.filter(component=report.component, cache_attrs__contained_by=report.cache.attrs):
-        problem = MatchUnknown(problem_desc, mark.function, mark.problem_pattern, mark.is_regexp).problem
-        if not problem:
-            continue
-        new_markreports.append(MarkUnknownReport(
-            mark_id=mark.id, report=report, problem=problem, associated=True, type=ASSOCIATION_TYPE[2][0]
-        ))
-    MarkUnknownReport.objects.bulk_create(new_markreports)
+    MarkUnknownReport.objects.bulk_create(unknown_associations(report))
     RecalculateUnknownCache(report.id)
+
+
+class ConnectReportsBase:
+    """
+    Associate many new leaves with marks at once. Unlike tasks for single reports, associations are saved in bulk and
+    caches of reports are recalculated together, so aggregates of decisions are updated once per chunk.
+    """
+    report_model = None
+    markreport_model = None
+    recalculate_cache = None
+    chunk_size = 1000
+
+    def __init__(self, reports_ids):
+        assert self.report_model and self.markreport_model and self.recalculate_cache
+        reports_ids = list(reports_ids)
+        for i in range(0, len(reports_ids), self.chunk_size):
+            self.__connect(reports_ids[i:i + self.chunk_size])
+
+    def get_associations(self, report):
+        raise NotImplementedError('Please implement the method!')
+
+    def __connect(self, reports_ids):
+        new_markreports = []
+        for report in self.report_model.objects.filter(id__in=reports_ids).select_related('cache'):
+            new_markreports.extend(self.get_associations(report))
+        self.markreport_model.objects.bulk_create(new_markreports)
+        self.recalculate_cache(reports_ids)
+
+
+class ConnectSafeReports(ConnectReportsBase):
+    report_model = ReportSafe
+    markreport_model = MarkSafeReport
+    recalculate_cache = RecalculateSafeCache
+
+    def get_associations(self, report):
+        return safe_associations(report)
+
+
+class ConnectUnsafeReports(ConnectReportsBase):
+    report_model = ReportUnsafe
+    markreport_model = MarkUnsafeReport
+    recalculate_cache = RecalculateUnsafeCache
+
+    def get_associations(self, report):
+        return unsafe_associations(report)
+
+
+class ConnectUnknownReports(ConnectReportsBase):
+    report_model = ReportUnknown
+    markreport_model = MarkUnknownReport
+    recalculate_cache = RecalculateUnknownCache
+
+    def get_associations(self, report):
+        return unknown_associations(report)
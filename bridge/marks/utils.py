@@ -15,8 +15,14 @@
 # limitations under the License.
 #
 
+import json
+import multiprocessing
+
+from collections import deque
 from difflib import unified_diff
 
+from django.db import connections, transaction
+from django.db.models import Q, F
 from django.utils.functional import cached_property
 from django.utils.translation import gettext as _
 
@@ -311,3 +317,119 @@ class UnconfirmAssociationBase:
                 .update(associated=True)
 
         self.recalculate_cache(self._object.report_id)
+
+
+def attrs_contained(mark_attrs, report_attrs):
+    # The same as "cache__attrs__contains" lookup for flat attributes
+    return all(report_attrs.get(name) == value for name, value in mark_attrs.items())
+
+
+class ComparisonPool:
+    """
+    Compare chunks of reports in worker processes. As DB connections are closed before forking, it must be used just
+    in background tasks and management commands but not while handling requests, so it is sequential by default.
+    """
+    # Number of chunks waiting for processing per worker process
+    pending_per_process = 2
+
+    def __init__(self, func, callback, chunks_number, processes=1):
+        self._func = func
+        self._callback = callback
+        self._processes = min(processes, chunks_number)
+        self._pool = None
+        self._pending = deque()
+
+    def __enter__(self):
+        if self._processes > 1:
+            # Worker processes are forked and must not share DB connections with the parent one
+            connections.close_all()
+            self._pool = multiprocessing.get_context('fork').Pool(self._processes)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                while self._pending:
+                    self._callback(self._pending.popleft().get())
+        finally:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool.join()
+
+    def submit(self, *args):
+        if self._pool is None:
+            self._callback(self._func(*args))
+            return
+        self._pending.append(self._pool.apply_async(self._func, args))
+        if len(self._pending) > self._processes * self.pending_per_process:
+            # Results are saved in the parent process as DB can't be used by workers
+            self._callback(self._pending.popleft().get())
+
+
+class BulkConnectMarksBase:
+    history_model = None
+    report_model = None
+    markreport_model = None
+    # Module level function comparing marks with reports data in worker processes
+    compare_function = None
+    report_fields = ()
+    chunk_size = 1000
+    batch_size = 10000
+
+    def __init__(self, marks, processes=1):
+        assert self.history_model and self.report_model and self.markreport_model and self.compare_function
+        self._marks = list(marks)
+        self._processes = processes
+        self._confirmed = set()
+        self._authors = {}
+        self.affected = set()
+        if self._marks:
+            self.__connect()
+
+    def get_marks_data(self):
+        raise NotImplementedError('Please implement the method!')
+
+    def get_reports_data(self, reports):
+        raise NotImplementedError('Please implement the method!')
+
+    def get_reports_qs(self):
+        reports_filter = Q()
+        for attrs in set(json.dumps(mark.cache_attrs, sort_keys=True) for mark in self._marks):
+            reports_filter |= Q(cache__attrs__contains=json.loads(attrs))
+        return self.report_model.objects.filter(reports_filter)
+
+    def __connect(self):
+        old_qs = self.markreport_model.objects.filter(mark__in=self._marks)
+        self.affected = set(old_qs.values_list('report_id', flat=True))
+        old_qs.delete()
+
+        self._authors = dict(self.history_model.objects.filter(
+            mark__in=self._marks, version=F('mark__version')
+        ).values_list('mark_id', 'author_id'))
+
+        marks_data = self.get_marks_data()
+        reports_ids = list(self.get_reports_qs().order_by('id').values_list('id', flat=True))
+        chunks = list(reports_ids[i:i + self.chunk_size] for i in range(0, len(reports_ids), self.chunk_size))
+        with ComparisonPool(self.compare_function, self.__save_associations, len(chunks), self._processes) as pool:
+            for chunk in chunks:
+                pool.submit(marks_data, self.__get_reports_data(chunk))
+
+    def __get_reports_data(self, reports_ids):
+        reports = list(self.report_model.objects.filter(id__in=reports_ids).select_related('cache')
+                       .only('id', 'cache__attrs', 'cache__marks_confirmed', *self.report_fields))
+        self._confirmed |= set(report.id for report in reports if report.cache.marks_confirmed)
+        return self.get_reports_data(reports)
+
+    def __save_associations(self, results):
+        associations = []
+        for mark_id, report_id, association_data in results:
+            association = self.markreport_model(
+                mark_id=mark_id, report_id=report_id, author_id=self._authors.get(mark_id), **association_data
+            )
+            if report_id in self._confirmed:
+                # Do not count automatic associations if report has confirmed ones
+                association.associated = False
+            associations.append(association)
+            self.affected.add(report_id)
+        with transaction.atomic():
+            self.markreport_model.objects.bulk_create(associations, batch_size=self.batch_size)
@@ -40,7 +40,7 @@ from service.models import Task
 from caches.models import ReportSafeCache, ReportUnsafeCache, ReportUnknownCache
 
 from reports.serializers import ReportAttrSerializer, ComputerSerializer
-from reports.tasks import fill_coverage_statistics
+from reports.tasks import fill_coverage_statistics, prewarm_source_code_cache
 from marks.tasks import connect_safe_report, connect_unsafe_report, connect_unknown_report
 from service.utils import FinishDecision
 
@@ -802,6 +802,9 @@ class UploadReports:
         # Connect new unsafe with marks
         connect_unsafe_report.delay(report.id)
 
+        # Render source files of the error trace in background, so that experts will not wait for it
+        prewarm_source_code_cache.delay(report.id)
+
         self._logger.log("UF2", report.pk)
 
     def __upload_additional_sources(self, arch_name):
@@ -15,8 +15,11 @@
 # limitations under the License.
 #
 
+import contextlib
+import gzip
 import json
 
+from django.db import connection
 from django.http import HttpResponse
 from django.template import loader
 from django.urls import reverse
@@ -38,13 +41,15 @@ from tools.profiling import LoggedCallMixin
 
 from jobs.models import Decision
 from reports.models import (
-    Report, ReportComponent, OriginalSources, CoverageArchive, ReportAttr, CompareDecisionsInfo, ReportImage
+    Report, ReportComponent, ReportUnsafe, OriginalSources, CoverageArchive, ReportAttr, CompareDecisionsInfo,
+    ReportImage
 )
 
 from jobs.utils import JobAccess, DecisionAccess
 from reports.comparison import FillComparisonCache, ComparisonData
 from reports.coverage import GetCoverageData, ReportCoverageStatistics
 from reports.serializers import OriginalSourcesSerializer, PatchReportAttrSerializer, ReportImageSerializer
+from reports.etv import CachedETV
 from reports.source import GetSource
 from reports.UploadReport import UploadReports
 
@@ -104,6 +109,19 @@ class UploadOriginalSourcesView(LoggedCallMixin, CreateAPIView):
     permission_classes = (ServicePermission,)
 
 
+@contextlib.contextmanager
+def lock_decision_reports(decision_id):
+    # Reports of a decision form one tree and concurrent inserts of its nodes would shift bounds of nodes using stale
+    # ones, so reports of each decision are uploaded one request after another.
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(hashtext('decision_reports'), %s)", [decision_id])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(hashtext('decision_reports'), %s)", [decision_id])
+
+
 class UploadReportView(LoggedCallMixin, APIView):
     permission_classes = (ServicePermission,)
 
@@ -112,12 +130,41 @@ class UploadReportView(LoggedCallMixin, APIView):
         if decision.status != DECISION_STATUS[2][0]:
             raise exceptions.APIException('Reports can be uploaded only for processing decisions')
 
-        reports_uploader = UploadReports(decision)
-        if 'archives' in request.POST:
-            reports_uploader.validate_archives(json.loads(request.POST['archives']), request.FILES)
-        reports_uploader.upload_all(json.loads(request.POST['reports']))
+        reports = self.get_reports(request)
+        with lock_decision_reports(decision.id):
+            reports_uploader = UploadReports(decision)
+            if 'archives' in request.POST:
+                reports_uploader.validate_archives(json.loads(request.POST['archives']), request.FILES)
+            reports_uploader.upload_all(reports)
         return Response({})
 
+    def get_reports(self, request):
+        return json.loads(request.POST['reports'])
+
+
+class UploadReportsBundleView(UploadReportView):
+    decompressors = {
+        'gzip': gzip.GzipFile
+    }
+
+    def get_reports(self, request):
+        if 'bundle' not in request.FILES:
+            raise exceptions.ValidationError(detail={'bundle': 'Required'})
+        compression = request.POST.get('compression', 'gzip')
+        if compression not in self.decompressors:
+            raise exceptions.ValidationError(detail={
+                'compression': 'Compression "{}" is not supported'.format(compression)
+            })
+        try:
+            with self.decompressors[compression](fileobj=request.FILES['bundle'], mode='rb') as fp:
+                reports = json.load(fp)
+        except (OSError, EOFError, ValueError) as e:
+            logger.exception(e)
+            raise exceptions.ValidationError(detail={'bundle': 'Reports bundle is corrupted'})
+        if not isinstance(reports, list):
+            raise exceptions.ValidationError(detail={'bundle': 'Reports bundle should contain a list of reports'})
+        return reports
+
 
 class GetSourceCodeView(LoggedCallMixin, APIView):
     permission_classes = (IsAuthenticated,)
@@ -126,10 +173,22 @@ class GetSourceCodeView(LoggedCallMixin, APIView):
         if 'file_name' not in self.request.query_params:
             raise exceptions.APIException('File name was not provided')
         report = get_object_or_404(Report.objects.only('id'), id=report_id)
-        source_collector = GetSource(self.request, report)
+        source_collector = GetSource.from_request(self.request, report)
         return HttpResponse(source_collector.get_html())
 
 
+class GetETVScopeView(LoggedCallMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, report_id):
+        if 'scope' not in self.request.query_params:
+            raise exceptions.APIException('Scope was not provided')
+        report = get_object_or_404(ReportUnsafe.objects.select_related('decision__job'), id=report_id)
+        if not JobAccess(self.request.user, report.decision.job).can_view:
+            raise exceptions.PermissionDenied(_("You don't have an access to this job"))
+        return HttpResponse(CachedETV(report, self.request.user).get_scope_html(self.request.query_params['scope']))
+
+
 class ClearVerificationFilesView(LoggedCallMixin, DestroyAPIView):
     unparallel = [Report]
     permission_classes = (IsAuthenticated,)
@@ -15,8 +15,10 @@
 # limitations under the License.
 #
 
+import io
 import re
 import json
+import zipfile
 from urllib.parse import unquote
 from wsgiref.util import FileWrapper
 
@@ -226,29 +228,32 @@ class FillCoverageStatistics:
     def __init__(self, coverage_obj):
         self.has_extra = False
         self.coverage_obj = coverage_obj
-        self._statistics, self._data_stat = self.__get_statistics()
-        self.__save_statistics()
-        self.__save_data_statistics()
+        self._roots = []
+        self.__fill_statistics()
 
-    def __get_statistics(self):
+    def __read_coverage_file(self):
+        # Parse the file right from the archive to avoid keeping its whole content in memory besides parsed data
         try:
-            res = ArchiveFileContent(self.coverage_obj, 'archive', COVERAGE_FILE)
+            with zipfile.ZipFile(self.coverage_obj.archive.path) as zfp:
+                with zfp.open(COVERAGE_FILE) as fp:
+                    data = json.load(io.TextIOWrapper(fp, encoding='utf8'))
         except Exception as e:
             raise BridgeException(_("Error while extracting source file: %(error)s") % {'error': str(e)})
-        data = json.loads(res.content.decode('utf8'))
         if data.get('format') != ETV_FORMAT:
             raise BridgeException(_('Code coverage format is not supported'))
         if 'coverage statistics' not in data:
             raise BridgeException(_('Common code coverage file does not contain statistics'))
-        return data['coverage statistics'], data['data statistics']
+        return data
 
-    def __save_statistics(self):
-        CoverageStatistics.objects.filter(coverage=self.coverage_obj).delete()
+    def __fill_statistics(self):
+        data = self.__read_coverage_file()
 
-        cnt = 0
+        # Files statistics are dropped right after they are processed
+        statistics = data.pop('coverage statistics')
         new_objects = {}
-        for fname in self._statistics:
-            cov_data = self._statistics[fname]
+        children = {}
+        while statistics:
+            fname, cov_data = statistics.popitem()
             if len(cov_data) == 4:
                 cov_lines, tot_lines, cov_funcs, tot_func = cov_data
             else:
@@ -259,15 +264,15 @@ class FillCoverageStatistics:
             for i in range(len(path_l)):
                 curr_path = path_l[:(i + 1)]
                 if curr_path not in new_objects:
-                    cnt += 1
                     parent_id = new_objects[path_l[:i]].identifier if i > 0 else None
                     new_objects[curr_path] = CoverageStatistics(
-                        coverage_id=self.coverage_obj.id, identifier=cnt, parent=parent_id,
+                        coverage_id=self.coverage_obj.id, identifier=len(new_objects) + 1, parent=parent_id,
                         is_leaf=bool(i + 1 == len(path_l)),
                         name=path_l[i],
                         path='/'.join(curr_path),
                         depth=len(curr_path)
                     )
+                    children.setdefault(parent_id, []).append(new_objects[curr_path])
                 if cov_lines is not None and cov_funcs is not None:
                     new_objects[curr_path].lines_covered += cov_lines
                     new_objects[curr_path].lines_total += tot_lines
@@ -280,42 +285,32 @@ class FillCoverageStatistics:
                 new_objects[curr_path].lines_total_extra += tot_lines
                 new_objects[curr_path].funcs_total_extra += tot_func
 
-        ordered_objects_list = list(sorted(new_objects.values(), key=lambda x: (x.is_leaf, x.name)))
-
-        def __get_all_children(covstat_obj):
-            children = []
-            if covstat_obj.is_leaf:
-                return children
-            for obj in ordered_objects_list:
-                if obj.parent == covstat_obj.identifier:
-                    children.append(obj)
-                    children.extend(__get_all_children(obj))
-            return children
+        # Directories go before files, both are sorted by names
+        for children_list in children.values():
+            children_list.sort(key=lambda x: (x.is_leaf, x.name))
 
+        self._roots = list(new_objects[(root_name,)] for root_name in ROOT_DIRS_ORDER if (root_name,) in new_objects)
         ordered_objects = []
-        for root_name in ROOT_DIRS_ORDER:
-            root_path = (root_name,)
-            if root_path not in new_objects:
-                continue
-            ordered_objects.append(new_objects[root_path])
-            ordered_objects.extend(__get_all_children(new_objects[root_path]))
+        stack = list(reversed(self._roots))
+        while stack:
+            covstat_obj = stack.pop()
+            ordered_objects.append(covstat_obj)
+            stack.extend(reversed(children.get(covstat_obj.identifier, [])))
 
-        CoverageStatistics.objects.bulk_create(ordered_objects)
+        data_statistics = data.pop('data statistics', {})
+        new_data_objects = list(CoverageDataStatistics(
+            coverage_id=self.coverage_obj.id, name=name, data=data_statistics[name]
+        ) for name in sorted(data_statistics))
 
-    def __save_data_statistics(self):
+        CoverageStatistics.objects.filter(coverage=self.coverage_obj).delete()
+        CoverageStatistics.objects.bulk_create(ordered_objects, batch_size=10000)
         CoverageDataStatistics.objects.filter(coverage=self.coverage_obj).delete()
-        new_objects = []
-        for name in sorted(self._data_stat):
-            new_objects.append(CoverageDataStatistics(
-                coverage_id=self.coverage_obj.id, name=name, data=self._data_stat[name]
-            ))
-        CoverageDataStatistics.objects.bulk_create(new_objects)
+        CoverageDataStatistics.objects.bulk_create(new_data_objects)
 
     @property
     def total_coverage(self):
         total_statistics = [0, 0, 0, 0]
-        for cov_obj in CoverageStatistics.objects.filter(coverage=self.coverage_obj, depth=1):
-            assert isinstance(cov_obj, CoverageStatistics)
+        for cov_obj in self._roots:
             total_statistics[0] += cov_obj.lines_covered
             total_statistics[1] += cov_obj.lines_total
             total_statistics[2] += cov_obj.funcs_covered
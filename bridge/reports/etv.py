@@ -15,11 +15,24 @@
 # limitations under the License.
 #
 
+import hashlib
+import io
 import json
+import zipfile
+from datetime import timedelta
 
+from django.core.files import File
+from django.db import connection, transaction
+from django.template import loader
+from django.urls import reverse
 from django.utils.functional import cached_property
-from django.utils.translation import gettext_lazy as _
+from django.utils.timezone import now
+from django.utils.translation import gettext_lazy as _, get_language
 
+from bridge.vars import ERROR_TRACE_FILE
+from bridge.utils import ArchiveFileContent
+
+from reports.models import ErrorTraceCache
 from reports.source import SourceLine
 
 
@@ -44,6 +57,20 @@ class GetETV:
         if self.trace['trace']:
             self.html_trace.extend(self.__parse_node(self.trace['trace'], 0, None, 0))
 
+    @cached_property
+    def initial_trace(self):
+        # Nodes of scopes that are shown initially
+        return list(node for node in self.html_trace if node['scope'] in self.shown_scopes)
+
+    @cached_property
+    def collapsed_scopes(self):
+        # Nodes of scopes that are not shown initially, they can be loaded on demand
+        scopes = {}
+        for node in self.html_trace:
+            if node['scope'] not in self.shown_scopes:
+                scopes.setdefault(node['scope'], []).append(node)
+        return scopes
+
     def __get_threads(self):
         threads = []
         if self.trace.get('global variable declarations'):
@@ -353,6 +380,87 @@ class GetETV:
         return notes_data
 
 
+class CachedETV:
+    main_file = 'etv.html'
+    scope_file = 'scope-{}.html'
+    # Like for source code cache
+    access_date_precision = timedelta(minutes=5)
+
+    def __init__(self, report, user):
+        self._report = report
+        self._user = user
+        self.identifier = self.__get_cache_identifier()
+
+    def __get_cache_identifier(self):
+        identifier_data = json.dumps([
+            get_language(), self._report.error_trace.name, self._user.assumptions, self._user.triangles,
+            self._user.notes_level, self._user.declarations_number
+        ]).encode('utf-8')
+        return hashlib.md5(identifier_data).hexdigest()
+
+    def __render(self):
+        etv = GetETV(ArchiveFileContent(self._report, 'error_trace', ERROR_TRACE_FILE).content.decode('utf8'),
+                     self._user)
+        nodes_template = loader.get_template('reports/ErrorTraceNodes.html')
+
+        fp = io.BytesIO()
+        with zipfile.ZipFile(fp, mode='w', compression=zipfile.ZIP_DEFLATED) as zfp:
+            zfp.writestr(self.main_file, loader.get_template('reports/ErrorTrace.html').render({
+                'etv': etv, 'lazy_scopes': etv.collapsed_scopes,
+                'scopes_url': reverse('reports:api-etv-scope', args=[self._report.id])
+            }))
+            for scope, nodes in etv.collapsed_scopes.items():
+                zfp.writestr(self.scope_file.format(scope), nodes_template.render({
+                    'nodes': nodes, 'shown_scopes': etv.shown_scopes, 'lazy_scopes': etv.collapsed_scopes
+                }))
+        fp.seek(0)
+        return fp
+
+    def __read_cached(self, file_name):
+        etv_cache = ErrorTraceCache.objects.filter(report=self._report, identifier=self.identifier)\
+            .only('id', 'archive', 'access_date').first()
+        if not etv_cache:
+            return None
+        try:
+            with zipfile.ZipFile(etv_cache.archive.path) as zfp:
+                try:
+                    content = zfp.read(file_name).decode('utf8')
+                except KeyError:
+                    # There is no such scope
+                    content = ''
+        except FileNotFoundError:
+            # The cache object has been just removed
+            return None
+        if etv_cache.access_date < now() - self.access_date_precision:
+            ErrorTraceCache.objects.filter(id=etv_cache.id).update(access_date=now())
+        return content
+
+    @transaction.atomic
+    def __render_cached(self, file_name):
+        # Render the error trace just once if there are several simultaneous requests for it
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [int(self.identifier[:15], 16)])
+
+        content = self.__read_cached(file_name)
+        if content is None:
+            etv_cache = ErrorTraceCache(report=self._report, identifier=self.identifier)
+            etv_cache.archive.save('etv.zip', File(self.__render()), save=True)
+            content = self.__read_cached(file_name)
+        return content
+
+    def __get(self, file_name):
+        content = self.__read_cached(file_name)
+        if content is None:
+            content = self.__render_cached(file_name)
+        return content
+
+    def get_html(self):
+        return self.__get(self.main_file)
+
+    def get_scope_html(self, scope):
+        return self.__get(self.scope_file.format(scope))
+
+
 class ETVHtml:
     max_source_length = 500
     tab_length = 4
@@ -0,0 +1,53 @@
+#
+# Copyright (c) 2019 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import hashlib
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from caches.models import ReportSafeCache, ReportUnsafeCache, ReportUnknownCache
+
+
+class Command(BaseCommand):
+    help = 'Creates expression indexes for attributes of leaves listed in INDEXED_ATTRS setting and drops other ones.'
+    requires_migrations_checks = True
+
+    def handle(self, *args, **kwargs):
+        # Indexes are built concurrently, so tables of leaves caches are not locked for writing meanwhile
+        with connection.cursor() as cursor:
+            for db_table in (ReportSafeCache._meta.db_table, ReportUnsafeCache._meta.db_table,
+                             ReportUnknownCache._meta.db_table):
+                prefix = '{}_attr_'.format(db_table)
+                indexes = dict(
+                    ('{}{}'.format(prefix, hashlib.md5(attr_name.encode('utf8')).hexdigest()[:12]), attr_name)
+                    for attr_name in settings.INDEXED_ATTRS
+                )
+                for index_name, attr_name in indexes.items():
+                    # It is the same expression that is used for filtering and sorting leaves by the attribute
+                    cursor.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS {} ON {} (("attrs"->>%s))'.format(
+                        connection.ops.quote_name(index_name), connection.ops.quote_name(db_table)
+                    ), [attr_name])
+
+                cursor.execute('SELECT indexname FROM pg_indexes WHERE tablename = %s', [db_table])
+                for index_name in list(row[0] for row in cursor.fetchall()):
+                    if index_name.startswith(prefix) and index_name not in indexes:
+                        cursor.execute('DROP INDEX CONCURRENTLY IF EXISTS {}'.format(
+                            connection.ops.quote_name(index_name)
+                        ))
+                self.stdout.write('{} attribute indexes are kept for {}'.format(len(indexes), db_table))
@@ -73,6 +73,12 @@ def source_code_path(instance, filename):
     )
 
 
+def error_trace_cache_path(instance, filename):
+    assert isinstance(filename, str)
+    return os.path.join('Reports', 'ErrorTraceCache', 'Unsafe-%s' % instance.report_id,
+                        'etv-{}.zip'.format(instance.identifier[:16]))
+
+
 class AttrBase(models.Model):
     name = models.CharField(max_length=64, db_index=True)
     value = models.CharField(max_length=255)
@@ -399,6 +405,16 @@ class SourceCodeCache(WithFilesMixin, models.Model):
         db_table = 'cache_source_code'
 
 
+class ErrorTraceCache(WithFilesMixin, models.Model):
+    report = models.ForeignKey(ReportUnsafe, models.CASCADE, related_name='etv_cache')
+    identifier = models.CharField(max_length=256, db_index=True)
+    archive = models.FileField(upload_to=error_trace_cache_path)
+    access_date = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'cache_error_trace'
+
+
 class ReportImage(WithFilesMixin, models.Model):
     report = models.ForeignKey(ReportComponent, models.CASCADE, related_name='images')
     title = models.TextField()
@@ -420,4 +436,5 @@ post_delete.connect(remove_instance_files, sender=ReportUnsafe)
 post_delete.connect(remove_instance_files, sender=ReportUnknown)
 post_delete.connect(remove_instance_files, sender=CoverageArchive)
 post_delete.connect(remove_instance_files, sender=SourceCodeCache)
+post_delete.connect(remove_instance_files, sender=ErrorTraceCache)
 post_delete.connect(remove_instance_files, sender=ReportImage)
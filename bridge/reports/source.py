@@ -19,10 +19,11 @@ import hashlib
 import io
 import json
 from collections import OrderedDict
+from datetime import timedelta
 from urllib.parse import unquote
 
 from django.core.files import File
-from django.db import transaction
+from django.db import connection, transaction
 from django.template import loader
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _, get_language
@@ -292,8 +293,8 @@ class ParseSource:
     index_postfix = '.idx.json'
     coverage_postfix = '.cov.json'
 
-    def __init__(self, user, file_name, ancestors, coverage_qs, with_legend):
-        self._user = user
+    def __init__(self, file_name, ancestors, coverage_qs, with_legend, coverage_data):
+        self._with_coverage_data = coverage_data
         self._ancestors = ancestors
         self.file_name = file_name
         self._coverage_qs = coverage_qs
@@ -387,7 +388,7 @@ class ParseSource:
 
     @cached_property
     def _coverage_data(self):
-        if not self._coverage or not self._user.coverage_data or not self._coverage.get('data'):
+        if not self._coverage or not self._with_coverage_data or not self._coverage.get('data'):
             return set()
         return set(self._coverage['data'])
 
@@ -506,15 +507,28 @@ class ParseSource:
 
 
 class GetSource:
-    def __init__(self, request, report):
-        self._request = request
+    # Cache objects are removed if they were not accessed for hours, so there is no need to update the access date on
+    # each cache hit.
+    access_date_precision = timedelta(minutes=5)
+
+    def __init__(self, report, file_name, with_legend=False, coverage_id=None, coverage_data=False):
         self._report = report
-        self.file_name = self.__parse_file_name()
-        self.with_legend = (self._request.query_params.get('with_legend') == 'true')
+        self.file_name = self.__parse_file_name(file_name)
+        self.with_legend = with_legend
+        self._coverage_id = coverage_id
+        self._coverage_data = coverage_data
         self.identifier = self.__get_cache_identifier()
 
-    def __parse_file_name(self):
-        file_name = self._request.query_params['file_name']
+    @classmethod
+    def from_request(cls, request, report):
+        return cls(
+            report, request.query_params['file_name'],
+            with_legend=(request.query_params.get('with_legend') == 'true'),
+            coverage_id=request.query_params.get('coverage_id'),
+            coverage_data=request.user.coverage_data
+        )
+
+    def __parse_file_name(self, file_name):
         name = unquote(file_name)
         if name.startswith('/'):
             name = name[1:]
@@ -537,10 +551,9 @@ class GetSource:
 
         # If coverage_id is set then it can be source for Sub-job or Core only,
         # Otherwise - for verification report or its leaf.
-        coverage_id = self._request.query_params.get('coverage_id')
-        if coverage_id:
+        if self._coverage_id:
             # For full coverage (Subjob reports) where there can be several coverages
-            qs_filters['id'] = coverage_id
+            qs_filters['id'] = self._coverage_id
         else:
             # Do not use full coverage for sub-jobs
             qs_filters['identifier'] = ''
@@ -549,7 +562,7 @@ class GetSource:
 
     def __get_cache_identifier(self):
         identifier_data = json.dumps([
-            get_language(), self.file_name, self.with_legend,
+            get_language(), self.file_name, self.with_legend, self._coverage_data,
             list([r.id, r.original_sources_id, r.additional_sources_id] for r in self._ancestors),
             list(ca.id for ca in self._coverage_qs)
         ]).encode('utf-8')
@@ -557,24 +570,47 @@ class GetSource:
 
     def __render_html(self):
         try:
-            data = ParseSource(self._request.user, self.file_name, self._ancestors, self._coverage_qs, self.with_legend)
+            data = ParseSource(self.file_name, self._ancestors, self._coverage_qs, self.with_legend,
+                               self._coverage_data)
         except SourceNotFound:
             data = None
         template = loader.get_template('reports/SourceCode.html')
-        return template.render({'data': data}, self._request)
+        return template.render({'data': data})
 
-    @transaction.atomic
-    def get_html(self):
-        src_code = SourceCodeCache.objects.filter(identifier=self.identifier).select_for_update().first()
-        if src_code:
+    def __get_cached_html(self):
+        src_code = SourceCodeCache.objects.filter(identifier=self.identifier)\
+            .only('id', 'file', 'access_date').first()
+        if not src_code:
+            return None
+        try:
             with open(src_code.file.path, mode='rb') as fp:
                 html_content_b = fp.read()
-            src_code.access_date = now()
-            src_code.save()
-        else:
+        except FileNotFoundError:
+            # The cache object has been just removed
+            return None
+        if src_code.access_date < now() - self.access_date_precision:
+            SourceCodeCache.objects.filter(id=src_code.id).update(access_date=now())
+        return html_content_b
+
+    @transaction.atomic
+    def __render_cached_html(self):
+        # Render the source code just once if there are several simultaneous requests for it.
+        # Others will wait until the transaction is committed and get the rendered source code from the cache.
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [int(self.identifier[:15], 16)])
+
+        html_content_b = self.__get_cached_html()
+        if html_content_b is None:
             html_content_b = self.__render_html().encode('utf8')
             fp = io.BytesIO(html_content_b)
             fp.seek(0)
             src_code = SourceCodeCache(identifier=self.identifier)
             src_code.file.save('SourceCode.html', File(fp), save=True)
         return html_content_b
+
+    def get_html(self):
+        # Cache hits do not lock anything
+        html_content_b = self.__get_cached_html()
+        if html_content_b is None:
+            html_content_b = self.__render_cached_html()
+        return html_content_b
@@ -34,29 +34,45 @@ $(document).ready(function () {
     if (!etv_window.length) return false;
     source_processor.initialize(unselect_etv_line, $('#source_url').val());
 
+    function ensure_scope(node, callback) {
+        // Nodes of scopes that are collapsed initially are loaded on demand
+        if (!node.data('lazy') || node.data('loaded')) return callback();
+        $.get(etv_window.data('scopes-url'), {scope: node.data('scope')}, function (resp) {
+            if (!node.data('loaded')) {
+                node.after(resp);
+                node.data('loaded', true);
+            }
+            callback();
+        }).fail(function (jqXHR) {
+            err_notify(jqXHR.statusText);
+        });
+    }
+
     function show_scope(node) {
-        if (!node.hasClass('scope_opened')) {
-            node.addClass('scope_opened');
-            node.find('.ETV_EnterLink').switchClass('right', 'down');
-        }
-        etv_window.find('.scope-' + node.data('scope')).each(function () {
-            let node_type = $(this).data('type');
-            if (node_type === 'function call' || node_type === 'action') {
-                let has_note = $(this).hasClass('commented'),
-                    was_opened = $(this).hasClass('scope_opened');
+        ensure_scope(node, function () {
+            if (!node.hasClass('scope_opened')) {
+                node.addClass('scope_opened');
+                node.find('.ETV_EnterLink').switchClass('right', 'down');
+            }
+            etv_window.find('.scope-' + node.data('scope')).each(function () {
+                let node_type = $(this).data('type');
+                if (node_type === 'function call' || node_type === 'action') {
+                    let has_note = $(this).hasClass('commented'),
+                        was_opened = $(this).hasClass('scope_opened');
 
-                // Actions can't have notes so it is always shown here
-                if (!has_note || was_opened) $(this).show();
+                    // Actions can't have notes so it is always shown here
+                    if (!has_note || was_opened) $(this).show();
 
-                // Open scope if it was opened earlier
-                if (was_opened) show_scope($(this));
-            }
-            // Triangle should be shown for the opened scope if it exists
-            else if (node_type === 'exit' || node_type === 'declarations') $(this).show();
+                    // Open scope if it was opened earlier
+                    if (was_opened) show_scope($(this));
+                }
+                // Triangle should be shown for the opened scope if it exists
+                else if (node_type === 'exit' || node_type === 'declarations') $(this).show();
 
-            // Notes, statements and declarations are shown by show_display()
+                // Notes, statements and declarations are shown by show_display()
+            });
+            show_display(node);
         });
-        show_display(node);
     }
 
     function hide_scope(node, shift_pressed, change_state) {
@@ -79,22 +95,24 @@ $(document).ready(function () {
     }
 
     function show_scope_shift(node) {
-        if (!node.hasClass('scope_opened')) {
-            node.addClass('scope_opened');
-            node.find('.ETV_EnterLink').switchClass('right', 'down');
-        }
-        etv_window.find('.scope-' + node.data('scope')).each(function () {
-            let node_type = $(this).data('type');
-            if (node_type === 'function call' || node_type === 'action') {
-                $(this).show();
-                show_scope_shift($(this));
+        ensure_scope(node, function () {
+            if (!node.hasClass('scope_opened')) {
+                node.addClass('scope_opened');
+                node.find('.ETV_EnterLink').switchClass('right', 'down');
             }
-            // Triangle should be shown for the opened scope if it exists
-            else if (node_type === 'exit') $(this).show();
+            etv_window.find('.scope-' + node.data('scope')).each(function () {
+                let node_type = $(this).data('type');
+                if (node_type === 'function call' || node_type === 'action') {
+                    $(this).show();
+                    show_scope_shift($(this));
+                }
+                // Triangle should be shown for the opened scope if it exists
+                else if (node_type === 'exit') $(this).show();
 
-            // Notes, statements and declarations are shown by show_display()
+                // Notes, statements and declarations are shown by show_display()
+            });
+            show_display(node);
         });
-        show_display(node);
     }
 
     function show_display(node) {
@@ -115,7 +133,9 @@ $(document).ready(function () {
         }
         // Show notes and not commented declarations
         else if (node_type === 'declarations') {
-            etv_window.find('.scope-' + node.data('scope')).not('.commented').show()
+            ensure_scope(node, function () {
+                etv_window.find('.scope-' + node.data('scope')).not('.commented').show()
+            });
         }
     }
 
@@ -151,7 +171,7 @@ $(document).ready(function () {
         }
     }
 
-    $('.ETV_EnterLink').click(function (event) {
+    etv_window.on('click', '.ETV_EnterLink', function (event) {
         let node = $(this).parent().parent();
         if (node.hasClass('scope_opened')) {
             hide_scope(node, event.shiftKey, true);
@@ -161,22 +181,22 @@ $(document).ready(function () {
             else show_scope(node);
         }
     });
-    $('.ETV_ExitLink').click(function (event) {
+    etv_window.on('click', '.ETV_ExitLink', function (event) {
         let node = $('span[data-scope="' + $(this).data('scope') + '"]').first();
         hide_scope(node, event.shiftKey, true);
     });
 
-    $('.ETV_OpenEye').click(function () {
+    etv_window.on('click', '.ETV_OpenEye', function () {
         let node = $(this).parent().parent();
         if ($(this).hasClass('hide')) hide_display(node);
         else show_display(node);
     });
 
-    $('.ETV_Declarations_Text').click(function () {
+    etv_window.on('click', '.ETV_Declarations_Text', function () {
         $(this).parent().find('.ETV_OpenEye').click();
     });
 
-    $('.ETV_LINE').click(function () {
+    etv_window.on('click', '.ETV_LINE', function () {
         // Unselect everything first
         unselect_etv_line();
 
@@ -220,7 +240,7 @@ $(document).ready(function () {
         }
     });
 
-    $('.ETV_Action,.ETV_RelevantAction').click(function () {
+    etv_window.on('click', '.ETV_Action,.ETV_RelevantAction', function () {
         let node = $(this).parent().parent();
 
         // If action can be collapsed/expanded, do it
@@ -230,7 +250,7 @@ $(document).ready(function () {
         node.find('.ETV_LINE').click();
     });
 
-    $('.ETV_ShowCommentCode').click(function () {
+    etv_window.on('click', '.ETV_ShowCommentCode', function () {
         let node = $(this).parent().parent().next('span');
         if (node.is(':hidden')) {
             node.show();
@@ -245,7 +265,7 @@ $(document).ready(function () {
         }
     });
 
-    $('.ETV_LINE_Note').click(function () {
+    etv_window.on('click', '.ETV_LINE_Note', function () {
         $(this).parent().parent().next('span').find('.ETV_LINE').click();
         $(this).addClass('ETV_LINE_Note_Selected');
     });
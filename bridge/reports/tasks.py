@@ -15,14 +15,20 @@
 # limitations under the License.
 #
 
+import json
+
 from celery import shared_task
 from datetime import timedelta
 
+from django.conf import settings
 from django.utils.timezone import now
+from django.utils.translation import override
 
-from bridge.utils import BridgeException
-from reports.models import CoverageArchive, SourceCodeCache
+from bridge.vars import ERROR_TRACE_FILE, MPTT_FIELDS
+from bridge.utils import BridgeException, ArchiveFileContent
+from reports.models import CoverageArchive, SourceCodeCache, ErrorTraceCache, ReportUnsafe
 from reports.coverage import FillCoverageStatistics
+from reports.source import GetSource
 
 
 @shared_task
@@ -41,3 +47,20 @@ def fill_coverage_statistics(carch_id):
 @shared_task
 def clear_old_source_code_cache(hours):
     SourceCodeCache.objects.filter(access_date__lt=now() - timedelta(hours=hours)).delete()
+
+
+@shared_task
+def clear_old_error_trace_cache(hours):
+    ErrorTraceCache.objects.filter(access_date__lt=now() - timedelta(hours=hours)).delete()
+
+
+@shared_task
+def prewarm_source_code_cache(report_id):
+    # Render source files referred by the error trace with default user settings as they are shown at the unsafe page
+    report = ReportUnsafe.objects.only('id', 'parent', 'error_trace', *MPTT_FIELDS).get(id=report_id)
+    error_trace = json.loads(ArchiveFileContent(report, 'error_trace', ERROR_TRACE_FILE).content.decode('utf8'))
+    with override(settings.DEF_USER['language']):
+        for file_name in error_trace['files']:
+            if file_name:
+                GetSource(report, file_name, with_legend=True,
+                          coverage_data=settings.DEF_USER['coverage_data']).get_html()
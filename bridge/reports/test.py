@@ -26,6 +26,7 @@ from io import BytesIO
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.files import File
 from django.db.models import Q
 from django.test import Client
 from django.urls import reverse
@@ -33,6 +34,12 @@ from django.urls import reverse
 from bridge.vars import SCHEDULER_TYPE, JOB_ROLES
 from bridge.utils import KleverTestCase, logger, RMQConnect
 
+from users.models import User
+from jobs.models import Job, UploadedJobArchive
+from reports.models import ReportSafe, ReportUnsafe, ReportUnknown
+from caches.models import ReportSafeCache, ReportUnsafeCache, ReportUnknownCache
+from jobs.Upload import JobArchiveUploader
+
 
 LINUX_ATTR = {'name': 'Linux kernel', 'value': [
     {'name': 'Version', 'value': '3.5.0'},
@@ -670,6 +677,40 @@ class TestReports(KleverTestCase):
         except ObjectDoesNotExist:
             self.fail('The job was not found after upload')
 
+    def test_upload_job_leaves(self):
+        job = Job.objects.first()
+        self.assertIsNotNone(job)
+        self.client.post('/jobs/run_decision/%s/' % job.pk, {'mode': 'default', 'conf_name': 'development'})
+        DecideJobs('service', 'service', SJC_1)
+
+        leaves_models = ((ReportSafe, ReportSafeCache), (ReportUnsafe, ReportUnsafeCache),
+                         (ReportUnknown, ReportUnknownCache))
+        leaves_numbers = {}
+        for model, cache_model in leaves_models:
+            leaves_numbers[model] = model.objects.filter(decision__job=job).count()
+            self.assertGreater(leaves_numbers[model], 0, 'There are no leaves of type %s' % model.__name__)
+
+        # Download decided job and remove it to upload it again
+        response = self.client.get(reverse('jobs:download', args=[job.pk]))
+        self.assertEqual(response.status_code, 200)
+        archive = BytesIO(b''.join(response.streaming_content))
+        response = self.client.post('/jobs/api/%s/remove/' % job.pk)
+        self.assertEqual(response.status_code, 200)
+
+        upload_obj = UploadedJobArchive(author=User.objects.get(username='manager'), name=self.job_archive)
+        upload_obj.archive.save(self.job_archive, File(archive), save=True)
+        with JobArchiveUploader(upload_obj) as uploader:
+            uploader.upload()
+        upload_obj.refresh_from_db()
+        self.assertIsNone(upload_obj.error)
+
+        # Each uploaded leaf has its cache
+        uploaded_job = Job.objects.get(identifier=job.identifier)
+        for model, cache_model in leaves_models:
+            leaves = model.objects.filter(decision__job=uploaded_job)
+            self.assertEqual(leaves.count(), leaves_numbers[model])
+            self.assertEqual(cache_model.objects.filter(report__in=leaves).count(), leaves_numbers[model])
+
     def __get_report_id(self, name):
         r_id = '/' + name
         while r_id in self.ids_in_use:
@@ -34,6 +34,7 @@ urlpatterns = [
 
     path('unsafe/<int:unsafe_id>/download/', views.DownloadErrorTraceView.as_view(), name='unsafe-download'),
     path('report/<int:report_id>/source/', api.GetSourceCodeView.as_view(), name='api-get-source'),
+    path('unsafe/<int:report_id>/etv-scope/', api.GetETVScopeView.as_view(), name='api-etv-scope'),
 
     # Reports comparison
     path('api/fill-comparison/<int:decision1>/<int:decision2>/',
@@ -53,6 +54,7 @@ urlpatterns = [
     path('api/has-sources/', api.HasOriginalSources.as_view()),
     path('api/upload-sources/', api.UploadOriginalSourcesView.as_view()),
     path('api/upload/<uuid:decision_uuid>/', api.UploadReportView.as_view()),
+    path('api/upload-bundle/<uuid:decision_uuid>/', api.UploadReportsBundleView.as_view()),
     path('api/report-attr/<uuid:decision>/', api.UpdateReportAttrView.as_view()),
     path('api/clear-verification-files/<int:decision_id>/', api.ClearVerificationFilesView.as_view(),
          name='clear-verification-files'),
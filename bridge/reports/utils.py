@@ -38,7 +38,7 @@ from reports.models import (
 )
 from caches.models import ReportSafeCache, ReportUnsafeCache, ReportUnknownCache
 
-from users.utils import HumanizedValue, paginate_queryset
+from users.utils import HumanizedValue, paginate_queryset, SeekPaginator
 from reports.verdicts import safe_color, unsafe_color, bug_status_color
 
 
@@ -66,7 +66,6 @@ REP_MARK_TITLES = {
 
 MARK_COLUMNS = ['mark_verdict', 'mark_result', 'mark_status']
 
-
 def get_column_title(column):
     col_parts = column.split(':')
     column_starts = []
@@ -202,7 +201,7 @@ class SafesTable:
         self.paginator, self.page = self.__get_queryset(report)
 
         if not self.view['is_unsaved'] and self.paginator.count == 1:
-            safe_obj = self.paginator.object_list.first()
+            safe_obj = self.page[0]
             self.redirect = reverse('reports:safe', args=[safe_obj.decision.identifier, safe_obj.identifier])
 
             # Do not collect reports' values if page will be redirected
@@ -309,13 +308,9 @@ class SafesTable:
 
         # Filter by attribute(s)
         if 'attr_name' in self._params and 'attr_value' in self._params:
-            attr_name = unquote(self._params['attr_name'])
-            attr_value = unquote(self._params['attr_value'])
-            annotations['attr_value'] = RawSQL(
-                "\"{}\".\"attrs\"->>%s".format(self._cache_db_table),
-                (attr_name,)
-            )
-            qs_filters['attr_value'] = attr_value
+            qs_filters['cache__attrs__contains'] = {
+                unquote(self._params['attr_name']): unquote(self._params['attr_value'])
+            }
         elif 'attr' in self.view:
             annotations['attr_value'] = RawSQL(
                 "\"{}\".\"attrs\"->>%s".format(self._cache_db_table),
@@ -338,10 +333,9 @@ class SafesTable:
         queryset = ReportSafe.objects
         if annotations:
             queryset = queryset.annotate(**annotations)
-        queryset = queryset.filter(**qs_filters).exclude(cache=None)\
-            .order_by(ordering).select_related('cache', 'decision')
-        num_per_page = self.view['elements'][0] if self.view['elements'] else None
-        return paginate_queryset(queryset, self._params.get('page', 1), num_per_page)
+        queryset = queryset.filter(**qs_filters).exclude(cache=None).select_related('cache', 'decision')
+        paginator = SeekPaginator(queryset, ordering, self.view['elements'][0] if self.view['elements'] else None)
+        return paginator, paginator.get_page(self._params.get('page', 1), self._params.get('cursor'))
 
     def __get_title(self):
         title = _('Safes')
@@ -400,7 +394,7 @@ class SafesTable:
         return attributes
 
     def __safes_data(self):
-        cnt = (self.page.number - 1) * self.paginator.per_page + 1
+        cnt = self.page.start_index()
 
         # Collect columns
         columns = ['number']
@@ -472,7 +466,7 @@ class UnsafesTable:
         self.paginator, self.page = self.__get_queryset(report)
 
         if not self.view['is_unsaved'] and self.paginator.count == 1:
-            unsafe_obj = self.paginator.object_list.first()
+            unsafe_obj = self.page[0]
             self.redirect = reverse('reports:unsafe', args=[unsafe_obj.decision.identifier, unsafe_obj.identifier])
             # Do not collect reports' values if page will be redirected
             return
@@ -579,11 +573,9 @@ class UnsafesTable:
 
         # Filter by attribute(s)
         if 'attr_name' in self._params and 'attr_value' in self._params:
-            annotations['attr_value'] = RawSQL(
-                "\"{}\".\"attrs\"->>%s".format(self._cache_db_table),
-                (unquote(self._params['attr_name']),)
-            )
-            qs_filters['attr_value'] = unquote(self._params['attr_value'])
+            qs_filters['cache__attrs__contains'] = {
+                unquote(self._params['attr_name']): unquote(self._params['attr_value'])
+            }
         elif 'attr' in self.view:
             annotations['attr_value'] = RawSQL(
                 "\"{}\".\"attrs\"->>%s".format(self._cache_db_table),
@@ -606,10 +598,9 @@ class UnsafesTable:
         queryset = ReportUnsafe.objects
         if annotations:
             queryset = queryset.annotate(**annotations)
-        queryset = queryset.filter(**qs_filters).exclude(cache=None).order_by(ordering)\
-            .select_related('cache', 'decision')
-        num_per_page = self.view['elements'][0] if self.view['elements'] else None
-        return paginate_queryset(queryset, self._params.get('page', 1), num_per_page)
+        queryset = queryset.filter(**qs_filters).exclude(cache=None).select_related('cache', 'decision')
+        paginator = SeekPaginator(queryset, ordering, self.view['elements'][0] if self.view['elements'] else None)
+        return paginator, paginator.get_page(self._params.get('page', 1), self._params.get('cursor'))
 
     def __get_title(self):
         title = _('Unsafes')
@@ -668,7 +659,7 @@ class UnsafesTable:
         return attributes
 
     def __unsafes_data(self):
-        cnt = (self.page.number - 1) * self.paginator.per_page + 1
+        cnt = self.page.start_index()
 
         # Collect columns
         columns = ['number']
@@ -742,7 +733,7 @@ class UnknownsTable:
         self.paginator, self.page = self.__get_queryset(report)
 
         if not self.view['is_unsaved'] and self.paginator.count == 1:
-            unknown_obj = self.paginator.object_list.first()
+            unknown_obj = self.page[0]
             self.redirect = reverse('reports:unknown', args=[unknown_obj.decision.identifier, unknown_obj.identifier])
             # Do not collect reports' values if page will be redirected
             return
@@ -837,11 +828,9 @@ class UnknownsTable:
 
         # Filter by attribute(s)
         if 'attr_name' in self._params and 'attr_value' in self._params:
-            annotations['attr_value'] = RawSQL(
-                "\"{}\".\"attrs\"->>%s".format(self._cache_db_table),
-                (unquote(self._params['attr_name']),)
-            )
-            qs_filters['attr_value'] = unquote(self._params['attr_value'])
+            qs_filters['cache__attrs__contains'] = {
+                unquote(self._params['attr_name']): unquote(self._params['attr_value'])
+            }
         elif 'attr' in self.view:
             annotations['attr_value'] = RawSQL(
                 "\"{}\".\"attrs\"->>%s".format(self._cache_db_table),
@@ -880,10 +869,9 @@ class UnknownsTable:
         queryset = ReportUnknown.objects
         if annotations:
             queryset = queryset.annotate(**annotations)
-        queryset = queryset.filter(**qs_filters).exclude(cache=None).order_by(ordering)\
-            .select_related('cache', 'decision')
-        num_per_page = self.view['elements'][0] if self.view['elements'] else None
-        return paginate_queryset(queryset, self._params.get('page', 1), num_per_page)
+        queryset = queryset.filter(**qs_filters).exclude(cache=None).select_related('cache', 'decision')
+        paginator = SeekPaginator(queryset, ordering, self.view['elements'][0] if self.view['elements'] else None)
+        return paginator, paginator.get_page(self._params.get('page', 1), self._params.get('cursor'))
 
     def __get_title(self):
         title = _('Unknowns')
@@ -941,7 +929,7 @@ class UnknownsTable:
         return attributes
 
     def __unknowns_data(self):
-        cnt = (self.page.number - 1) * self.paginator.per_page + 1
+        cnt = self.page.start_index()
 
         # Collect columns
         columns = ['number']
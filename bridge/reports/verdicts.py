@@ -131,6 +131,16 @@ class BugStatusCollector:
         self._statuses = {}
         return result_data
 
+    @classmethod
+    def aggregate(cls, bug_statuses, not_bugs):
+        if not bug_statuses:
+            # WithoutMarks/WithoutBugs
+            return None
+        if not_bugs or len(bug_statuses) > 1:
+            # Bug + NotABug = Bug1 + Bug2 = Incompatible marks
+            return UNSAFE_STATUS[4][0]
+        return bug_statuses[0]
+
     @classmethod
     def sum(cls, old_status, new_status, new_verdict):
         if old_status is None and new_status is None:
@@ -15,6 +15,8 @@
 # limitations under the License.
 #
 
+from django.conf import settings
+
 from rest_framework import exceptions
 from rest_framework.generics import (
     get_object_or_404, RetrieveAPIView, CreateAPIView, RetrieveDestroyAPIView, RetrieveUpdateAPIView
@@ -26,6 +28,7 @@ from rest_framework.viewsets import ModelViewSet
 
 from bridge.vars import TASK_STATUS, DECISION_STATUS
 from bridge.access import ServicePermission, CLIPermission
+from bridge.utils import RMQConnect
 from bridge.CustomViews import StreamingResponseAPIView
 from tools.profiling import LoggedCallMixin
 
@@ -36,7 +39,7 @@ from service.models import Task, Solution, VerificationTool, NodesConfiguration
 from jobs.serializers import decision_status_changed
 from service.serializers import (
     TaskSerializer, SolutionSerializer, SchedulerUserSerializer, DecisionSerializer,
-    UpdateToolsSerializer, SchedulerSerializer, NodeConfSerializer
+    UpdateToolsSerializer, SchedulerSerializer, NodeConfSerializer, task_changes_queue
 )
 from service.utils import FinishDecision, TaskArchiveGenerator, SolutionArchiveGenerator, ReadDecisionConfiguration
 
@@ -75,6 +78,71 @@ class TaskAPIViewset(LoggedCallMixin, ModelViewSet):
         instance.delete()
 
 
+class TaskChangesAPIView(LoggedCallMixin, APIView):
+    permission_classes = (ServicePermission,)
+    # Do not keep Bridge workers busy for too long
+    max_timeout = 30
+    # Remove the queue of changes if nobody asks for them for an hour, e.g. after Klever Core was killed
+    queue_expires = 3600000
+
+    def post(self, request, identifier=None):
+        # Subscribe to changes of statuses of decision tasks
+        if not identifier:
+            raise exceptions.MethodNotAllowed(request.method)
+        decision = get_object_or_404(Decision.objects.only('identifier'), identifier=identifier)
+        with RMQConnect() as channel:
+            self.__declare_queue(channel, decision.identifier)
+        return Response({})
+
+    def get(self, request, identifier=None):
+        # Get tasks which statuses were changed since the given change number as compact [id, status, number] triples
+        try:
+            since = int(request.query_params.get('since', 0))
+        except ValueError:
+            raise exceptions.ValidationError({'since': 'Wrong format'})
+        try:
+            timeout = min(float(request.query_params.get('timeout', 0)), self.max_timeout)
+        except ValueError:
+            raise exceptions.ValidationError({'timeout': 'Wrong format'})
+
+        queryset = Task.objects.filter(change_seq__gt=since)
+        decision = None
+        if identifier:
+            decision = get_object_or_404(Decision.objects.only('id', 'identifier'), identifier=identifier)
+            queryset = queryset.filter(decision_id=decision.id)
+        if 'status' in request.query_params:
+            queryset = queryset.filter(status__in=request.query_params.getlist('status'))
+        queryset = queryset.order_by('change_seq').values_list('id', 'status', 'change_seq')
+
+        changes = list(queryset)
+        # Wait for the next change of decision tasks if there are no changes yet
+        if not changes and decision and timeout > 0 and self.__wait_for_changes(decision, timeout, queryset):
+            changes = list(queryset.all())
+        return Response(changes)
+
+    def __declare_queue(self, channel, identifier):
+        # Both declaring and binding are idempotent, so the queue is restored if it expired while nobody waited
+        queue = task_changes_queue(identifier)
+        channel.queue_declare(queue=queue, durable=True, arguments={'x-expires': self.queue_expires})
+        channel.queue_bind(queue=queue, exchange=settings.RABBIT_MQ_TASKS_EXCHANGE, routing_key=str(identifier))
+        return queue
+
+    def __wait_for_changes(self, decision, timeout, queryset):
+        changed = False
+        with RMQConnect() as channel:
+            queue = self.__declare_queue(channel, decision.identifier)
+            # Changes made before the queue was restored are not in it, but they are in the database
+            if queryset.exists():
+                return True
+            for method, properties, body in channel.consume(queue, inactivity_timeout=timeout):
+                changed = method is not None
+                break
+            channel.cancel()
+            # Messages just wake up waiting requests while changes are got from the database
+            channel.queue_purge(queue)
+        return changed
+
+
 class DownloadTaskArchiveView(StreamingResponseAPIView):
     permission_classes = (ServicePermission,)
 
@@ -0,0 +1,31 @@
+#
+# Copyright (c) 2019 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [('service', '0002_alter_solution_description_alter_task_description')]
+
+    operations = [
+        migrations.RunSQL('CREATE SEQUENCE task_change_seq', 'DROP SEQUENCE task_change_seq'),
+        migrations.AddField(model_name='task', name='change_seq', field=models.BigIntegerField(default=0)),
+        migrations.RunSQL("UPDATE task SET change_seq = nextval('task_change_seq')", migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='task', index=models.Index(fields=['decision', 'change_seq'], name='task_decisio_8ef10e_idx')
+        ),
+    ]
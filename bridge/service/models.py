@@ -15,7 +15,7 @@
 # limitations under the License.
 #
 
-from django.db import models
+from django.db import connection, models
 from django.db.models.signals import post_delete
 
 from bridge.vars import NODE_STATUS, TASK_STATUS
@@ -76,9 +76,22 @@ class Task(WithFilesMixin, models.Model):
     filename = models.CharField(max_length=256)
     archive = models.FileField(upload_to=SERVICE_DIR)
     description = models.JSONField()
+    change_seq = models.BigIntegerField(default=0)
 
     class Meta:
         db_table = 'task'
+        indexes = [models.Index(fields=['decision', 'change_seq'])]
+
+
+def next_task_change_seq():
+    # Each creation of a task or change of its status gets a new number to get changes happened since some moment.
+    # Numbers are taken under the lock that is held until commit, so transactions with changes are committed in order of
+    # their numbers and pollers can not miss a less number that would be committed after a greater one.
+    assert connection.in_atomic_block, 'Change numbers should be taken just before commit'
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('task_change_seq'))")
+        cursor.execute("SELECT nextval('task_change_seq')")
+        return cursor.fetchone()[0]
 
 
 class Solution(WithFilesMixin, models.Model):
@@ -15,10 +15,11 @@
 # limitations under the License.
 #
 
-import pika
+import json
 import zipfile
 
 from django.conf import settings
+from django.db import transaction
 from django.utils.functional import cached_property
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
@@ -26,24 +27,29 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers, exceptions, fields
 
 from bridge.vars import DECISION_STATUS, PRIORITY, SCHEDULER_TYPE, SCHEDULER_STATUS, TASK_STATUS
-from bridge.utils import logger, require_lock, RMQConnect
+from bridge.utils import logger, require_lock, rmq_publisher
 from bridge.serializers import TimeStampField, DynamicFieldsModelSerializer
 
 from users.models import SchedulerUser
 from jobs.models import Scheduler, Decision
-from service.models import Task, Solution, VerificationTool, NodesConfiguration, Node, Workload
+from service.models import (
+    Task, Solution, VerificationTool, NodesConfiguration, Node, Workload, next_task_change_seq
+)
 
 from users.utils import HumanizedValue
 from jobs.serializers import decision_status_changed
 
 
-def on_task_change(task_id, task_status, scheduler_type):
-    with RMQConnect() as channel:
-        channel.basic_publish(
-            exchange='', routing_key=settings.RABBIT_MQ_QUEUE,
-            properties=pika.BasicProperties(delivery_mode=2),
-            body="task {} {} {}".format(task_id, task_status, scheduler_type)
-        )
+def task_changes_queue(decision_identifier):
+    return '{} {}'.format(settings.RABBIT_MQ_TASKS_EXCHANGE, decision_identifier)
+
+
+def on_task_change(task_id, task_status, scheduler_type, decision_identifier):
+    rmq_publisher.publish('', settings.RABBIT_MQ_QUEUE, "task {} {} {}".format(task_id, task_status, scheduler_type))
+    # Messages are routed to the decision queue only if Klever Core has subscribed to them
+    rmq_publisher.publish(settings.RABBIT_MQ_TASKS_EXCHANGE, str(decision_identifier), json.dumps({
+        'id': task_id, 'status': task_status
+    }))
 
 
 class VerificationToolSerializer(serializers.ModelSerializer):
@@ -192,9 +198,13 @@ class TaskSerializer(DynamicFieldsModelSerializer):
     def create(self, validated_data):
         validated_data['filename'] = validated_data['archive'].name[:256]
         validated_data['decision'] = validated_data.pop('job')
-        instance = super().create(validated_data)
-        self.update_decision(instance.decision, instance.status)
-        on_task_change(instance.id, instance.status, instance.decision.scheduler.type)
+        with transaction.atomic():
+            instance = super().create(validated_data)
+            self.update_decision(instance.decision, instance.status)
+            self.__set_change_seq(instance)
+        on_task_change(
+            instance.id, instance.status, instance.decision.scheduler.type, instance.decision.identifier
+        )
         return instance
 
     def update(self, instance, validated_data):
@@ -206,11 +216,20 @@ class TaskSerializer(DynamicFieldsModelSerializer):
             raise serializers.ValidationError({'job': 'Is not processing'})
 
         old_status = instance.status
-        instance = super().update(instance, validated_data)
-        self.update_decision(instance.decision, instance.status, old_status=old_status)
-        on_task_change(instance.id, instance.status, instance.decision.scheduler.type)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            self.update_decision(instance.decision, instance.status, old_status=old_status)
+            self.__set_change_seq(instance)
+        on_task_change(
+            instance.id, instance.status, instance.decision.scheduler.type, instance.decision.identifier
+        )
         return instance
 
+    def __set_change_seq(self, instance):
+        # The number should be taken by the last statement of the transaction
+        instance.change_seq = next_task_change_seq()
+        Task.objects.filter(id=instance.id).update(change_seq=instance.change_seq)
+
     def to_representation(self, instance):
         if isinstance(instance, Task) and 'request' in self.context and self.context['request'].method != 'GET':
             return {'id': instance.id}
@@ -219,7 +238,7 @@ class TaskSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Task
         exclude = ('decision', 'filename')
-        extra_kwargs = {'archive': {'write_only': True}}
+        extra_kwargs = {'archive': {'write_only': True}, 'change_seq': {'read_only': True}}
 
 
 class SolutionSerializer(DynamicFieldsModelSerializer):
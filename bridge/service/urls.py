@@ -29,6 +29,8 @@ urlpatterns = [
     path('', include(router.urls)),
     path('get_token/', obtain_auth_token),
     path('tasks/<int:pk>/download/', api.DownloadTaskArchiveView.as_view()),
+    path('task-changes/', api.TaskChangesAPIView.as_view()),
+    path('task-changes/<uuid:identifier>/', api.TaskChangesAPIView.as_view()),
 
     path('solution/', api.SolutionCreateView.as_view()),
     path('solution/<int:task_id>/', api.SolutionDetailView.as_view()),
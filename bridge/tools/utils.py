@@ -20,6 +20,7 @@ import re
 import json
 import tempfile
 import datetime
+from collections import defaultdict
 
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
@@ -30,7 +31,7 @@ from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 from bridge.vars import DECISION_WEIGHT, DECISION_STATUS
-from bridge.utils import BridgeException, logger
+from bridge.utils import BridgeException, logger, require_lock
 
 from jobs.models import JOBFILE_DIR, JobFile, Decision
 from service.models import SERVICE_DIR, Solution, Task
@@ -41,11 +42,17 @@ from marks.models import (
 )
 from reports.models import (
     ReportComponent, ReportSafe, ReportUnsafe, ReportUnknown, ReportComponentLeaf,
-    CoverageArchive, OriginalSources, DecisionCache, SourceCodeCache, ORIGINAL_SOURCES_DIR
+    CoverageArchive, OriginalSources, DecisionCache, SourceCodeCache, ErrorTraceCache, ORIGINAL_SOURCES_DIR
 )
 from marks.tasks import connect_safe_report, connect_unsafe_report, connect_unknown_report
 
-from caches.utils import RecalculateSafeCache, RecalculateUnsafeCache, RecalculateUnknownCache
+from caches.models import (
+    ReportSafeCache, ReportUnsafeCache, ReportUnknownCache, DecisionVerdictsCache, DecisionTagsCache,
+    DecisionUnknownsCache, DecisionProblemsCache, DecisionAttrsCache
+)
+from caches.utils import (
+    RecalculateSafeCache, RecalculateUnsafeCache, RecalculateUnknownCache, clear_decision_aggregates_deltas
+)
 from reports.coverage import FillCoverageStatistics
 
 
@@ -177,6 +184,77 @@ class RecalculateDecisionCache:
         ))
 
 
+class RecalculateDecisionAggregates:
+    """
+    Rebuild aggregates of leaves caches that are shown on decision pages. Triggers keep them up to date, so it is
+    needed just if they were changed by hand.
+    """
+
+    def __init__(self, decisions):
+        self._decisions = decisions
+        self.__recalc()
+
+    @require_lock(ReportSafeCache, lock='SHARE')
+    @require_lock(ReportUnsafeCache, lock='SHARE')
+    @require_lock(ReportUnknownCache, lock='SHARE')
+    def __recalc(self):
+        verdicts = defaultdict(lambda: {'total': 0, 'manual': 0})
+        tags = defaultdict(int)
+        attrs = defaultdict(lambda: {'safes': 0, 'unsafes': 0, 'unknowns': 0})
+        for model, leaf_type in [(ReportSafeCache, 'safe'), (ReportUnsafeCache, 'unsafe')]:
+            queryset = model.objects.filter(decision__in=self._decisions)\
+                .values_list('decision_id', 'verdict', 'marks_confirmed', 'tags', 'attrs')
+            for d_id, verdict, marks_confirmed, leaf_tags, leaf_attrs in queryset:
+                verdicts[(d_id, leaf_type, verdict)]['total'] += 1
+                if marks_confirmed > 0:
+                    verdicts[(d_id, leaf_type, verdict)]['manual'] += 1
+                for tag in leaf_tags:
+                    tags[(d_id, leaf_type, tag)] += 1
+                for name, value in leaf_attrs.items():
+                    attrs[(d_id, name, value)]['{}s'.format(leaf_type)] += 1
+
+        unknowns = defaultdict(lambda: {'total': 0, 'unmarked': 0})
+        problems = defaultdict(int)
+        queryset = ReportUnknownCache.objects.filter(decision__in=self._decisions)\
+            .values_list('decision_id', 'report__component', 'marks_total', 'problems', 'attrs')
+        for d_id, component, marks_total, leaf_problems, leaf_attrs in queryset:
+            unknowns[(d_id, component)]['total'] += 1
+            if marks_total == 0:
+                unknowns[(d_id, component)]['unmarked'] += 1
+            for problem in leaf_problems:
+                problems[(d_id, component, problem)] += 1
+            for name, value in leaf_attrs.items():
+                attrs[(d_id, name, value)]['unknowns'] += 1
+
+        # Deltas are already taken into account by counting leaves
+        clear_decision_aggregates_deltas(list(decision.id for decision in self._decisions))
+        DecisionVerdictsCache.objects.filter(decision__in=self._decisions).delete()
+        DecisionVerdictsCache.objects.bulk_create(list(
+            DecisionVerdictsCache(decision_id=d_id, leaf_type=leaf_type, verdict=verdict, **obj_kwargs)
+            for (d_id, leaf_type, verdict), obj_kwargs in verdicts.items()
+        ))
+        DecisionTagsCache.objects.filter(decision__in=self._decisions).delete()
+        DecisionTagsCache.objects.bulk_create(list(
+            DecisionTagsCache(decision_id=d_id, leaf_type=leaf_type, tag=tag, number=number)
+            for (d_id, leaf_type, tag), number in tags.items()
+        ))
+        DecisionAttrsCache.objects.filter(decision__in=self._decisions).delete()
+        DecisionAttrsCache.objects.bulk_create(list(
+            DecisionAttrsCache(decision_id=d_id, name=name, value=value, **obj_kwargs)
+            for (d_id, name, value), obj_kwargs in attrs.items()
+        ))
+        DecisionUnknownsCache.objects.filter(decision__in=self._decisions).delete()
+        DecisionUnknownsCache.objects.bulk_create(list(
+            DecisionUnknownsCache(decision_id=d_id, component=component, **obj_kwargs)
+            for (d_id, component), obj_kwargs in unknowns.items()
+        ))
+        DecisionProblemsCache.objects.filter(decision__in=self._decisions).delete()
+        DecisionProblemsCache.objects.bulk_create(list(
+            DecisionProblemsCache(decision_id=d_id, component=component, problem=problem, number=number)
+            for (d_id, component, problem), number in problems.items()
+        ))
+
+
 class Recalculation:
     def __init__(self, rec_type, decisions):
         self.type = rec_type
@@ -219,6 +297,7 @@ class Recalculation:
             RecalculateUnknownCache(reports_ids)
         elif self.type == 'decision_cache':
             RecalculateDecisionCache(self._decisions)
+            RecalculateDecisionAggregates(self._decisions)
         elif self.type == 'coverage':
             RecalculateCoverage(self._decisions)
         elif self.type == 'all':
@@ -227,6 +306,7 @@ class Recalculation:
             recalculate_unsafe_links(self._decisions)
             recalculate_unknown_links(self._decisions)
             RecalculateDecisionCache(self._decisions)
+            RecalculateDecisionAggregates(self._decisions)
             RecalculateCoverage(self._decisions)
         else:
             logger.error('Wrong type of recalculation')
@@ -417,6 +497,11 @@ class RemoveDuplicates:
         ids_to_delete = self.__collect_ids_to_remove(qs)
         SourceCodeCache.objects.filter(id__in=ids_to_delete).delete()
 
+        # Clear error trace views cache
+        qs = self.__error_trace_cache_qs()
+        ids_to_delete = self.__collect_ids_to_remove(qs)
+        ErrorTraceCache.objects.filter(id__in=ids_to_delete).delete()
+
     def __collect_ids_to_remove(self, qs):
         ids_to_delete = set()
         for obj in qs:
@@ -436,6 +521,11 @@ class RemoveDuplicates:
             .annotate(duplicates=Count('id'), ids_list=ArrayAgg('id'))\
             .filter(duplicates__gt=1).values('ids_list')
 
+    def __error_trace_cache_qs(self):
+        return ErrorTraceCache.objects.values('report', 'identifier')\
+            .annotate(duplicates=Count('id'), ids_list=ArrayAgg('id'))\
+            .filter(duplicates__gt=1).values('ids_list')
+
 
 class ErrorTraceAnanlizer:
     def __init__(self, error_trace):
@@ -15,11 +15,16 @@
 # limitations under the License.
 #
 
+import base64
+import hashlib
 import json
+import math
+from collections.abc import Sequence
 from datetime import date
 
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q
+from django.db import connection
+from django.db.models import F, Q
 from django.template import Template, Context
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
@@ -598,3 +603,177 @@ def paginate_queryset(queryset, page, num_per_page=None):
     except EmptyPage:
         values = paginator.page(paginator.num_pages)
     return paginator, values
+
+
+class SeekPage(Sequence):
+    def __init__(self, object_list, number, paginator, has_previous, has_next):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __repr__(self):
+        return '<Page %s>' % self.number
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    def start_index(self):
+        if not self._has_next and self.number > 1:
+            # The last page can be got seeking from the end of the list
+            return max(self.paginator.count - len(self) + 1, (self.number - 1) * self.paginator.per_page + 1)
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    @cached_property
+    def next_cursor(self):
+        return self.paginator.cursor(self.object_list[-1], False) if self._has_next else None
+
+    @cached_property
+    def previous_cursor(self):
+        return self.paginator.cursor(self.object_list[0], True) if self._has_previous else None
+
+
+class SeekPaginator:
+    """
+    Paginator that seeks pages by values of the ordering key at the boundary of the neighbouring page instead of
+    skipping rows with OFFSET, so getting any next or previous page costs the same. Rows with the same key value are
+    ordered by id, rows without the key value are at the end of the list. The cursor of the neighbouring page is
+    passed in the "cursor" parameter along with the page number that is used just for numbering. Pages that are
+    requested without the cursor are got with OFFSET.
+
+    Lists are counted exactly only if the planner estimates that they are not large, otherwise the estimation is used.
+    """
+    exact_count_limit = 10000
+
+    def __init__(self, queryset, ordering, per_page=None):
+        self.object_list = queryset.order_by()
+        self.per_page = max(int(per_page), 1) if per_page else DEF_NUMBER_OF_ELEMENTS
+        self._key = ordering.lstrip('-')
+        self._descending = ordering.startswith('-')
+        self._count = None
+        self.approximate = False
+
+    @cached_property
+    def _signature(self):
+        # Cursors of other lists (e.g. after changing the view) are ignored
+        query_str = '{}:{}'.format(self._key, self._descending) + str(self.object_list.query)
+        return hashlib.md5(query_str.encode('utf8')).hexdigest()[:8]
+
+    def cursor(self, obj, backward):
+        cursor_data = json.dumps([self._signature, int(backward), getattr(obj, self._key), obj.pk])
+        return base64.urlsafe_b64encode(cursor_data.encode('utf8')).decode('ascii').rstrip('=')
+
+    def __parse_cursor(self, cursor):
+        try:
+            signature, backward, value, pk = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        except ValueError:
+            return None
+        if signature != self._signature:
+            return None
+        return bool(backward), value, pk
+
+    def __ordered(self, backward):
+        descending = self._descending != backward
+        id_ordering = '-id' if descending else 'id'
+        if self._key == 'id':
+            return self.object_list.order_by(id_ordering)
+        key_ordering = F(self._key).desc if descending else F(self._key).asc
+        nulls_position = {'nulls_first': True} if backward else {'nulls_last': True}
+        return self.object_list.order_by(key_ordering(**nulls_position), id_ordering)
+
+    def __seek_filter(self, value, pk, backward):
+        lookup = 'lt' if self._descending != backward else 'gt'
+        next_id = Q(**{'id__' + lookup: pk})
+        if self._key == 'id':
+            return next_id
+        if value is None:
+            if backward:
+                return Q(**{self._key + '__isnull': False}) | Q(next_id, **{self._key + '__isnull': True})
+            return Q(next_id, **{self._key + '__isnull': True})
+        seek_filter = Q(**{'{}__{}'.format(self._key, lookup): value}) | Q(next_id, **{self._key: value})
+        if not backward:
+            seek_filter |= Q(**{self._key + '__isnull': True})
+        return seek_filter
+
+    def get_page(self, page, cursor=None):
+        try:
+            number = max(int(page), 1)
+        except ValueError:
+            if page != 'last':
+                raise BridgeException()
+            number = None
+
+        cursor_data = self.__parse_cursor(cursor) if cursor and number and number > 1 else None
+        if number is None:
+            rows = list(self.__ordered(True)[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            object_list = rows[:self.per_page][::-1]
+            if not has_previous:
+                self._count = len(object_list)
+            return SeekPage(object_list, self.num_pages, self, has_previous, False)
+
+        if cursor_data and cursor_data[0]:
+            rows = list(self.__ordered(True).filter(self.__seek_filter(*cursor_data[1:]))[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            if rows and not has_previous:
+                # Rows were added or removed since the previous request
+                number = 1
+            elif rows:
+                return SeekPage(rows[:self.per_page][::-1], number, self, has_previous, True)
+            else:
+                return self.get_page(1)
+        if cursor_data and not cursor_data[0]:
+            queryset = self.__ordered(False).filter(self.__seek_filter(*cursor_data[1:]))
+        else:
+            queryset = self.__ordered(False)[(number - 1) * self.per_page:]
+        rows = list(queryset[:self.per_page + 1])
+        if not rows and number > 1:
+            return self.get_page('last')
+        has_next = len(rows) > self.per_page
+        if not has_next and not cursor_data:
+            self._count = (number - 1) * self.per_page + len(rows)
+        return SeekPage(rows[:self.per_page], number, self, number > 1, has_next)
+
+    def __estimate_count(self):
+        sql, params = self.object_list.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @property
+    def count(self):
+        if self._count is None:
+            estimation = self.__estimate_count()
+            if estimation > self.exact_count_limit:
+                self.approximate = True
+                self._count = estimation
+            else:
+                self._count = self.object_list.count()
+        return self._count
+
+    @property
+    def num_pages(self):
+        return max(math.ceil(self.count / self.per_page), 1)
+
+    @property
+    def num_pages_display(self):
+        return '~{}'.format(self.num_pages) if self.approximate else str(self.num_pages)
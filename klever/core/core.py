@@ -16,6 +16,7 @@
 #
 
 import argparse
+import concurrent.futures
 import json
 import hashlib
 import multiprocessing
@@ -244,50 +245,98 @@ class Reporter(klever.core.components.Component):
                                        separate_from_parent, include_child_resources)
 
     def send_reports(self):
-        session = klever.core.session.Session(self.logger, self.conf['Klever Bridge'], self.conf['identifier'])
-        issleep = True
-        while True:
-            # Report batches of reports each 3 seconds. This reduces the number of requests quite considerably.
-            if issleep:
-                time.sleep(3)
-            else:
-                issleep = True
-
-            reports_and_report_file_archives = []
+        # Batches are flushed as soon as either of these limits is reached, so there is no need to sleep between them.
+        max_batch_reports = self.conf.get('report batch size', 100)
+        max_batch_bytes = self.conf.get('report batch bytes', 16 * 1024 ** 2)
+        max_batch_latency = self.conf.get('report batch latency', 1.0)
+        # Bridge saves reports of one decision one batch after another, so concurrent uploads overlap just sending and
+        # parsing of batches.
+        uploads_in_flight = self.conf.get('report uploads in flight', 4)
+
+        session = klever.core.session.Session(self.logger, self.conf['Klever Bridge'], self.conf['identifier'],
+                                              pool_size=uploads_in_flight)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=uploads_in_flight) as executor:
+            # Identifiers of reports from batches that are being uploaded at the moment.
+            uploads = {}
+            batch = []
+            batch_bytes = 0
+            batch_deadline = None
             is_finish = False
-            while True:
+            while not is_finish:
                 try:
+                    # Wait for new reports infinitely when there is nothing to upload.
+                    timeout = max(batch_deadline - time.time(), 0) if batch else None
                     # TODO: replace MQ with "reports and report file archives".
-                    report_and_report_file_archives = self.mqs['report files'].get_nowait()
+                    report_and_report_file_archives = self.mqs['report files'].get(timeout=timeout)
 
                     if report_and_report_file_archives is None:
                         self.logger.debug('Report files message queue was terminated')
                         is_finish = True
-                        break
-
-                    reports_and_report_file_archives.append(report_and_report_file_archives)
-
-                    # Do not send more than 10 reports at once. Otherwise different strange issues may appear im Core
-                    # and Bridge.
-                    if len(reports_and_report_file_archives) == 10:
-                        # Do not sleep since there may be pending reports already.
-                        issleep = False
-                        break
+                    else:
+                        if not batch:
+                            batch_deadline = time.time() + max_batch_latency
+                        batch_bytes += self.__add_to_batch(batch, report_and_report_file_archives)
+                        if len(batch) < max_batch_reports and batch_bytes < max_batch_bytes:
+                            continue
                 except queue.Empty:
-                    break
-
-            if reports_and_report_file_archives:
-                for report_and_report_file_archives in reports_and_report_file_archives:
-                    report_file_archives = report_and_report_file_archives.get('report file archives')
-                    self.logger.debug('Upload report file "{0}"{1}'.format(
-                        report_and_report_file_archives['report file'],
-                        ' with report file archives:\n{0}'
-                        .format('\n'.join(['  {0}'.format(archive) for archive in report_file_archives]))
-                        if report_file_archives else ''))
-
-                session.upload_reports_and_report_file_archives(reports_and_report_file_archives,
-                                                                self.conf['keep intermediate files'])
-            if is_finish:
+                    pass
+
+                if batch:
+                    self.__submit_batch(executor, session, uploads, uploads_in_flight, batch)
+                    batch = []
+                    batch_bytes = 0
+
+            # Raise an exception if some upload failed.
+            for upload in concurrent.futures.as_completed(uploads):
+                upload.result()
+
+    def __add_to_batch(self, batch, report_and_report_file_archives):
+        report_file = report_and_report_file_archives['report file']
+        report_file_archives = report_and_report_file_archives.get('report file archives')
+        self.logger.debug('Upload report file "{0}"{1}'.format(
+            report_file,
+            ' with report file archives:\n{0}'
+            .format('\n'.join(['  {0}'.format(archive) for archive in report_file_archives]))
+            if report_file_archives else ''))
+
+        # Read each report just once. Then it is used both for scheduling its upload and for uploading.
+        with open(report_file, encoding='utf-8') as fp:
+            report = json.load(fp)
+        batch.append(dict(report_and_report_file_archives, report=report))
+
+        return os.path.getsize(report_file) + sum(os.path.getsize(archive) for archive in report_file_archives or [])
+
+    def __submit_batch(self, executor, session, uploads, uploads_in_flight, batch):
+        identifiers = set()
+        for report_and_report_file_archives in batch:
+            report = report_and_report_file_archives['report']
+            for key in ('identifier', 'parent', 'component id'):
+                if report.get(key):
+                    identifiers.add(report[key])
+
+        # Bridge requires reports of the same component as well as reports of parents and children to be uploaded in
+        # order. Identifiers of children start with identifiers of their parents, so only batches without related
+        # reports can be uploaded concurrently.
+        def is_related(upload_identifiers):
+            return any(i1.startswith(i2) or i2.startswith(i1) for i1 in identifiers for i2 in upload_identifiers)
+
+        while True:
+            for upload in [upload for upload in uploads if upload.done()]:
+                upload.result()
+                del uploads[upload]
+
+            related = [upload for upload, upload_identifiers in uploads.items() if is_related(upload_identifiers)]
+            if related:
+                concurrent.futures.wait(related)
+            elif len(uploads) >= uploads_in_flight:
+                concurrent.futures.wait(uploads, return_when=concurrent.futures.FIRST_COMPLETED)
+            else:
                 break
 
+        self.logger.debug('Upload batch of {0} reports'.format(len(batch)))
+        upload = executor.submit(session.upload_reports_and_report_file_archives, batch,
+                                 self.conf['keep intermediate files'])
+        uploads[upload] = identifiers
+
     main = send_reports
@@ -15,82 +15,213 @@
 # limitations under the License.
 #
 
+import array
+import bisect
+import heapq
 import json
 import os
 import shutil
 import re
+import struct
 import multiprocessing
 
 import klever.core.components
 import klever.core.utils
+from klever.core.vtg.cache import ResultsCache, DEFAULT_CACHE_SIZE
 
 coverage_format_version = 1
 most_covered_lines_num = 100
 
 
-def add_to_coverage(merged_coverage_info, coverage_info):
-    for file_name, file_coverage_info in coverage_info.items():
-        merged_coverage_info.setdefault(file_name, {
-            'total functions': coverage_info[file_name]['total functions'],
-            'covered lines': dict(),
-            'covered functions': dict(),
-            'covered function names': list(),
-            'notes': dict()
-        })
-
-        for kind in ('covered lines', 'covered functions'):
-            for line, cov_num in file_coverage_info[kind].items():
-                merged_coverage_info[file_name][kind].setdefault(line, 0)
-                merged_coverage_info[file_name][kind][line] += cov_num
-
-        for cov_func_name in file_coverage_info['covered function names']:
-            if cov_func_name not in merged_coverage_info[file_name]['covered function names']:
-                merged_coverage_info[file_name]['covered function names'].append(cov_func_name)
-
-        for line, note in file_coverage_info['notes'].items():
-            # Specify first note for a given line.
-            if line not in merged_coverage_info[file_name]['notes']:
-                merged_coverage_info[file_name]['notes'][line] = note
-            # Merge new note with the previous one(s).
+class FileCoverage:
+    """Compact code coverage of a source file merged from coverages of several verification tasks."""
+
+    __slots__ = ('total_functions', 'lines', 'functions', 'function_names', 'notes')
+
+    def __init__(self, total_functions):
+        self.total_functions = total_functions
+        # Arrays are indexed by line numbers. They keep the number of times the line was covered plus one, so zero
+        # corresponds to lines that are not considered at all.
+        self.lines = array.array('Q')
+        self.functions = array.array('Q')
+        # Identifiers of interned function names
+        self.function_names = set()
+        # Notes are either kept as is if there is the only one for a line or they are merged into a structure
+        self.notes = dict()
+
+    @staticmethod
+    def add_counters(counters, line, cov_num):
+        if line >= len(counters):
+            counters.extend([0] * (line + 1 - len(counters)))
+        counters[line] = (counters[line] or 1) + cov_num
+
+    @staticmethod
+    def merge_counters(counters, other_counters):
+        if len(other_counters) > len(counters):
+            counters.extend([0] * (len(other_counters) - len(counters)))
+        for line, value in enumerate(other_counters):
+            if value:
+                counters[line] = (counters[line] or 1) + value - 1
+
+    @staticmethod
+    def get_coverage(counters):
+        return {line: value - 1 for line, value in enumerate(counters) if value}
+
+    def add_note(self, line, note):
+        # Specify first note for a given line.
+        if line not in self.notes:
+            self.notes[line] = note
+        # Merge new note with the previous one(s).
+        else:
+            self.notes[line] = merge_notes(get_note_data(self.notes[line]), get_note_data(note))
+
+
+def get_note_data(note):
+    """
+    Get note structure containing the number of stops, total time and ranges of variables values. Notes that are already
+    merged have this structure.
+    """
+    if 'kind' not in note:
+        return note
+
+    op_stats = assumptions = None
+    if note['kind'] == 'Multiple notes':
+        op_stats, assumptions = note['text'].split('ms. ')
+        op_stats += 'ms'
+    elif note['kind'] == 'Verifier assumption':
+        assumptions = note['text']
+    else:
+        op_stats = note['text']
+
+    note_data = {'stops': None, 'time': None, 'assumptions': None}
+    if op_stats:
+        note_data['stops'], note_data['time'] = get_verifier_op_stats(op_stats)
+    if assumptions:
+        note_data['assumptions'] = get_var_val_ranges(assumptions)
+    return note_data
+
+
+def merge_notes(note_data1, note_data2):
+    merged = {'stops': None, 'time': None, 'assumptions': None}
+    for note_data in (note_data1, note_data2):
+        if note_data['stops'] is not None:
+            merged['stops'] = (merged['stops'] or 0) + note_data['stops']
+            merged['time'] = (merged['time'] or 0) + note_data['time']
+
+    if note_data1['assumptions'] and note_data2['assumptions']:
+        # Unite ranges of variable values and get rid of intersections.
+        merged['assumptions'] = dict(note_data1['assumptions'])
+        for var_name, val_ranges in note_data2['assumptions'].items():
+            if var_name in merged['assumptions']:
+                merged['assumptions'][var_name] = merge_int_ranges(merged['assumptions'][var_name] + val_ranges)
             else:
-                prev_notes = merged_coverage_info[file_name]['notes'][line]
-                prev_verifier_assumptions = None
-                prev_verifier_op_stats = None
-                verifier_assumptions = None
-                verifier_op_stats = None
-                merged_verifier_assumptions = None
-                merged_verifier_op_stats = None
-
-                def split_multiple_notes(notes):
-                    verifier_op_stats, verifier_assumptions = notes.split('ms. ')
-                    return verifier_op_stats + 'ms', verifier_assumptions
-
-                if prev_notes['kind'] == 'Multiple notes':
-                    prev_verifier_op_stats, prev_verifier_assumptions = split_multiple_notes(prev_notes['text'])
-                elif prev_notes['kind'] == 'Verifier assumption':
-                    prev_verifier_assumptions = prev_notes['text']
-                else:
-                    prev_verifier_op_stats = prev_notes['text']
+                merged['assumptions'][var_name] = val_ranges
+    else:
+        merged['assumptions'] = note_data1['assumptions'] or note_data2['assumptions']
+
+    return merged
+
+
+def get_note(note_data):
+    """Convert notes structure back to the text format."""
+    if 'kind' in note_data:
+        return note_data
+
+    op_stats = assumptions = None
+    if note_data['stops'] is not None:
+        op_stats = "{0} stops for total time {1} ms".format(note_data['stops'], note_data['time'])
+    if note_data['assumptions']:
+        assumptions = get_verifier_assumptions(note_data['assumptions'])
+
+    if assumptions and op_stats:
+        return {'kind': 'Multiple notes', 'text': op_stats + '. ' + assumptions}
+    elif assumptions:
+        return {'kind': 'Verifier assumption', 'text': assumptions}
+    else:
+        return {'kind': 'Verifier operation statistics', 'text': op_stats}
+
+
+class CoverageAccumulator:
+    """
+    Merge code coverage of verification tasks. Accumulated coverage can be appended to the file to free memory. Later
+    all parts are merged back and the total coverage is converted to the required format just once.
+    """
+
+    def __init__(self):
+        self.files = dict()
+        self._function_names = list()
+        self._function_name_ids = dict()
+
+    def __bool__(self):
+        return bool(self.files)
+
+    def __get_function_name_id(self, name):
+        if name not in self._function_name_ids:
+            self._function_name_ids[name] = len(self._function_names)
+            self._function_names.append(name)
+        return self._function_name_ids[name]
+
+    def add(self, coverage_info):
+        """Add code coverage of a verification task as it is produced by LCOV."""
+        for file_name, file_coverage_info in coverage_info.items():
+            file_coverage = self.files.setdefault(file_name, FileCoverage(file_coverage_info['total functions']))
+
+            for line, cov_num in file_coverage_info['covered lines'].items():
+                FileCoverage.add_counters(file_coverage.lines, int(line), cov_num)
+            for line, cov_num in file_coverage_info['covered functions'].items():
+                FileCoverage.add_counters(file_coverage.functions, int(line), cov_num)
+            file_coverage.function_names.update(self.__get_function_name_id(name)
+                                                for name in file_coverage_info['covered function names'])
+            for line, note in file_coverage_info['notes'].items():
+                file_coverage.add_note(int(line), note)
+
+    def dump(self, file_name):
+        """
+        Append accumulated coverage to the file and forget it. Each source file is represented by a record consisting
+        of the header length, the JSON header padded to 8 bytes and arrays of line and function counters.
+        """
+        with open(file_name, 'ab') as fp:
+            for src_file_name, file_coverage in self.files.items():
+                header = json.dumps({
+                    'file': src_file_name,
+                    'total functions': file_coverage.total_functions,
+                    'lines': len(file_coverage.lines),
+                    'functions': len(file_coverage.functions),
+                    'function names': [self._function_names[i] for i in file_coverage.function_names],
+                    'notes': file_coverage.notes
+                }).encode('utf-8')
+                header += b' ' * (-len(header) % 8)
+                fp.write(struct.pack('<Q', len(header)))
+                fp.write(header)
+                file_coverage.lines.tofile(fp)
+                file_coverage.functions.tofile(fp)
+
+        self.__init__()
+
+    def load(self, file_name):
+        """Merge coverage appended to the file before."""
+        if not os.path.isfile(file_name):
+            return
+
+        with open(file_name, 'rb') as fp:
+            while True:
+                header_len = fp.read(8)
+                if not header_len:
+                    break
+                header = json.loads(fp.read(struct.unpack('<Q', header_len)[0]).decode('utf-8'))
+                file_coverage = self.files.setdefault(header['file'], FileCoverage(header['total functions']))
 
-                if note['kind'] == 'Multiple notes':
-                    verifier_op_stats, verifier_assumptions = split_multiple_notes(note['text'])
-                elif note['kind'] == 'Verifier assumption':
-                    verifier_assumptions = note['text']
-                else:
-                    verifier_op_stats = note['text']
+                for counters, number in ((file_coverage.lines, header['lines']),
+                                         (file_coverage.functions, header['functions'])):
+                    other_counters = array.array('Q')
+                    other_counters.fromfile(fp, number)
+                    FileCoverage.merge_counters(counters, other_counters)
+                file_coverage.function_names.update(self.__get_function_name_id(name)
+                                                    for name in header['function names'])
+                for line, note in header['notes'].items():
+                    file_coverage.add_note(int(line), note)
 
-                merged_verifier_op_stats = merge_verifier_op_stats(prev_verifier_op_stats, verifier_op_stats)
-                merged_verifier_assumptions = merge_verifier_assumptions(prev_verifier_assumptions, verifier_assumptions)
 
-                if merged_verifier_assumptions and merged_verifier_op_stats:
-                    merged_coverage_info[file_name]['notes'][line] = {'kind': 'Multiple notes',
-                                                                      'text': merged_verifier_op_stats + '. ' + merged_verifier_assumptions}
-                elif merged_verifier_assumptions:
-                    merged_coverage_info[file_name]['notes'][line] = {'kind': 'Verifier assumption',
-                                                                      'text': merged_verifier_assumptions}
-                else:
-                    merged_coverage_info[file_name]['notes'][line] = {'kind': 'Verifier operation statistics',
-                                                                      'text': merged_verifier_op_stats}
 '''
 For instance, merging:
     "1 stops for total time 14 ms"
@@ -100,31 +231,12 @@ should result in:
     "2 stops for total time 18 ms"
 '''
 op_stats_regexp = re.compile(r'^(\d+) stops for total time (\d+) ms$')
-def merge_verifier_op_stats(op_stats1, op_stats2):
-    if not op_stats1 and not op_stats2:
-        return None
-
-    if not op_stats1:
-        return op_stats2
-
-    if not op_stats2:
-        return op_stats1
-
-    m = re.match(op_stats_regexp, op_stats1)
-    if not m:
-        raise ValueError('Verifier operation statistics "{0}" has invalid format'.format(op_stats1))
-
-    stops1_num = m.group(1)
-    time1 = m.group(2)
-
-    m = re.match(op_stats_regexp, op_stats2)
+def get_verifier_op_stats(op_stats):
+    m = re.match(op_stats_regexp, op_stats)
     if not m:
-        raise ValueError('Verifier operation statistics "{0}" has invalid format'.format(op_stats2))
+        raise ValueError('Verifier operation statistics "{0}" has invalid format'.format(op_stats))
 
-    stops2_num = m.group(1)
-    time2 = m.group(2)
-
-    return "{0} stops for total time {1} ms".format(int(stops1_num) + int(stops2_num), int(time1) + int(time2))
+    return int(m.group(1)), int(m.group(2))
 
 '''
 For instance, merging:
@@ -136,62 +248,38 @@ should result in:
 '''
 var_val_ranges_regexp = re.compile(r'^([^=]+)= {(.+)}$')
 val_range_regexp = re.compile(r'^\[(-?\d+)\.\.(-?\d+)\]$')
-def merge_verifier_assumptions(assumptions1, assumptions2):
-    if not assumptions1 and not assumptions2:
-        return None
-
-    if not assumptions1:
-        return assumptions2
-
-    if not assumptions2:
-        return assumptions1
-
-    # Input string represents ranges of variable values, e.g. "node = {[11..13], [15..18], 111}; size = {[1..3], [5..8], 11}".
-    # Return dictionary with ranges of variable values {"node": [[11, 13], [15, 18], [111, 111], "size": [[1, 3], [5, 8], [11, 11]]}.
-    def get_var_val_ranges(s):
-        var_val_ranges = {}
-        for str_var_val_ranges in s.split('; '):
-            m = re.match(var_val_ranges_regexp, str_var_val_ranges)
-            if not m:
-                raise ValueError('Verifier assumptions "{0}" has invalid format'.format(str_var_val_ranges))
-
-            var_name = m.group(1)[:-1]
-            str_val_ranges = m.group(2)
-
-            str_val_ranges = str_val_ranges.split(', ')
-            val_ranges = []
-            for str_val_range in str_val_ranges:
-                m = re.match(val_range_regexp, str_val_range)
-                # This corresponds to, say, "[11..13]".
-                if m:
-                    val_ranges.append([int(m.group(1)), int(m.group(2))])
-                # This corresponds to, say, "111".
-                else:
-                    val = int(str_val_range)
-                    val_ranges.append([val, val])
-
-            var_val_ranges[var_name] = val_ranges
-
-        return var_val_ranges
+# Input string represents ranges of variable values, e.g. "node = {[11..13], [15..18], 111}; size = {[1..3], [5..8], 11}".
+# Return dictionary with ranges of variable values {"node": [[11, 13], [15, 18], [111, 111], "size": [[1, 3], [5, 8], [11, 11]]}.
+def get_var_val_ranges(s):
+    var_val_ranges = {}
+    for str_var_val_ranges in s.split('; '):
+        m = re.match(var_val_ranges_regexp, str_var_val_ranges)
+        if not m:
+            raise ValueError('Verifier assumptions "{0}" has invalid format'.format(str_var_val_ranges))
+
+        var_name = m.group(1)[:-1]
+        str_val_ranges = m.group(2)
+
+        str_val_ranges = str_val_ranges.split(', ')
+        val_ranges = []
+        for str_val_range in str_val_ranges:
+            m = re.match(val_range_regexp, str_val_range)
+            # This corresponds to, say, "[11..13]".
+            if m:
+                val_ranges.append([int(m.group(1)), int(m.group(2))])
+            # This corresponds to, say, "111".
+            else:
+                val = int(str_val_range)
+                val_ranges.append([val, val])
 
-    var_val_ranges1 = get_var_val_ranges(assumptions1)
-    var_val_ranges2 = get_var_val_ranges(assumptions2)
+        var_val_ranges[var_name] = val_ranges
 
-    # Unite ranges of variable values and get rid of intersections.
-    var_val_ranges = {}
-    var_names = set(var_val_ranges1.keys())
-    var_names.update(var_val_ranges2.keys())
-    for var_name in var_names:
-        if var_name in var_val_ranges1 and var_name in var_val_ranges2:
-            var_val_ranges[var_name] = merge_int_ranges(var_val_ranges1[var_name] + var_val_ranges2[var_name])
-        elif var_name in var_val_ranges1:
-            var_val_ranges[var_name] = var_val_ranges1[var_name]
-        else:
-            var_val_ranges[var_name] = var_val_ranges2[var_name]
+    return var_val_ranges
 
-    # Convert back to the original string format.
+# Convert ranges of variable values back to the original string format.
+def get_verifier_assumptions(var_val_ranges):
     str_all_var_val_ranges = ""
-    for var_name in sorted(var_names):
+    for var_name in sorted(var_val_ranges):
         # Add separator from previous variable if so.
         if str_all_var_val_ranges:
             str_all_var_val_ranges += "; "
@@ -252,12 +340,15 @@ def convert_coverage(merged_coverage_info, coverage_dir, pretty, src_files_info=
         'data statistics': dict()
     }
 
-    for file_name, file_coverage_info in merged_coverage_info.items():
+    file_most_covered_lines = {}
+    for file_name, file_coverage_info in merged_coverage_info.files.items():
+        covered_lines = FileCoverage.get_coverage(file_coverage_info.lines)
+        covered_functions = FileCoverage.get_coverage(file_coverage_info.functions)
         file_coverage = {
             'format': coverage_format_version,
-            'line coverage': file_coverage_info['covered lines'],
-            'function coverage': file_coverage_info['covered functions'],
-            'notes': file_coverage_info['notes']
+            'line coverage': covered_lines,
+            'function coverage': covered_functions,
+            'notes': {line: get_note(note) for line, note in file_coverage_info.notes.items()}
         }
 
         os.makedirs(os.path.join(coverage_dir, os.path.dirname(file_name)), exist_ok=True)
@@ -266,30 +357,22 @@ def convert_coverage(merged_coverage_info, coverage_dir, pretty, src_files_info=
 
         coverage_stats['coverage statistics'][file_name] = [
             # Total number of covered lines of code.
-            len([line_number for line_number, line_coverage in file_coverage_info['covered lines'].items()
-                 if line_coverage]),
+            len([line_number for line_number, line_coverage in covered_lines.items() if line_coverage]),
             # Total number of considered lines of code.
-            len(file_coverage_info['covered lines']),
+            len(covered_lines),
             # Total number of covered functions.
-            len([func_line_number for func_line_number, func_coverage in file_coverage_info['covered functions'].items()
-                 if func_coverage]),
+            len([func_line_number for func_line_number, func_coverage in covered_functions.items() if func_coverage]),
             # Total number of considered functions.
-            len(file_coverage_info['covered functions'])
+            len(covered_functions)
         ]
 
-    # Obtain most covered lines for code coverage of verification tasks.
-    if not total:
-        file_most_covered_lines = {}
-        for file_name, file_coverage_info in merged_coverage_info.items():
-            sorted_covered_lines = sorted(file_coverage_info['covered lines'].items(), key=lambda kv: kv[1], reverse=True)
-
+        # Obtain most covered lines for code coverage of verification tasks.
+        if not total:
             # It is enough to remember not more than the total number of most covered lines per each file.
-            for i in range(most_covered_lines_num):
-                if i == len(sorted_covered_lines):
-                    break
-
-                file_most_covered_lines["{0}:{1}".format(file_name, sorted_covered_lines[i][0])] = sorted_covered_lines[i][1]
+            for line, cov_num in heapq.nlargest(most_covered_lines_num, covered_lines.items(), key=lambda kv: kv[1]):
+                file_most_covered_lines["{0}:{1}".format(file_name, line)] = cov_num
 
+    if not total:
         sorted_file_most_covered_lines = sorted(file_most_covered_lines.items(), key=lambda kv: kv[1], reverse=True)
 
         if sorted_file_most_covered_lines:
@@ -332,7 +415,7 @@ def convert_coverage(merged_coverage_info, coverage_dir, pretty, src_files_info=
 
 class JCR(klever.core.components.Component):
 
-    COVERAGE_FILE_NAME = "cached coverage.json"
+    COVERAGE_FILE_NAME = "cached coverage"
 
     def __init__(self, conf, logger, parent_id, callbacks, mqs, vals, id=None, work_dir=None, attrs=None,
                  separate_from_parent=True, include_child_resources=False, queues_to_terminate=None):
@@ -348,7 +431,6 @@ class JCR(klever.core.components.Component):
         self.logger.debug("Begin collecting coverage")
 
         total_coverage_infos = dict()
-        arcfiles = {}
         os.mkdir('total coverages')
         counters = dict()
         try:
@@ -365,12 +447,9 @@ class JCR(klever.core.components.Component):
                 self.logger.debug('Get coverage for sub-job {!r}'.format(sub_job_id))
 
                 if 'coverage info file' in coverage_info:
-                    if sub_job_id not in total_coverage_infos:
-                        total_coverage_infos[sub_job_id] = dict()
-                        arcfiles[sub_job_id] = dict()
+                    total_coverage_infos.setdefault(sub_job_id, dict())
                     req_spec_id = coverage_info['req spec id']
-                    total_coverage_infos[sub_job_id].setdefault(req_spec_id, {})
-                    arcfiles[sub_job_id].setdefault(req_spec_id, {})
+                    total_coverage_infos[sub_job_id].setdefault(req_spec_id, CoverageAccumulator())
 
                     if os.path.isfile(coverage_info['coverage info file']):
                         with open(coverage_info['coverage info file'], encoding='utf-8') as fp:
@@ -381,18 +460,14 @@ class JCR(klever.core.components.Component):
                             os.remove(os.path.join(self.conf['main working directory'],
                                                    coverage_info['coverage info file']))
 
-                        add_to_coverage(total_coverage_infos[sub_job_id][req_spec_id], loaded_coverage_info)
-                        for file, file_coverage_info in loaded_coverage_info.items():
-                            arcfiles[sub_job_id][req_spec_id][file_coverage_info['original source file name']] = file
+                        total_coverage_infos[sub_job_id][req_spec_id].add(loaded_coverage_info)
                         del loaded_coverage_info
 
                         counters.setdefault(sub_job_id, dict())
                         counters[sub_job_id].setdefault(req_spec_id, 0)
                         counters[sub_job_id][req_spec_id] += 1
                         if counters[sub_job_id][req_spec_id] >= 10:
-                            self.__read_data(total_coverage_infos, sub_job_id, req_spec_id)
                             self.__save_data(total_coverage_infos, sub_job_id, req_spec_id)
-                            self.__clean_data(total_coverage_infos, sub_job_id, req_spec_id)
                             counters[sub_job_id][req_spec_id] = 0
                     else:
                         self.logger.warning("There is no coverage file {!r}".
@@ -407,8 +482,8 @@ class JCR(klever.core.components.Component):
                     sub_job_dir = sub_job_id.lower()
 
                     for req_spec_id in counters[sub_job_id]:
-                        self.__read_data(total_coverage_infos, sub_job_id, req_spec_id)
-                        coverage_info = total_coverage_infos[sub_job_id][req_spec_id]
+                        self.__save_data(total_coverage_infos, sub_job_id, req_spec_id)
+                        coverage_info = self.__read_data(sub_job_id, req_spec_id)
                         total_coverage_dir = os.path.join(self.__get_total_cov_dir(sub_job_id, req_spec_id), 'report')
 
                         with open(os.path.join(sub_job_dir, 'original sources basic information.json')) as fp:
@@ -419,8 +494,7 @@ class JCR(klever.core.components.Component):
                         total_coverage_dirs.append(total_coverage_dir)
 
                         total_coverages[req_spec_id] = klever.core.utils.ArchiveFiles([total_coverage_dir])
-                        self.__save_data(total_coverage_infos, sub_job_id, req_spec_id)
-                        self.__clean_data(total_coverage_infos, sub_job_id, req_spec_id)
+                        del coverage_info
 
                     # This isn't great to build component identifier in such the artificial way.
                     # But otherwise we need to pass it everywhere like "sub-job identifier".
@@ -482,46 +556,133 @@ class JCR(klever.core.components.Component):
 
         return total_coverage_dir
 
-    def __read_data(self, cache, sub_job_id, requirement):
+    def __read_data(self, sub_job_id, requirement):
         file_name = os.path.join(self.__get_total_cov_dir(sub_job_id, requirement), self.COVERAGE_FILE_NAME)
-
-        if os.path.isfile(file_name):
-            with open(file_name, 'r', encoding='utf-8') as fp:
-                large_cache = json.load(fp)
-        else:
-            large_cache = dict()
-
-        cache.setdefault(sub_job_id, dict())
-        cache[sub_job_id].setdefault(requirement, dict())
-
-        for file_name in large_cache:
-            # todo: This code is close to function add_to_coverage
-            cache[sub_job_id][requirement].setdefault(file_name, {
-                'total functions': large_cache[file_name]['total functions'],
-                'covered lines': {},
-                'covered functions': {},
-                'covered function names': list(),
-                'notes': {}
-            })
-
-            for path in ('covered lines', 'covered functions'):
-                for line, value in large_cache[file_name][path].items():
-                    cache[sub_job_id][requirement][file_name][path].setdefault(line, 0)
-                    cache[sub_job_id][requirement][file_name][path][line] += value
-            if large_cache[file_name].get('covered function names'):
-                for name in large_cache[file_name]['covered function names']:
-                    if name not in cache[sub_job_id][requirement][file_name]['covered function names']:
-                        cache[sub_job_id][requirement][file_name]['covered function names'].append(name)
+        coverage = CoverageAccumulator()
+        coverage.load(file_name)
+        return coverage
 
     def __save_data(self, cache, sub_job_id, requirement):
+        # Append coverage accumulated since the last saving and free memory
         file_name = os.path.join(self.__get_total_cov_dir(sub_job_id, requirement), self.COVERAGE_FILE_NAME)
-        cache.setdefault(sub_job_id, dict())
-        cache[sub_job_id].setdefault(requirement, dict())
-        with open(file_name, 'w', encoding='utf-8') as fp:
-            json.dump(cache[sub_job_id][requirement], fp)
-
-    def __clean_data(self, cache, job_id, requirement):
-        cache[job_id].pop(requirement, None)
+        cache[sub_job_id][requirement].dump(file_name)
+
+
+class CILLineMap:
+    """
+    Map lines of CIL files to lines of original source files according to "#line" preprocessor directives. Each
+    directive starts a segment of consequent lines, so just segments are kept and looked up with binary search.
+    """
+
+    line_preprocessor_directive = re.compile(r'\s*#line\s+(\d+)\s*(.*)')
+
+    def __init__(self):
+        # The first file corresponds to lines before any directive.
+        self.files = [None]
+        self.total_lines = 0
+        self.starts = array.array('q')
+        self.orig_lines = array.array('q')
+        self.file_ids = array.array('q')
+
+    @classmethod
+    def build(cls, cil_file, skip_file=None):
+        """
+        Build the line map of the CIL file.
+
+        :param cil_file: Path to the CIL file.
+        :param skip_file: Function that returns True for artificial file references. Lines following them are treated
+                          as lines of the previous file.
+        """
+        line_map = cls()
+        file_ids = {None: 0}
+        file_id = 0
+        line_map.__add_segment(1, 0, file_id)
+
+        line_num = 0
+        with open(cil_file) as fp:
+            for line_num, line in enumerate(fp, start=1):
+                if '#line' not in line:
+                    continue
+                m = cls.line_preprocessor_directive.match(line)
+                if m:
+                    orig_file = m.group(2)[1:-1]
+                    if m.group(2) and not (skip_file and skip_file(orig_file)):
+                        if orig_file not in file_ids:
+                            file_ids[orig_file] = len(line_map.files)
+                            line_map.files.append(orig_file)
+                        file_id = file_ids[orig_file]
+                    line_map.__add_segment(line_num + 1, int(m.group(1)), file_id)
+        line_map.total_lines = line_num
+
+        return line_map
+
+    def __add_segment(self, start, orig_line, file_id):
+        self.starts.append(start)
+        self.orig_lines.append(orig_line)
+        self.file_ids.append(file_id)
+
+    def get(self, line):
+        """Get an original file and a line in it for a given CIL line or None if there is no such line."""
+        if line < 1 or line > self.total_lines:
+            return None
+
+        segment = bisect.bisect_right(self.starts, line) - 1
+        # Lines with directives do not correspond to original lines.
+        if segment + 1 < len(self.starts) and self.starts[segment + 1] - 1 == line:
+            return None
+
+        return self.files[self.file_ids[segment]], self.orig_lines[segment] + line - self.starts[segment]
+
+    def __getitem__(self, line):
+        orig_location = self.get(line)
+        if orig_location is None:
+            raise KeyError(line)
+        return orig_location
+
+    def dump(self, fp):
+        header = json.dumps({'files': self.files, 'total lines': self.total_lines, 'segments': len(self.starts)})
+        fp.write(struct.pack('<Q', len(header.encode('utf-8'))))
+        fp.write(header.encode('utf-8'))
+        for values in (self.starts, self.orig_lines, self.file_ids):
+            values.tofile(fp)
+
+    @classmethod
+    def load(cls, fp):
+        line_map = cls()
+        header = json.loads(fp.read(struct.unpack('<Q', fp.read(8))[0]).decode('utf-8'))
+        line_map.files = header['files']
+        line_map.total_lines = header['total lines']
+        for values in (line_map.starts, line_map.orig_lines, line_map.file_ids):
+            values.fromfile(fp, header['segments'])
+        return line_map
+
+
+def get_cil_line_map(logger, conf, cil_file):
+    """Get the line map of the CIL file from cache shared by all verification tasks or build it."""
+    if 'cache directory' not in conf:
+        return CILLineMap.build(cil_file)
+
+    cache = ResultsCache(logger, os.path.join(conf['cache directory'], 'cil line maps'),
+                         conf.get('CIL line maps cache size', DEFAULT_CACHE_SIZE))
+    cache_key = ResultsCache.get_key(klever.core.utils.get_file_checksum(cil_file))
+    with cache.lock(cache_key):
+        cache_entry = cache.get(cache_key)
+        if cache_entry:
+            try:
+                with open(os.path.join(cache_entry, 'line map'), 'rb') as fp:
+                    logger.debug('Get line map of "{0}" from cache'.format(cil_file))
+                    return CILLineMap.load(fp)
+            except OSError:
+                # The entry was evicted just now.
+                pass
+
+        line_map = CILLineMap.build(cil_file)
+        with open('cil line map', 'wb') as fp:
+            line_map.dump(fp)
+        cache.publish(cache_key, {'line map': 'cil line map'})
+        os.remove('cil line map')
+
+        return line_map
 
 
 class LCOV:
@@ -561,8 +722,8 @@ class LCOV:
             with open(coverage_id, 'w', encoding='utf-8') as fp:
                 klever.core.utils.json_dump(self.coverage_info, fp, self.conf['keep intermediate files'])
 
-            coverage = {}
-            add_to_coverage(coverage, self.coverage_info)
+            coverage = CoverageAccumulator()
+            coverage.add(self.coverage_info)
             convert_coverage(coverage, 'coverage', self.conf['keep intermediate files'])
         except Exception:
             shutil.rmtree('coverage', ignore_errors=True)
@@ -574,7 +735,6 @@ class LCOV:
 
         # Parse coverage file.
         coverage_info = {}
-        line_map = {}
         func_map = {}
         func_reverse_map = {}
 
@@ -589,40 +749,23 @@ class LCOV:
                 }
 
         with open(self.coverage_file, encoding='utf-8') as fp:
-            # TODO: verification tasks consisting of several source files are not supported.
-            # Get actual CIL source file name.
-            cil_src_file_name = None
+            # Process records one by one. Each record corresponds to a CIL source file.
+            line_map = None
+            add = None
+            timers = None
             for line in fp:
                 line = line.rstrip('\n')
+                # Get actual CIL source file name and C source files line map.
                 if line.startswith(self.FILENAME_PREFIX):
                     cil_src_file_name = line[len(self.FILENAME_PREFIX):]
                     cil_src_file_name = os.path.basename(os.path.normpath(cil_src_file_name))
                     cil_src_file_name = self.verification_task_files[cil_src_file_name]
-                    break
-
-            # Build C source files line map.
-            with open(cil_src_file_name) as cil_fp:
-                line_num = 1
-                orig_file = None
-                orig_file_line_num = 0
-                line_preprocessor_directive = re.compile(r'\s*#line\s+(\d+)\s*(.*)')
-                for line in cil_fp:
-                    m = line_preprocessor_directive.match(line)
-                    if m:
-                        orig_file_line_num = int(m.group(1))
-                        if m.group(2):
-                            orig_file = m.group(2)[1:-1]
-                    else:
-                        line_map[line_num] = (orig_file, orig_file_line_num)
-                        orig_file_line_num += 1
-                    line_num += 1
-
-            add = None
-            timers = None
-            for line in fp:
-                line = line.rstrip('\n')
+                    line_map = get_cil_line_map(self.logger, self.conf, cil_src_file_name)
+                # Skip anything outside records, e.g. test names.
+                elif not line_map:
+                    continue
                 # Build C functions map.
-                if line.startswith(self.FUNCTION_NAME_PREFIX):
+                elif line.startswith(self.FUNCTION_NAME_PREFIX):
                     splts = line[len(self.FUNCTION_NAME_PREFIX):].split(',')
                     cil_src_line = int(splts[0])
                     func_name = splts[1]
@@ -651,10 +794,11 @@ class LCOV:
                     cov_num = int(splts[1])
 
                     # TODO: Coverage can contain invalid references. Let's deal with this one day!
-                    if cil_src_line not in line_map:
+                    orig_location = line_map.get(cil_src_line)
+                    if orig_location is None:
                         continue
 
-                    orig_file, orig_line = line_map[cil_src_line]
+                    orig_file, orig_line = orig_location
                     init_file_coverage_info(orig_file)
                     coverage_info[orig_file]['covered lines'][orig_line] = cov_num
 
@@ -674,9 +818,9 @@ class LCOV:
                     add = line[len(self.ADD_PREFIX):]
                 elif line.startswith(self.TIMERS_PREFIX):
                     timers = line[len(self.TIMERS_PREFIX):]
-                # Finalize raw code coverage processing.
+                # Finalize raw code coverage processing of the record.
                 elif line.startswith(self.EOR_PREFIX):
-                    break
+                    line_map = None
                 else:
                     # We should not pass here but who knows.
                     raise NotImplementedError(line)
@@ -15,6 +15,7 @@
 # limitations under the License.
 #
 
+import gzip
 import json
 import os
 import requests
@@ -32,14 +33,17 @@ class BridgeError(IOError):
 
 # TODO: it would be better to name it BridgeRequests. This is the case for Scheduler and CLI.
 class Session:
-    def __init__(self, logger, bridge, job_id):
+    def __init__(self, logger, bridge, job_id, pool_size=None):
         logger.info('Create session for user "{0}" at Klever Bridge "{1}"'.format(bridge['user'], bridge['name']))
 
         self.logger = logger
         self.name = bridge['name']
         self.job_id = job_id
+        self.pool_size = pool_size
 
         self.error = None
+        # The number of the last change of task statuses got from Bridge.
+        self.tasks_change_seq = 0
 
         self.__parameters = {
             'username': bridge['user'],
@@ -52,6 +56,11 @@ class Session:
     # TODO: It is not signing in anymore. It is getting token. This is the case for Scheduler and CLI.
     def __signin(self):
         self.session = requests.Session()
+        if self.pool_size:
+            # Keep enough persistent connections for all threads that send requests concurrently.
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
         resp = self.__request('service/get_token/', 'POST', data=self.__parameters)
         self.session.headers.update({'Authorization': 'Token {}'.format(resp.json()['token'])})
         self.logger.debug('Session was created')
@@ -107,9 +116,18 @@ class Session:
         resp = self.__request('reports/api/has-sources/?identifier={0}'.format(src_id), method='GET')
         return resp.json()['exists']
 
-    def get_tasks_statuses(self):
-        resp = self.__request('service/tasks/?job={}&fields=status&fields=id'.format(self.job_id), method='GET')
-        return resp.json()
+    def subscribe_to_tasks_statuses(self):
+        self.__request('service/task-changes/{}/'.format(self.job_id), method='POST')
+
+    def get_tasks_statuses(self, timeout=0):
+        # Get statuses of just those tasks that changed since the previous call. Bridge waits for changes if there are
+        # no ones yet and timeout is specified, so one should subscribe to them in advance.
+        resp = self.__request('service/task-changes/{}/?since={}&timeout={}'
+                              .format(self.job_id, self.tasks_change_seq, timeout), method='GET')
+        tasks_statuses = resp.json()
+        if tasks_statuses:
+            self.tasks_change_seq = tasks_statuses[-1][2]
+        return [{'id': task_id, 'status': status} for task_id, status, _ in tasks_statuses]
 
     def get_task_error(self, task_id):
         resp = self.__request('service/tasks/{}/?fields=error'.format(task_id), method='GET')
@@ -132,25 +150,38 @@ class Session:
         batch_report_file_archives = []
         image_reports = []
         for report_and_report_file_archives in reports_and_report_file_archives:
-            with open(report_and_report_file_archives['report file'], encoding='utf-8') as fp:
-                report = json.load(fp)
-                if report['type'] == 'image':
-                    image_reports.append(report)
-                else:
-                    batch_reports.append(report)
+            # Reporter can provide already loaded reports to avoid reading them one more time.
+            report = report_and_report_file_archives.get('report')
+            if report is None:
+                with open(report_and_report_file_archives['report file'], encoding='utf-8') as fp:
+                    report = json.load(fp)
+
+            if report['type'] == 'image':
+                image_reports.append(report)
+            else:
+                batch_reports.append(report)
 
             report_file_archives = report_and_report_file_archives.get('report file archives')
             if report_file_archives:
                 batch_report_file_archives.extend(report_file_archives)
 
-        # TODO: report is likely should be compressed.
-        self.__upload_archives('reports/api/upload/{0}/'.format(self.job_id),
-                               {
-                                   'reports': json.dumps(batch_reports),
+        if batch_reports:
+            # Reports are compressed as a whole since they are quite large and very similar to each other.
+            bundle = gzip.compress(json.dumps(batch_reports, ensure_ascii=False).encode('utf-8'), compresslevel=6)
+            archives = {os.path.basename(archive): open(archive, 'rb') for archive in batch_report_file_archives}
+            try:
+                archives['bundle'] = ('reports.json.gz', bundle, 'application/gzip')
+                self.__request('reports/api/upload-bundle/{0}/'.format(self.job_id), 'POST',
+                               data={
+                                   'compression': 'gzip',
                                    'archives': json.dumps([os.path.basename(archive)
                                                            for archive in batch_report_file_archives])
                                },
-                               {os.path.basename(archive): archive for archive in batch_report_file_archives})
+                               files=archives)
+            finally:
+                for archive in archives.values():
+                    if not isinstance(archive, tuple):
+                        archive.close()
 
         # We can safely remove task and its files after uploading report referencing task files.
         for report in batch_reports:
@@ -109,7 +109,11 @@ class VRP(klever.core.components.Component):
             self.mqs['processing tasks'].put([status.lower(), task_data, tryattempt, source_paths])
 
         receiving = True
+        # Final statuses of tasks that were solved before VTG asked to track them.
+        solved = dict()
         session = klever.core.session.Session(self.logger, self.conf['Klever Bridge'], self.conf['identifier'])
+        # Subscribe to changes of task statuses to be notified about them as soon as possible.
+        session.subscribe_to_tasks_statuses()
         while True:
             # Get new tasks
             if receiving:
@@ -131,20 +135,27 @@ class VRP(klever.core.components.Component):
 
             # Plan for processing new tasks
             if len(pending) > 0:
-                tasks_statuses = session.get_tasks_statuses()
+                # Bridge answers as soon as some task status changes. Do not wait for too long while new tasks can be
+                # generated.
+                try:
+                    tasks_statuses = session.get_tasks_statuses(
+                        solution_timeout if receiving else solution_timeout * 10)
+                except (klever.core.session.BridgeError, klever.core.session.UnexpectedStatusCode) as e:
+                    # Changes are taken from the database in any case, so get them without waiting if Bridge can not
+                    # wait for them.
+                    self.logger.warning('Could not wait for changes of task statuses, get them at once: {}'.format(e))
+                    time.sleep(solution_timeout)
+                    tasks_statuses = session.get_tasks_statuses()
                 for item in tasks_statuses:
                     task = str(item['id'])
-                    if task in pending.keys():
-                        if item['status'] == 'FINISHED':
-                            submit_processing_task('FINISHED', task)
-                            del pending[task]
-                        elif item['status'] == 'ERROR':
-                            submit_processing_task('error', task)
-                            del pending[task]
-                        elif item['status'] in ('PENDING', 'PROCESSING'):
-                            pass
-                        else:
-                            raise NotImplementedError('Unknown task status {!r}'.format(item['status']))
+                    if item['status'] in ('FINISHED', 'ERROR'):
+                        solved[task] = item['status']
+                    elif item['status'] not in ('PENDING', 'PROCESSING'):
+                        raise NotImplementedError('Unknown task status {!r}'.format(item['status']))
+
+                for task in [task for task in pending if task in solved]:
+                    submit_processing_task(solved.pop(task), task)
+                    del pending[task]
 
             if not receiving and len(pending) == 0:
                 for _ in range(self.__workers):
@@ -152,8 +163,6 @@ class VRP(klever.core.components.Component):
                 self.mqs['processing tasks'].close()
                 break
 
-            time.sleep(solution_timeout)
-
         self.logger.debug("Shutting down result processing gracefully")
 
     def __loop_worker(self):
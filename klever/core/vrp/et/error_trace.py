@@ -18,11 +18,27 @@
 import re
 import os
 import json
+import array
+import collections
 
 import klever.core.utils
 from klever.core.highlight import Highlight
 
 
+class Edge(dict):
+    """Edge data. Its identifier refers to connections between nodes kept by the error trace."""
+
+    __slots__ = ('id',)
+
+    def __init__(self, identifier, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.id = identifier
+
+    # Edges without data are still edges.
+    def __bool__(self):
+        return True
+
+
 class ErrorTrace:
     ERROR_TRACE_FORMAT_VERSION = 1
     MODEL_COMMENT_TYPES = r'NOTE\d?|ASSERT|CIF|EMG_WRAPPER'
@@ -30,13 +46,26 @@ class ErrorTrace:
 
     def __init__(self, logger):
         self._attrs = list()
-        self._nodes = dict()
+        # Nodes and edges are numbered. For each node there are the first input and output edges while for each edge
+        # there are its source and target nodes as well as next input and output edges of these nodes (-1 means
+        # absence). This takes much less memory than lists of edges for each node for large witnesses.
+        self._node_numbers = dict()
+        self._node_ids = list()
+        self._first_in = array.array('q')
+        self._first_out = array.array('q')
+        self._edges = list()
+        self._sources = array.array('q')
+        self._targets = array.array('q')
+        self._next_in = array.array('q')
+        self._next_out = array.array('q')
         self._files = list()
+        self._file_ids = dict()
         self._funcs = list()
+        self._func_ids = dict()
         self._logger = logger
         self._entry_node_id = None
         self._violation_node_ids = set()
-        self._violation_edges = list()
+        self._violation_edges = collections.deque()
         self._notes = dict()
         self._asserts = dict()
         self._actions = list()
@@ -44,7 +73,7 @@ class ErrorTrace:
         self.emg_comments = dict()
         self.displays = dict()
         self.programfile_content = ''
-        self.programfile_line_map = dict()
+        self.programfile_line_map = None
 
     @property
     def functions(self):
@@ -56,12 +85,12 @@ class ErrorTrace:
 
     @property
     def violation_nodes(self):
-        return ([key, self._nodes[key]] for key in sorted(self._violation_node_ids))
+        return ([key, self._node_numbers[key]] for key in sorted(self._violation_node_ids))
 
     @property
     def entry_node(self):
         if self._entry_node_id:
-            return self._nodes[self._entry_node_id]
+            return self._node_numbers[self._entry_node_id]
         else:
             raise KeyError('Entry node has not been set yet')
 
@@ -139,6 +168,7 @@ class ErrorTrace:
 
     def serialize(self):
         klever.core.utils.capitalize_attr_names(self._attrs)
+        self.compact()
 
         # TODO: perhaps it would be easier to operate with such the tree above as well.
         # Convert list of edges to global variable declarations list and to error trace tree.
@@ -357,20 +387,54 @@ class ErrorTrace:
         self._entry_node_id = node_id
 
     def add_node(self, node_id):
-        if node_id in self._nodes:
+        if node_id in self._node_numbers:
             raise ValueError('There is already added node with an identifier {!r}'.format(node_id))
-        self._nodes[node_id] = {'id': node_id, 'in': list(), 'out': list()}
-        return self._nodes[node_id]
+        node = len(self._node_ids)
+        self._node_numbers[node_id] = node
+        self._node_ids.append(node_id)
+        self._first_in.append(-1)
+        self._first_out.append(-1)
+        return node
 
     def add_edge(self, source, target):
-        source_node = self._nodes[source]
-        target_node = self._nodes[target]
-
-        edge = {'source node': source_node, 'target node': target_node}
-        source_node['out'].append(edge)
-        target_node['in'].append(edge)
+        return self._add_edge(self._node_numbers[source], self._node_numbers[target])
+
+    def _add_edge(self, source_node, target_node):
+        edge = Edge(len(self._edges))
+        self._edges.append(edge)
+        self._sources.append(source_node)
+        self._targets.append(target_node)
+        self._next_in.append(-1)
+        self._next_out.append(-1)
+        self._link(self._first_out, self._next_out, source_node, edge.id)
+        self._link(self._first_in, self._next_in, target_node, edge.id)
         return edge
 
+    @staticmethod
+    def _link(first, following, node, edge_id):
+        # Add the edge (and edges following it if so) to the end of the list of node edges.
+        if first[node] == -1:
+            first[node] = edge_id
+        else:
+            cur = first[node]
+            while following[cur] != -1:
+                cur = following[cur]
+            following[cur] = edge_id
+
+    @staticmethod
+    def _unlink(first, following, node, edge_id):
+        if first[node] == edge_id:
+            first[node] = following[edge_id]
+        else:
+            cur = first[node]
+            while following[cur] != edge_id:
+                cur = following[cur]
+            following[cur] = following[edge_id]
+        following[edge_id] = -1
+
+    def has_node(self, node_id):
+        return node_id in self._node_numbers
+
     def add_violation_node_id(self, identifier):
         self._violation_node_ids.add(identifier)
 
@@ -378,24 +442,22 @@ class ErrorTrace:
         self._violation_node_ids.remove(identifier)
 
     def add_file(self, file_name):
-        if file_name not in self._files:
+        if file_name not in self._file_ids:
             # Violation witnesses can refer auxiliary files created at weaving in all aspect files for models. But these
             # auxiliary files could be removed if one will not keep intermediate files. Taking into account that
             # auxiliary files are not very important, we can silently work further. You can see
             # https://forge.ispras.ru/issues/10994 for more details.
             if not file_name.endswith(".aux") and not os.path.isfile(file_name):
                 raise FileNotFoundError("There is no file {!r}".format(file_name))
+            self._file_ids[file_name] = len(self._files)
             self._files.append(file_name)
-            return self.resolve_file_id(file_name)
-        else:
-            return self.resolve_file_id(file_name)
+        return self._file_ids[file_name]
 
     def add_function(self, name):
-        if name not in self._funcs:
+        if name not in self._func_ids:
+            self._func_ids[name] = len(self._funcs)
             self._funcs.append(name)
-            return len(self._funcs) - 1
-        else:
-            return self.resolve_function_id(name)
+        return self._func_ids[name]
 
     def add_action(self, comment, relevant=False):
         if comment not in self._actions:
@@ -414,13 +476,19 @@ class ErrorTrace:
         self.emg_comments[file][line] = data
 
     def resolve_file_id(self, file):
-        return self._files.index(file)
+        try:
+            return self._file_ids[file]
+        except KeyError:
+            raise ValueError('There is no file {!r}'.format(file)) from None
 
     def resolve_file(self, identifier):
         return self._files[identifier]
 
     def resolve_function_id(self, name):
-        return self._funcs.index(name)
+        try:
+            return self._func_ids[name]
+        except KeyError:
+            raise ValueError('There is no function {!r}'.format(name)) from None
 
     def resolve_function(self, identifier):
         return self._funcs[identifier]
@@ -435,19 +503,24 @@ class ErrorTrace:
         # todo: Warning! This does work only if you guarantee:
         # *having no more than one input edge for all nodes
         # *existence of at least one violation node and at least one input node
+        violation_node = next((node for identifier, node in self.violation_nodes), None)
         if backward:
-            if not begin:
-                begin = [node for identifier, node in self.violation_nodes][0]['in'][0]
+            if not begin and violation_node is not None:
+                begin = self._edge(self._first_in[violation_node])
             if not end:
-                end = self.entry_node['out'][0]
+                end = self._edge(self._first_out[self.entry_node])
             getter = self.previous_edge
         else:
             if not begin:
-                begin = self.entry_node['out'][0]
-            if not end:
-                end = [node for identifier, node in self.violation_nodes][0]['in'][0]
+                begin = self._edge(self._first_out[self.entry_node])
+            if not end and violation_node is not None:
+                end = self._edge(self._first_in[violation_node])
             getter = self.next_edge
 
+        # There is nothing to iterate over
+        if not begin:
+            return
+
         current = None
         while True:
             if not current:
@@ -463,33 +536,26 @@ class ErrorTrace:
                     yield current
 
     def insert_edge_and_target_node(self, edge, after=True):
-        new_edge = {
-            'target node': None,
-            'source node': None,
-            'file': 0
-        }
-        new_node = self.add_node(int(len(self._nodes)))
+        new_node = self.add_node(int(len(self._node_ids)))
 
         if after:
-            edge['target node']['in'].remove(edge)
-            edge['target node']['in'].append(new_edge)
-            new_edge['target node'] = edge['target node']
-            edge['target node'] = new_node
-            new_node['in'] = [edge]
-            new_node['out'] = [new_edge]
-            new_edge['source node'] = new_node
+            target = self._targets[edge.id]
+            self._unlink(self._first_in, self._next_in, target, edge.id)
+            self._targets[edge.id] = new_node
+            self._link(self._first_in, self._next_in, new_node, edge.id)
+            new_edge = self._add_edge(new_node, target)
         else:
-            edge['source node']['out'].remove(edge)
-            edge['source node']['out'].append(new_edge)
-            new_edge['source node'] = edge['source node']
-            edge['source node'] = new_node
-            new_node['out'] = [edge]
-            new_node['in'] = [new_edge]
-            new_edge['target node'] = new_node
-
-        if 'thread' in new_edge['target node']['out'][0]:
+            source = self._sources[edge.id]
+            self._unlink(self._first_out, self._next_out, source, edge.id)
+            self._sources[edge.id] = new_node
+            self._link(self._first_out, self._next_out, new_node, edge.id)
+            new_edge = self._add_edge(source, new_node)
+        new_edge['file'] = 0
+
+        next_edge = self.next_edge(new_edge)
+        if next_edge and 'thread' in next_edge:
             # Keep already set thread identifiers
-            new_edge['thread'] = new_edge['target node']['out'][0]['thread']
+            new_edge['thread'] = next_edge['thread']
 
         return new_edge
 
@@ -502,54 +568,77 @@ class ErrorTrace:
         if self.is_warning(edge):
             raise ValueError('Cannot delete edge with warning: {!r}'.format(edge['source']))
 
-        source = edge['source node']
-        target = edge['target node']
+        source = self._sources[edge.id]
+        target = self._targets[edge.id]
 
         # Make source node violation node if target node is violation node.
-        for i, v in self.violation_nodes:
-            if id(target) == id(v):
-                if len(source['out']) > 1:
-                    raise ValueError('Is not allowed to delete violation nodes')
-                self.remove_violation_node_id(i)
-                is_replaced = False
-                for j, u in self._nodes.items():
-                    if id(source) == id(u):
-                        self.add_violation_node_id(j)
-                        is_replaced = True
-                        break
-                if not is_replaced:
-                    raise RuntimeError('Cannot add new violation node')
-                break
-
-        source['out'].remove(edge)
-        target['in'].remove(edge)
-
-        for out_edge in target['out']:
-            out_edge['source node'] = source
-            source['out'].append(out_edge)
-
-        del target
+        target_id = self._node_ids[target]
+        if target_id in self._violation_node_ids:
+            if self._next_out[self._first_out[source]] != -1:
+                raise ValueError('Is not allowed to delete violation nodes')
+            self.remove_violation_node_id(target_id)
+            self.add_violation_node_id(self._node_ids[source])
+
+        self._unlink(self._first_out, self._next_out, source, edge.id)
+        self._unlink(self._first_in, self._next_in, target, edge.id)
+        # Do not keep data of removed edges, their slots are dropped at compaction
+        self._edges[edge.id] = None
+
+        # Move all output edges of the target node to the source one. The removed edge still leads to them, so, one can
+        # continue iteration from it.
+        out_edge_id = self._first_out[target]
+        if out_edge_id != -1:
+            self._link(self._first_out, self._next_out, source, out_edge_id)
+            while out_edge_id != -1:
+                self._sources[out_edge_id] = source
+                out_edge_id = self._next_out[out_edge_id]
 
     def remove_non_referred_files(self, referred_file_ids):
         for file_id in range(len(self._files)):
             if file_id not in referred_file_ids:
                 # This is not a complete removing. But error traces will not hold absolute paths of files that are not
                 # referred by witness.
+                self._file_ids.pop(self._files[file_id], None)
                 self._files[file_id] = ''
 
-    @staticmethod
-    def next_edge(edge):
-        if len(edge['target node']['out']) > 0:
-            return edge['target node']['out'][0]
-        else:
-            return None
+    def compact(self):
+        # Drop slots of removed edges and nodes that are not connected with remaining edges anymore. Remaining nodes
+        # and edges are renumbered in the same order, edges get new identifiers but keep their data.
+        edges = [edge for edge in self._edges if edge is not None]
+        if len(edges) == len(self._edges):
+            return
 
-    @staticmethod
-    def previous_edge(edge):
-        if len(edge['source node']['in']) > 0:
-            return edge['source node']['in'][0]
-        else:
-            return None
+        nodes = set(self._sources[edge.id] for edge in edges) | set(self._targets[edge.id] for edge in edges)
+        nodes.update(node for identifier, node in self.violation_nodes)
+        if self._entry_node_id:
+            nodes.add(self.entry_node)
+        nodes = sorted(nodes)
+        node_numbers = {node: number for number, node in enumerate(nodes)}
+        edge_numbers = {edge.id: number for number, edge in enumerate(edges)}
+
+        def edge_number(edge_id):
+            return edge_numbers.get(edge_id, -1)
+
+        self._first_in = array.array('q', (edge_number(self._first_in[node]) for node in nodes))
+        self._first_out = array.array('q', (edge_number(self._first_out[node]) for node in nodes))
+        self._sources = array.array('q', (node_numbers[self._sources[edge.id]] for edge in edges))
+        self._targets = array.array('q', (node_numbers[self._targets[edge.id]] for edge in edges))
+        self._next_in = array.array('q', (edge_number(self._next_in[edge.id]) for edge in edges))
+        self._next_out = array.array('q', (edge_number(self._next_out[edge.id]) for edge in edges))
+        self._node_ids = [self._node_ids[node] for node in nodes]
+        self._node_numbers = {node_id: number for number, node_id in enumerate(self._node_ids)}
+        for number, edge in enumerate(edges):
+            edge.id = number
+        self._edges = edges
+
+    def _edge(self, edge_id):
+        return self._edges[edge_id] if edge_id != -1 else None
+
+    def next_edge(self, edge):
+        return self._edge(self._first_out[self._targets[edge.id]])
+
+    def previous_edge(self, edge):
+        return self._edge(self._first_in[self._sources[edge.id]])
 
     def find_violation_path(self):
         self._find_violation_path()
@@ -573,7 +662,7 @@ class ErrorTrace:
                     continue
 
             # Everything else comprises violation path.
-            self._violation_edges.insert(0, edge)
+            self._violation_edges.appendleft(edge)
 
     def parse_model_comments(self):
         self._logger.info('Parse model comments from source files referred by witness')
@@ -775,7 +864,8 @@ class ErrorTrace:
         # * todo: unexpected file changes
         self._logger.info("Perform sanity checks of the error trace")
         for edge in self.trace_iterator():
-            if len(edge['target node']['out']) > 1:
+            first_out = self._first_out[self._targets[edge.id]]
+            if first_out != -1 and self._next_out[first_out] != -1:
                 raise ValueError('Witness contains branching which is not supported')
 
     def final_checks(self):
@@ -0,0 +1,78 @@
+#
+# Copyright (c) 2021 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import logging
+import tracemalloc
+
+from klever.core.vrp.et.error_trace import ErrorTrace
+
+EDGES_NUM = 10000
+
+
+def make_trace(edges_num):
+    trace = ErrorTrace(logging.getLogger())
+    for node in range(edges_num + 1):
+        trace.add_node('N{}'.format(node))
+    trace.add_entry_node_id('N0')
+    trace.add_violation_node_id('N{}'.format(edges_num))
+    for node in range(edges_num):
+        edge = trace.add_edge('N{}'.format(node), 'N{}'.format(node + 1))
+        edge['line'] = node
+        edge['source'] = 'x = {};'.format(node) * 10
+    return trace
+
+
+def test_iteration():
+    trace = make_trace(10)
+    assert [edge['line'] for edge in trace.trace_iterator()] == list(range(10))
+    assert [edge['line'] for edge in trace.trace_iterator(backward=True)] == list(reversed(range(10)))
+
+
+def test_empty_trace():
+    trace = ErrorTrace(logging.getLogger())
+    trace.add_node('N0')
+    trace.add_entry_node_id('N0')
+    assert list(trace.trace_iterator()) == []
+    assert list(trace.trace_iterator(backward=True)) == []
+
+
+def test_compaction():
+    tracemalloc.start()
+    try:
+        trace = make_trace(EDGES_NUM)
+        full_size = tracemalloc.get_traced_memory()[0]
+
+        # Remove edges while iterating as transformations do
+        for edge in trace.trace_iterator():
+            if edge['line'] % 2:
+                trace.remove_edge_and_target_node(edge)
+        del edge
+        remaining = [edge['line'] for edge in trace.trace_iterator()]
+        assert remaining == list(range(0, EDGES_NUM, 2))
+
+        trace.compact()
+        assert len(trace._edges) == len(remaining)
+        assert len(trace._node_ids) == len(trace._first_in) == len(trace._first_out) == len(remaining) + 1
+        assert len(trace._sources) == len(trace._targets) == len(trace._next_in) == len(remaining)
+        assert [edge.id for edge in trace.trace_iterator()] == list(range(len(remaining)))
+        assert [edge['line'] for edge in trace.trace_iterator()] == remaining
+        assert [edge['line'] for edge in trace.trace_iterator(backward=True)] == list(reversed(remaining))
+
+        # Data of removed edges is released
+        assert tracemalloc.get_traced_memory()[0] < full_size * 0.75
+    finally:
+        tracemalloc.stop()
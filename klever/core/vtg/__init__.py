@@ -856,7 +856,9 @@ class PLUGINS(VTGW):
             out_abstract_task_desc_file = '{0} abstract task.json'.format(plugin_desc['name'].lower())
             plugin_desc.get('options', {}).update({
                 'solution class': self.task.rule,
-                'override resource limits': self.resource_limits
+                'override resource limits': self.resource_limits,
+                'program fragment': self.task.fragment,
+                'environment model attributes': dict(self.task.envattrs or ())
             })
 
             try:
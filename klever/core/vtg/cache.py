@@ -0,0 +1,217 @@
+#
+# Copyright (c) 2019 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import contextlib
+import fcntl
+import functools
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import klever.core.utils
+
+# Default limit for the total size of cached results.
+DEFAULT_CACHE_SIZE = 4 * 1024 ** 3
+# Part of the limit to which the cache is shrunk by eviction, so that entries are not scanned after each publishing.
+EVICTION_RATIO = 0.9
+
+
+@functools.lru_cache()
+def get_exec_checksum(exec_name):
+    # Checksum of the executable distinguishes different versions of tools reliably and does not require running them.
+    exec_path = shutil.which(exec_name)
+    if not exec_path:
+        return None
+    return klever.core.utils.get_file_checksum(exec_path)
+
+
+def get_dir_size(path):
+    size = 0
+    for root, dirs, files in os.walk(path):
+        for file in files:
+            size += os.path.getsize(os.path.join(root, file))
+    return size
+
+
+class ResultsCache:
+    """
+    Content-addressed cache of results of heavy tools, e.g. CIF or CIL, shared by all verification tasks.
+
+    Entries are published atomically by renaming completely filled temporary directories, so interrupted workers can
+    not leave broken entries. When the total size of entries exceeds the limit, least recently used ones are evicted.
+    """
+
+    SIZE_FILE = 'size'
+    TOTAL_SIZE_FILE = 'total size'
+
+    def __init__(self, logger, cache_dir, size_limit=DEFAULT_CACHE_SIZE):
+        self.logger = logger
+        self.cache_dir = cache_dir
+        self.size_limit = size_limit
+        self.tmp_dir = os.path.join(self.cache_dir, 'tmp')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    @staticmethod
+    def get_key(*parts):
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _get_entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        # Workers that need the same entry wait for the one that is filling it rather than do the same job.
+        entry = self._get_entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        lock_file = entry + '.lock'
+        while True:
+            fd = os.open(lock_file, os.O_RDWR | os.O_CREAT)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            # The previous holder removes the lock file on exit, so the lock can be obtained for the removed file.
+            try:
+                if os.fstat(fd).st_ino == os.stat(lock_file).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+
+        try:
+            yield
+        finally:
+            # Remove the lock file while holding the lock to not leave lock files for all entries ever used.
+            os.remove(lock_file)
+            os.close(fd)
+
+    def get(self, key):
+        entry = self._get_entry_path(key)
+        if not os.path.isdir(entry):
+            return None
+
+        try:
+            # Remember the last usage for LRU eviction.
+            os.utime(entry)
+        except OSError:
+            # The entry was evicted just now.
+            return None
+
+        return entry
+
+    def materialize(self, entry, name, dest):
+        # Hard links are the cheapest way to put files into the task directory and they remain valid even when entries
+        # are evicted. Copy files when cache is placed on another file system.
+        tmp_dest = '{0}.{1}'.format(dest, uuid.uuid4().hex)
+        try:
+            try:
+                os.link(os.path.join(entry, name), tmp_dest)
+            except OSError:
+                shutil.copy(os.path.join(entry, name), tmp_dest)
+            # Replace destination atomically since it can be already created to reserve its name.
+            os.replace(tmp_dest, dest)
+        except OSError as e:
+            # The entry could be evicted just now.
+            self.logger.warning('Could not get "{0}" from cache: {1}'.format(name, e))
+            return False
+
+        return True
+
+    def publish(self, key, files):
+        tmp_entry = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        os.makedirs(tmp_entry)
+        for name, path in files.items():
+            if os.path.isdir(path):
+                shutil.copytree(path, os.path.join(tmp_entry, name))
+            else:
+                shutil.copy(path, os.path.join(tmp_entry, name))
+
+        size = get_dir_size(tmp_entry)
+        with open(os.path.join(tmp_entry, self.SIZE_FILE), 'w', encoding='utf-8') as fp:
+            fp.write(str(size))
+
+        try:
+            os.rename(tmp_entry, self._get_entry_path(key))
+        except OSError:
+            # Somebody has already published the same entry.
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return
+
+        self.__add_size(size)
+
+    def __add_size(self, size):
+        # Keep the total size of entries up to date to not scan the whole cache after each publishing.
+        with klever.core.utils.LockedOpen(os.path.join(self.cache_dir, self.TOTAL_SIZE_FILE), 'a+',
+                                          encoding='utf-8') as fp:
+            fp.seek(0)
+            try:
+                total_size = int(fp.read()) + size
+            except ValueError:
+                # There is no total size yet.
+                total_size = None
+
+            if total_size is None or total_size > self.size_limit:
+                total_size = self.__evict()
+
+            fp.seek(0)
+            fp.truncate()
+            fp.write(str(total_size))
+
+    def __evict(self):
+        entries = []
+        total_size = 0
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if len(prefix) != 2 or not os.path.isdir(prefix_dir):
+                continue
+
+            for name in os.listdir(prefix_dir):
+                entry = os.path.join(prefix_dir, name)
+                if not os.path.isdir(entry):
+                    continue
+
+                try:
+                    with open(os.path.join(entry, self.SIZE_FILE), encoding='utf-8') as fp:
+                        size = int(fp.read())
+                    entries.append((os.stat(entry).st_mtime, size, entry))
+                except (OSError, ValueError):
+                    continue
+
+                total_size += size
+
+        if total_size <= self.size_limit:
+            return total_size
+
+        for _, size, entry in sorted(entries):
+            if total_size <= self.size_limit * EVICTION_RATIO:
+                break
+
+            # Do not evict entries that are used at the moment.
+            if os.path.exists(entry + '.lock'):
+                continue
+
+            # Move the entry away at first to not let others to get partially removed one.
+            trash = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+            try:
+                os.rename(entry, trash)
+            except OSError:
+                continue
+
+            self.logger.debug('Evict "{0}" from cache'.format(os.path.basename(entry)))
+            shutil.rmtree(trash, ignore_errors=True)
+            total_size -= size
+
+        return total_size
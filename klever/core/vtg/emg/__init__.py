@@ -15,10 +15,13 @@
 # limitations under the License.
 #
 
-import copy
+import os
 import json
+import collections
+import multiprocessing
 
-from klever.core.utils import report, report_image
+import klever.core.components
+from klever.core.utils import report, report_image, get_parallel_threads_num
 from klever.core.vtg.plugins import Plugin
 from klever.core.vtg.emg.common import get_or_die
 from klever.core.vtg.emg.generators import generate_processes
@@ -26,6 +29,7 @@ from klever.core.vtg.emg.common.process import ProcessCollection
 from klever.core.vtg.emg.translation import translate_intermediate_model
 from klever.core.vtg.emg.decomposition import decompose_intermediate_model
 from klever.core.vtg.emg.common.c.source import create_source_representation
+from klever.core.vtg.emg.common.c.types.typeParser import setup_parser, parse_statistics
 
 
 class EMG(Plugin):
@@ -47,6 +51,8 @@ class EMG(Plugin):
         self.logger.info("Start environment model generator {!r}".format(self.id))
 
         # Initialization of EMG
+        if 'cache directory' in self.conf:
+            setup_parser(os.path.join(self.conf['cache directory'], 'emg'))
         self.logger.info("Import results of source analysis")
         sa = create_source_representation(self.logger, self.conf, self.abstract_task_desc)
 
@@ -67,16 +73,20 @@ class EMG(Plugin):
             "UDEMSes": {}
         }
         images = []
-        for number, model in enumerate(decompose_intermediate_model(self.logger, self.conf, collection)):
-            model.name = str(number)
-            if model.attributed_name in used_attributed_names:
-                raise ValueError(f"The model with name '{model.attributed_name}' has been already been generated")
-            else:
-                used_attributed_names.add(model.attributed_name)
-            new_description = translate_intermediate_model(self.logger, self.conf,
-                                                           copy.deepcopy(abstract_task), sa,
-                                                           model, data_report["UDEMSes"], program_fragment, images)
 
+        def models():
+            for number, model in enumerate(decompose_intermediate_model(self.logger, self.conf, collection)):
+                model.name = str(number)
+                if model.attributed_name in used_attributed_names:
+                    raise ValueError(f"The model with name '{model.attributed_name}' has been already been generated")
+                else:
+                    used_attributed_names.add(model.attributed_name)
+                yield model
+
+        for model, (new_description, udems, model_images) in \
+                self._translate_models(models(), abstract_task, sa, program_fragment):
+            data_report["UDEMSes"][model.name] = udems
+            images.extend(model_images)
             new_description["environment model attributes"] = model.attributes
             new_description["environment model pathname"] = model.name
             data_report["envmodel_attrs"][model.name] = json.dumps(model.attributes, ensure_ascii=True, sort_keys=True,
@@ -87,6 +97,8 @@ class EMG(Plugin):
         if len(self.abstract_task_desc) == 0:
             raise ValueError('There is no generated environment models')
 
+        data_report["declarations"] = parse_statistics()
+
         self.logger.info("Send data report to the server")
         report(self.logger, 'patch', {'identifier': self.id, 'data': data_report}, self.mqs['report files'],
                self.vals['report id'], get_or_die(self.conf, "main working directory"))
@@ -100,3 +112,100 @@ class EMG(Plugin):
                              self.mqs['report files'], self.vals['report id'], self.conf['main working directory'])
 
     main = generate_environment
+
+    def _translate_models(self, models, abstract_task, source, program_fragment):
+        """
+        Translate models in the given order. If several translation workers are allowed, models are translated in
+        parallel by child processes that share the source and the type collection with the plugin. Models are taken
+        from the iterator just when there is a free worker, so no more models are kept in memory than workers run.
+
+        :param models: Iterator over ProcessCollection objects.
+        :param abstract_task: Abstract verification task dictionary.
+        :param source: Source object.
+        :param program_fragment: Name of program fragment.
+        :return: Iterator over pairs of models and translation results.
+        """
+        # Configurations prepared by older Bridge versions do not specify translation parallelism
+        if 'Environment models translation' in self.conf.get('parallelism', {}):
+            workers_num = get_parallel_threads_num(self.logger, self.conf, 'Environment models translation')
+        else:
+            workers_num = 1
+
+        if workers_num == 1:
+            for model in models:
+                yield model, translate_model(self.logger, self.conf, abstract_task, source, model, program_fragment)
+            return
+
+        self.logger.info(f"Translate models by {workers_num} workers")
+        # Here workers will put their results, namely, descriptions of tasks, UDEMSes and images.
+        manager = multiprocessing.Manager()
+        # Started workers in the order of models
+        workers = collections.deque()
+        try:
+            vals = {'translations': manager.dict()}
+
+            def wait_translation():
+                # Results are returned in the order of models, so wait for the earliest worker
+                model, worker = workers[0]
+                worker.join()
+                workers.popleft()
+                return model, vals['translations'].pop(model.name)
+
+            for model in models:
+                if len(workers) == workers_num:
+                    yield wait_translation()
+                worker = TranslationWorker(self.conf, self.logger, self.id, self.callbacks, self.mqs, vals,
+                                           id=model.name, separate_from_parent=False, include_child_resources=False,
+                                           abstract_task=abstract_task, source=source, model=model,
+                                           program_fragment=program_fragment)
+                worker.start()
+                workers.append((model, worker))
+
+            while workers:
+                yield wait_translation()
+        finally:
+            for model, worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                    worker.join(stopped=True)
+            manager.shutdown()
+
+
+class TranslationWorker(klever.core.components.Component):
+    def __init__(self, conf, logger, parent_id, callbacks, mqs, vals, id=None, work_dir=None, attrs=None,
+                 separate_from_parent=False, include_child_resources=False, abstract_task=None, source=None,
+                 model=None, program_fragment=None):
+        super(TranslationWorker, self).__init__(conf, logger, parent_id, callbacks, mqs, vals, id, work_dir, attrs,
+                                                separate_from_parent, include_child_resources)
+
+        self.name += id
+
+        self.abstract_task = abstract_task
+        self.source = source
+        self.model = model
+        self.program_fragment = program_fragment
+
+    def translate(self):
+        self.vals['translations'][self.model.name] = translate_model(self.logger, self.conf, self.abstract_task,
+                                                                     self.source, self.model, self.program_fragment)
+
+    main = translate
+
+
+def translate_model(logger, conf, abstract_task, source, model, program_fragment):
+    """
+    Translate the model to C code.
+
+    :param logger: Logger object.
+    :param conf: Configuration dictionary of EMG.
+    :param abstract_task: Abstract verification task dictionary.
+    :param source: Source object.
+    :param model: ProcessCollection object.
+    :param program_fragment: Name of program fragment.
+    :return: Task description, UDEMS and list of images of the model.
+    """
+    udemses = dict()
+    images = list()
+    description = translate_intermediate_model(logger, conf, abstract_task, source, model, udemses, program_fragment,
+                                               images)
+    return description, udemses[model.name], images
@@ -16,6 +16,7 @@
 #
 
 from klever.core.vtg.emg.common.c.types import import_declaration
+from klever.core.vtg.emg.common.c.types.typeParser import parse_declaration, parse_statistics, setup_parser
 
 
 def parser_test(method):
@@ -264,3 +265,25 @@ def test_mess_declarations():
     return [
         'void (*((*a)(int, ...)) []) (void) []'
     ]
+
+
+def test_memoized_declarations():
+    ast = parse_declaration('int (*open)(struct inode *, struct file *)')
+    ast['declarator'].pop()
+
+    # Changes of the given abstract syntax tree do not affect later results for the same declaration
+    assert parse_declaration('int  (*open)(struct inode *,\n struct file *)') == \
+        parse_declaration('int (*open)(struct inode *, struct file *)')
+    assert parse_declaration('int (*open)(struct inode *, struct file *)')['declarator']
+    assert parse_statistics()['reused'] >= 2
+
+
+def test_parsing_tables(tmp_path):
+    setup_parser(str(tmp_path))
+    tables = list(tmp_path.iterdir())
+    assert len(tables) == 1
+
+    # Stored tables are used at the next setup
+    setup_parser(str(tmp_path))
+    assert list(tmp_path.iterdir()) == tables
+    assert import_declaration('size_t *x(size_t *)')
@@ -15,7 +15,11 @@
 # limitations under the License.
 #
 
+import os
 import re
+import pickle
+import hashlib
+import functools
 import sortedcontainers
 import ply.lex as lex
 import ply.yacc as yacc
@@ -23,6 +27,10 @@ import ply.yacc as yacc
 __parser = None
 __lexer = None
 
+# Pickled abstract syntax trees of declarations that were parsed in advance, e.g. ones from specifications
+__preparsed = dict()
+__preparsed_hits = 0
+
 tokens = (
     'STRING',
     'ATTRIBUTE',
@@ -786,17 +794,59 @@ def direct_declarator_processing(p):
     p[0] = declarator
 
 
-def setup_parser():
+def setup_parser(tables_dir=None):
     """
     Setup the parser.
 
+    :param tables_dir: Directory to keep parsing tables between runs. If it is not given tables are generated each time.
     :return: None
     """
     global __parser
     global __lexer
 
     __lexer = lex.lex()
-    __parser = yacc.yacc(debug=0, write_tables=0)
+    if tables_dir:
+        __parser = _load_parser(tables_dir)
+    else:
+        __parser = yacc.yacc(debug=0, write_tables=0)
+
+
+def grammar_checksum():
+    """
+    Get checksum of the grammar that changes when abstract syntax trees for the same declarations may change.
+
+    :return: Checksum string.
+    """
+    grammar = [yacc.__tabversion__, ' '.join(tokens)]
+    grammar.extend(func.__doc__ for name, func in sorted(globals().items())
+                   if name.startswith('p_') and callable(func) and func.__doc__)
+    return hashlib.sha256('\n'.join(grammar).encode('utf-8')).hexdigest()[:32]
+
+
+def _load_parser(tables_dir):
+    # Tables are stored per grammar, so changed grammars never get outdated tables
+    tables_file = os.path.join(tables_dir, 'typeParser-{}.pickle'.format(grammar_checksum()))
+    if os.path.isfile(tables_file):
+        try:
+            return yacc.yacc(debug=0, write_tables=0, picklefile=tables_file)
+        except Exception:
+            # Regenerate broken tables below
+            pass
+
+    # Several workers can generate tables simultaneously, so each of them writes its own file and replaces the common
+    # one atomically
+    os.makedirs(tables_dir, exist_ok=True)
+    new_tables_file = '{}.{}.tmp'.format(tables_file, os.getpid())
+    parser = yacc.yacc(debug=0, write_tables=1, picklefile=new_tables_file)
+    if os.path.isfile(new_tables_file):
+        os.replace(new_tables_file, tables_file)
+    return parser
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_pickled(string):
+    # Results are modified by callers, so keep them pickled and give each caller its own copy
+    return pickle.dumps(__parser.parse(string, lexer=__lexer), pickle.HIGHEST_PROTOCOL)
 
 
 def parse_declaration(string):
@@ -806,10 +856,60 @@ def parse_declaration(string):
     :param string: C declaration string.
     :return: Obtained abstract syntax tree.
     """
-    global __parser
-    global __lexer
+    global __preparsed_hits
+
+    string = _normalize_declaration(string)
+    if string in __preparsed:
+        __preparsed_hits += 1
+        return pickle.loads(__preparsed[string])
+
+    if not __parser:
+        setup_parser()
 
+    return pickle.loads(_parse_pickled(string))
+
+
+def preparse_declarations(declarations):
+    """
+    Parse declarations in advance to store results and to load them by load_declarations() later.
+
+    :param declarations: Iterable with C declaration strings.
+    :return: Dictionary with pickled abstract syntax trees of declarations that can be parsed.
+    """
     if not __parser:
         setup_parser()
 
-    return __parser.parse(string, lexer=__lexer)
+    parsed = dict()
+    for string in declarations:
+        string = _normalize_declaration(string)
+        try:
+            parsed[string] = _parse_pickled(string)
+        except Exception:
+            # Such declarations are reported at their import as usual
+            continue
+    return parsed
+
+
+def load_declarations(parsed):
+    """
+    Use abstract syntax trees of declarations parsed by preparse_declarations().
+
+    :param parsed: Dictionary with pickled abstract syntax trees.
+    :return: None
+    """
+    __preparsed.update(parsed)
+
+
+def parse_statistics():
+    """
+    Get numbers of parsed declarations for reporting.
+
+    :return: Dictionary with numbers of parsed and reused abstract syntax trees.
+    """
+    info = _parse_pickled.cache_info()
+    return {'parsed': info.misses, 'reused': info.hits + __preparsed_hits}
+
+
+def _normalize_declaration(string):
+    # Whitespaces just separate tokens, so declarations that differ in them only have the same abstract syntax tree
+    return re.sub(r'[ \t\n]+', ' ', string).strip()
@@ -80,11 +80,12 @@ class Process:
         else:
             return False
 
-    def clone(self):
+    def clone(self, actions=None):
         """
         Copy the instance and return a new one. The copy method is recursive, to get a shallow copy use the copy.copy
         method.
 
+        :param actions: Actions object to share with the copy instead of cloning actions of the process.
         :return: Process.
         """
         inst = copy.copy(self)
@@ -96,7 +97,7 @@ class Process:
             else:
                 setattr(inst, att, val)
 
-        inst.actions = self.actions.clone()
+        inst.actions = self.actions.clone() if actions is None else actions
 
         # Change declarations and definition keys
         for collection in (self.declarations, self.definitions):
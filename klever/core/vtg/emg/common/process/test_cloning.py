@@ -74,3 +74,10 @@ def test_clone_behaviours(process, clone):
     assert clone.actions['d']
     assert clone.actions.behaviour('d').pop()
     assert len(clone.actions.behaviour('d').pop().my_operator) == len(operator) + 1
+
+
+def test_shared_actions(process):
+    clone = process.clone(process.actions)
+    assert clone.actions is process.actions
+    assert clone.labels['l1'] is not process.labels['l1']
+    assert set(clone.accesses()) == set(process.accesses())
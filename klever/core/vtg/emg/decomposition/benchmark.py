@@ -0,0 +1,111 @@
+#
+# Copyright (c) 2021 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Measure time and peak memory of generating environment models by the combinatorial and savepoints factories.
+
+Run it as "python -m klever.core.vtg.emg.decomposition.benchmark". For each test model and factory it generates the
+given numbers of models (0 means all models) from scratch and reports the best time of several runs and the peak
+memory allocated by Python in a separate run, so that tracing does not affect time.
+"""
+
+import argparse
+import itertools
+import logging
+import time
+import tracemalloc
+
+from klever.core.vtg.emg.decomposition import decompose_intermediate_model
+import klever.core.vtg.emg.decomposition.modelfactory.decomposition_models as test_models
+
+# Configurations of factories and test models they can decompose
+FACTORIES = {
+    'combinatorial': (
+        {
+            'single environment model per fragment': False,
+            'scenario separation': 'linear',
+            'select scenarios': 'use all scenarios combinations'
+        },
+        ('driver_model', 'driver_double_init', 'driver_double_init_with_deps', 'fs_model', 'fs_with_unique_process',
+         'fs_savepoint_deps', 'fs_simplified')
+    ),
+    'savepoints': (
+        {
+            'single environment model per fragment': False,
+            'scenario separation': 'savepoint_requirements',
+            'select scenarios': 'select savepoints'
+        },
+        ('driver_double_init_with_deps', 'fs_savepoint_deps', 'fs_savepoint_init_deps')
+    )
+}
+MODELS = sorted({model for _, models in FACTORIES.values() for model in models})
+
+
+def generate(logger, factory, model_name, models_num):
+    # Parse the model each time since factories and strategies can change it
+    model = getattr(test_models, model_name)()
+    models = decompose_intermediate_model(logger, dict(FACTORIES[factory][0]), model)
+    return sum(1 for _ in itertools.islice(models, models_num or None))
+
+
+def measure(logger, factory, model_name, models_num, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        generated = generate(logger, factory, model_name, models_num)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        generate(logger, factory, model_name, models_num)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return generated, min(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure generation of environment models by model factories.')
+    parser.add_argument('--factories', nargs='+', choices=list(FACTORIES), default=list(FACTORIES))
+    parser.add_argument('--models', nargs='+', choices=MODELS, default=MODELS,
+                        help='Test models to decompose, each factory gets only ones it supports.')
+    parser.add_argument('--numbers', nargs='+', type=int, default=[1, 5, 10, 0],
+                        help='Numbers of models to generate, 0 means all models.')
+    parser.add_argument('--repeats', type=int, default=3, help='Number of runs to choose the best time.')
+    args = parser.parse_args()
+
+    logger = logging.getLogger('benchmark')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    print('{:<15} {:<30} {:>9} {:>10} {:>10}'.format('factory', 'model', 'models', 'time, s', 'peak, MB'))
+    for factory in args.factories:
+        for model_name in (m for m in FACTORIES[factory][1] if m in args.models):
+            previous = None
+            for models_num in args.numbers:
+                generated, duration, peak = measure(logger, factory, model_name, models_num, args.repeats)
+                # Do not repeat measurements when there are fewer models than requested
+                if generated == previous:
+                    continue
+                previous = generated
+                print('{:<15} {:<30} {:>9} {:>10.3f} {:>10.1f}'.format(factory, model_name, generated, duration,
+                                                                      peak / 1024 ** 2))
+
+
+if __name__ == '__main__':
+    main()
@@ -146,7 +146,15 @@ class ModelFactory:
 
     def _factory_iterator(self, processes_to_scenarios: dict, model: ProcessCollection):
         selector = self.strategy(self.logger, self.conf, processes_to_scenarios, model)
+        signatures = set()
         for batch, related_process in selector():
+            # The same scenarios give the same model, so do not clone processes for them again
+            signature = self._batch_signature(batch, related_process, model)
+            if signature in signatures:
+                self.logger.info("Skip batch {!r} with already processed scenarios".format(batch.attributed_name))
+                continue
+            signatures.add(signature)
+
             new = ProcessCollection(batch.name)
             new.attributes = copy.deepcopy(batch.attributes)
             original_name = batch.attributed_name
@@ -217,6 +225,26 @@ class ModelFactory:
             else:
                 self.logger.debug(f"Obtained model '{new.attributed_name}' is inconsistent")
 
+    @staticmethod
+    def _batch_signature(batch, related_process, model):
+        """
+        Get a key that is the same for batches with the same scenarios of processes. Scenarios are compared as objects
+        and the key refers to them, so they can not be confused with other ones.
+
+        :param batch: ScenarioCollection.
+        :param related_process: Name of the process with a savepoint or None.
+        :param model: ProcessCollection.
+        :return: Tuple.
+        """
+        return (
+            related_process,
+            batch.entry,
+            tuple((name, batch.models.get(name)) for name in sorted(model.models)),
+            # Processes that are missing in the batch are skipped in the model
+            tuple((name, batch.environment[name]) if name in batch.environment else (name, 'Removed')
+                  for name in sorted(model.environment))
+        )
+
     def _cached_yield(self, model_iterator):
         model_cache = set()
         for model in model_iterator:
@@ -228,18 +256,17 @@ class ModelFactory:
                 continue
 
     def _process_copy(self, process: Process):
-        clone = process.clone()
+        # Actions of processes are not changed in models, so share them with the original model
+        clone = process.clone(process.actions)
         return clone
 
     def _process_from_scenario(self, scenario: Scenario, process: Process):
-        new_process = process.clone()
+        # Scenarios are shared by models, so clone actions only if the savepoint is going to be inserted
+        new_process = process.clone(scenario.actions.clone() if scenario.savepoint else scenario.actions)
 
         if len(list(process.labels.keys())) != 0 and len(list(new_process.labels.keys())) == 0:
             assert False, str(new_process)
 
-        new_process.actions = scenario.actions
-        new_process.accesses(refresh=True)
-
         if scenario.savepoint:
             self.logger.debug(f"Replace the first action in the process '{str(process)}' by the savepoint"
                               f" '{str(scenario.savepoint)}'")
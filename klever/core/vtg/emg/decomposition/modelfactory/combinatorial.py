@@ -30,26 +30,39 @@ class CombinatorialSelector(Selector):
             if iterate_over_processes:
                 self.logger.info(f"Create copies of '{new.attributed_name}' for processes:"
                                  f" {', '.join(iterate_over_processes)}")
-                pool = []
-                for process_name in iterate_over_processes:
-                    for new_model in (list(pool) if pool else [new]):
-                        for scenario in (s for s in self.processes_to_scenarios[process_name] if not s.savepoint):
-                            newest = new_model.clone(new_model.name)
-                            self._assign_scenario(newest, scenario, process_name)
-                            self.logger.info(f"Add a new model '{newest.attributed_name}' from model"
-                                             f" '{new_model.attributed_name}' and scenario '{scenario.name}'")
-                            self._assign_scenario(newest, scenario, process_name)
-                            pool.append(newest)
-
-                for new_model in pool:
-                    self.logger.debug(f"Generate model '{new_model.name}'" +
+                for combination in self._combinations(iterate_over_processes):
+                    newest = new.clone(new.name)
+                    for process_name, scenario in combination:
+                        self._assign_scenario(newest, scenario, process_name)
+                    self.logger.info(f"Add a new model '{newest.attributed_name}' from model"
+                                     f" '{new.attributed_name}'")
+                    self.logger.debug(f"Generate model '{newest.name}'" +
                                       (f" for related_process '{related_process}'" if related_process else ''))
-                    yield new_model, related_process
+                    yield newest, related_process
             else:
                 self.logger.info(
                     f"No processes with scenarios without savepoints were selected for model '{new.attributed_name}'")
                 yield new, related_process
 
+    def _combinations(self, processes):
+        """
+        Iterate over combinations of scenarios without savepoints. Each combination has a scenario for the first process
+        and either a scenario or nothing for each next one. Combinations are generated lazily, so only the current one
+        is kept in memory.
+
+        :param processes: List of process names.
+        :return: Iterator over tuples of pairs of process names and scenarios.
+        """
+        if not processes:
+            return
+
+        *previous, process_name = processes
+        scenarios = [s for s in self.processes_to_scenarios[process_name] if not s.savepoint]
+        yield from self._combinations(previous)
+        for combination in (self._combinations(previous) if previous else [()]):
+            for scenario in scenarios:
+                yield combination + ((process_name, scenario),)
+
 
 class CombinatorialFactory(ModelFactory):
 
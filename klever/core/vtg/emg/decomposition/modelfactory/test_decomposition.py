@@ -21,8 +21,10 @@ import logging
 from klever.core.vtg.emg.decomposition.modelfactory import ModelFactory
 from klever.core.vtg.emg.decomposition.separation.reqs import ReqsStrategy
 from klever.core.vtg.emg.decomposition.separation import SeparationStrategy
+from klever.core.vtg.emg.decomposition.separation.linear import LinearStrategy
 from klever.core.vtg.emg.common.process.model_for_testing import model_preset
 from klever.core.vtg.emg.decomposition.modelfactory.savepoints import SavepointsFactory
+from klever.core.vtg.emg.decomposition.modelfactory.combinatorial import CombinatorialSelector, CombinatorialFactory
 import klever.core.vtg.emg.decomposition.modelfactory.decomposition_models as test_models
 
 
@@ -219,6 +221,43 @@ def test_double_init_selected(logger, double_init_with_deps_model):
     _expect_models_with_attrs(models, expected)
 
 
+def test_combinatorial_models(logger, driver_model):
+    scenario_generator = LinearStrategy(logger, dict())
+    processes_to_scenarios = {str(process): list(scenario_generator(process, driver_model))
+                              for process in driver_model.non_models.values()}
+
+    # Each combination has a scenario for the first process and a scenario or nothing for others
+    selector = CombinatorialSelector(logger, {}, processes_to_scenarios, driver_model)
+    processes = sorted(processes_to_scenarios)
+    combinations = list(selector._combinations(processes))
+    numbers = [len([s for s in processes_to_scenarios[name] if not s.savepoint]) for name in processes]
+    expected = numbers[0]
+    for number in numbers[1:]:
+        expected *= number + 1
+    assert len(combinations) == expected
+    assert len({tuple((name, id(s)) for name, s in c) for c in combinations}) == len(combinations)
+
+    models = list(CombinatorialFactory(logger, {})(processes_to_scenarios, driver_model))
+    assert len({m.attributed_name for m in models}) == len(models)
+
+
+def test_savepoint_scenarios_are_kept(logger, driver_model):
+    scenario_generator = LinearStrategy(logger, dict())
+    processes_to_scenarios = {str(process): list(scenario_generator(process, driver_model))
+                              for process in driver_model.non_models.values()}
+    actions = {s: set(s.actions.keys()) for group in processes_to_scenarios.values() for s in group}
+    assert any(s.savepoint for s in actions)
+
+    models = list(ModelFactory(logger, {})(processes_to_scenarios, driver_model))
+    for scenario, names in actions.items():
+        assert set(scenario.actions.keys()) == names, f"Scenario '{scenario.name}' was modified"
+
+    # Unchanged processes share actions with the original model
+    model_actions = {id(p.actions) for m in models for p in m.processes}
+    assert any(id(p.actions) in model_actions for p in driver_model.processes)
+    assert not any(id(s.actions) in model_actions for s in actions if s.savepoint)
+
+
 def _to_sorted_attr_str(attrs):
     return ", ".join(f"{k}: {attrs[k]}" for k in sorted(attrs.keys()))
 
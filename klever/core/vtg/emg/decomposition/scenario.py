@@ -44,20 +44,14 @@ class ScenarioCollection(ProcessCollection):
 
     def clone(self, new_name: str):
         """
-        Copy the collection with a new name.
+        Copy the collection with a new name. Scenarios are not changed after their generation, so the copy shares them
+        with the collection.
 
         :param new_name: Name string.
         :return: ScenarioCollection instance.
         """
-        new = ScenarioCollection(self.original_model, new_name)
+        new = ScenarioCollection(self.original_model, new_name, self.entry, dict(self.models), dict(self.environment))
         new.attributes = dict(self.attributes)
-        new.entry = self.entry.clone() if self.entry else None
-        for collection in ('models', 'environment'):
-            for key in getattr(self, collection):
-                if getattr(self, collection)[key]:
-                    getattr(new, collection)[key] = getattr(self, collection)[key].clone()
-                else:
-                    getattr(new, collection)[key] = None
         return new
 
     @property
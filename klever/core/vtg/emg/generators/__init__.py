@@ -48,13 +48,14 @@ def generate_processes(logger, conf, collection, abstract_task_desc, source):
     # Get specifications for each kind of a generator
     possible_locations = [root for root, *_ in os.walk(os.path.dirname(conf['specifications dir']))] + \
                          list(get_search_dirs(conf['main working directory']))
+    index_dir = os.path.join(conf['cache directory'], 'emg', 'specifications') if 'cache directory' in conf else None
 
     for index, (shortname, generator_module) in enumerate(modules):
         # Set debug option
         configurations[index]['keep intermediate files'] = conf.get('keep intermediate files')
 
         generator = generator_module.ScenarioModelgenerator(logger, configurations[index])
-        specifications = generator.import_specifications(specifications_set, possible_locations)
+        specifications = generator.import_specifications(specifications_set, possible_locations, index_dir)
         generator.make_scenarios(abstract_task_desc, collection, source, specifications)
 
         # Now save specifications
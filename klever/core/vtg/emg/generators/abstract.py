@@ -15,10 +15,16 @@
 # limitations under the License.
 #
 
+import os
 import glob
 import json
+import pickle
+import hashlib
 import sortedcontainers
 
+from klever.core.utils import get_file_checksum
+from klever.core.vtg.emg.common.c.types.typeParser import grammar_checksum, preparse_declarations, load_declarations
+
 
 class AbstractGenerator:
     """Abstract generator"""
@@ -41,13 +47,14 @@ class AbstractGenerator:
         """
         raise NotImplementedError
 
-    def import_specifications(self, specifications_set, directories):
+    def import_specifications(self, specifications_set, directories, index_dir=None):
         """
         Import specifications and return merged prepared files with all necessary content for a particular specification
         set.
 
         :param specifications_set: String identifier of the current specification set.
         :param directories: List with directories where to find JSON files.
+        :param index_dir: Directory with compiled indexes of specifications. They are not used if it is not given.
         :return:
         """
         # This is too verbose, use only for manual debugging
@@ -56,15 +63,32 @@ class AbstractGenerator:
         # First collect all files
         file_candidates = {file for path in directories for file in glob.glob('{}/*.json'.format(path))}
 
-        # Then classify them according to file name patterns
-        specification_files = {kind: {f for f in file_candidates if f.endswith(ending)}
+        # Then classify them according to file name patterns. Order files to merge them the same way each time.
+        specification_files = {kind: sorted(f for f in file_candidates if f.endswith(ending))
                                for kind, ending in self.specifications_endings.items()}
 
-        # Then merge them according to specifications set
-        specifications = {kind: self._merge_specifications(specifications_set, files)
-                          for kind, files in specification_files.items()}
-
-        return specifications
+        if not index_dir:
+            return {kind: self._merge_specifications(specifications_set, files)
+                    for kind, files in specification_files.items()}
+
+        # Specifications are the same for all fragments of the job, so merge them once and store the result. Workers
+        # that compile the index simultaneously write their own files and replace the common one atomically.
+        index_file = os.path.join(index_dir, '{}.pickle'.format(
+            self._index_checksum(specifications_set, specification_files)))
+        if os.path.isfile(index_file):
+            with open(index_file, 'rb') as fp:
+                index = pickle.load(fp)
+        else:
+            self.logger.info('Compile index of specifications {!r}'.format(os.path.basename(index_file)))
+            index = self._compile_index(specifications_set, specification_files)
+            os.makedirs(index_dir, exist_ok=True)
+            new_index_file = '{}.{}.tmp'.format(index_file, os.getpid())
+            with open(new_index_file, 'wb') as fp:
+                pickle.dump(index, fp, pickle.HIGHEST_PROTOCOL)
+            os.replace(new_index_file, index_file)
+
+        load_declarations(index['declarations'])
+        return index['specifications']
 
     def save_specification(self, specification: dict, file_name: str):
         """
@@ -79,6 +103,35 @@ class AbstractGenerator:
             self.logger.debug('Save specification %s' % file_name)
             json.dump(specification, fp, indent=2, sort_keys=True)
 
+    def _specification_declarations(self, specifications):
+        """
+        Get C declarations from specifications to parse them in advance.
+
+        :param specifications: dictionary with merged specifications.
+        :return: Iterable with declaration strings.
+        """
+        return []
+
+    def _compile_index(self, specifications_set, specification_files):
+        specifications = {kind: self._merge_specifications(specifications_set, files)
+                          for kind, files in specification_files.items()}
+        return {
+            'specifications': specifications,
+            'declarations': preparse_declarations(self._specification_declarations(specifications))
+        }
+
+    def _index_checksum(self, specifications_set, specification_files):
+        hash_sha256 = hashlib.sha256()
+        key = {
+            'generator': '{}.{}'.format(type(self).__module__, type(self).__qualname__),
+            'specifications set': specifications_set,
+            'grammar': grammar_checksum(),
+            'files': {kind: [(file, get_file_checksum(file)) for file in files]
+                      for kind, files in specification_files.items()}
+        }
+        hash_sha256.update(json.dumps(key, sort_keys=True).encode('utf-8'))
+        return hash_sha256.hexdigest()
+
     def _merge_specifications(self, specifications_set, files):
         merged_specification = sortedcontainers.SortedDict()
         for file in files:
@@ -123,6 +123,20 @@ class ScenarioModelgenerator(AbstractGenerator):
         collection.models.update(new_pure_collection.models)
         collection.establish_peers()
 
+    def _specification_declarations(self, specifications):
+        interface_specification = specifications.get('interface specifications', {})
+        for category in interface_specification.get('categories', {}).values():
+            for kind in ('containers', 'resources', 'callbacks'):
+                for description in category.get(kind, {}).values():
+                    if 'declaration' in description:
+                        yield description['declaration']
+                    yield from description.get('fields', {}).values()
+                    if 'element' in description:
+                        yield description['element']
+        for description in interface_specification.get('functions models', {}).values():
+            if 'declaration' in description:
+                yield description['declaration']
+
     def _merge_specifications(self, specifications_set, files):
         merged_specification = sortedcontainers.SortedDict()
         for file in files:
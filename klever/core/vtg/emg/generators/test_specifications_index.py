@@ -0,0 +1,80 @@
+#
+# Copyright (c) 2019 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import copy
+import json
+import logging
+
+import pytest
+
+from klever.core.vtg.emg.common.c.types.typeParser import parse_declaration, parse_statistics
+from klever.core.vtg.emg.generators.linuxModule import ScenarioModelgenerator
+
+
+INTERFACE_SPECIFICATION = {
+    "5.5": {
+        "categories": {
+            "usb": {
+                "containers": {"driver": {"declaration": "struct usb_driver driver"}},
+                "callbacks": {"probe": {"declaration": "int (*probe)(struct usb_interface *, %usb.driver%)"}}
+            }
+        }
+    },
+    "3.14": {
+        "functions models": {
+            "usb_register": {"declaration": "int usb_register(struct usb_driver *)", "reference": True}
+        }
+    }
+}
+
+
+@pytest.fixture
+def specifications_dir(tmp_path):
+    directory = tmp_path / 'specifications'
+    directory.mkdir()
+    with open(directory / 'usb interface spec.json', 'w', encoding='utf-8') as fp:
+        json.dump(INTERFACE_SPECIFICATION, fp)
+    return directory
+
+
+def test_index(specifications_dir, tmp_path):
+    generator = ScenarioModelgenerator(logging.getLogger(), {})
+    index_dir = tmp_path / 'index'
+    merged = generator.import_specifications('5.5', [str(specifications_dir)])
+
+    # The index is compiled once and gives the same specifications as merging
+    assert generator.import_specifications('5.5', [str(specifications_dir)], str(index_dir)) == merged
+    indexes = list(index_dir.iterdir())
+    assert len(indexes) == 1
+    assert generator.import_specifications('5.5', [str(specifications_dir)], str(index_dir)) == merged
+    assert list(index_dir.iterdir()) == indexes
+
+    # Interface declarations are parsed in advance
+    reused = parse_statistics()['reused']
+    assert parse_declaration('int usb_register(struct usb_driver *)')
+    assert parse_statistics()['reused'] == reused + 1
+
+    # Changed specifications get a new index
+    specification = copy.deepcopy(INTERFACE_SPECIFICATION)
+    specification['5.5']['categories']['usb']['resources'] = {
+        "interface": {"declaration": "struct usb_interface *interface"}
+    }
+    with open(specifications_dir / 'usb interface spec.json', 'w', encoding='utf-8') as fp:
+        json.dump(specification, fp)
+    specifications = generator.import_specifications('5.5', [str(specifications_dir)], str(index_dir))
+    assert 'resources' in specifications['interface specifications']['categories']['usb']
+    assert len(list(index_dir.iterdir())) == 2
@@ -0,0 +1,96 @@
+#
+# Copyright (c) 2021 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import time
+import logging
+import multiprocessing
+
+import pytest
+
+import klever.core.vtg.emg
+from klever.core.components import ComponentError
+from klever.core.vtg.emg import EMG, TranslationWorker
+from klever.core.vtg.emg.common.process import ProcessCollection
+
+MODELS_NUM = 7
+
+
+def fake_translate_model(logger, conf, abstract_task, source, model, program_fragment):
+    if model.name == conf.get('failing model'):
+        raise ValueError('Translation failed')
+    # Later models are translated faster to check that results are still returned in the order of models
+    time.sleep(0.05 * (MODELS_NUM - int(model.name)))
+    description = {'id': '{}/{}'.format(abstract_task['id'], model.name)}
+    images = [('image {}.{}'.format(model.name, i), 'file.dot', 'file.png') for i in range(2)]
+    return description, {'UDEMS': model.name}, images
+
+
+@pytest.fixture
+def translate(monkeypatch, tmp_path):
+    # Workers put their resources to the working directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'child resources').mkdir()
+    monkeypatch.setattr(klever.core.vtg.emg, 'translate_model', fake_translate_model)
+
+    def translate_models(parallelism=None, failing_model=None):
+        conf = {
+            'logging': {'loggers': [{'name': 'default', 'handlers': [{'name': 'console', 'level': 'NONE'}]}]},
+            'keep intermediate files': False,
+            'task resource limits': {},
+            'number of CPU cores': 4
+        }
+        if parallelism is not None:
+            conf['parallelism'] = {'Environment models translation': parallelism}
+        if failing_model is not None:
+            conf['failing model'] = failing_model
+        plugin = EMG(conf, logging.getLogger(), 'VTG', {}, {}, {})
+
+        def models():
+            for number in range(MODELS_NUM):
+                model = ProcessCollection()
+                model.name = str(number)
+                yield model
+
+        return [(model.name, translation) for model, translation in
+                plugin._translate_models(models(), {'id': 'task'}, None, 'fragment')]
+
+    return translate_models
+
+
+def translation_workers():
+    return [p for p in multiprocessing.active_children() if isinstance(p, TranslationWorker)]
+
+
+@pytest.mark.parametrize('parallelism', [2, 3, 0.5])
+def test_parallel_translation(translate, parallelism):
+    sequential = translate()
+    assert [name for name, _ in sequential] == [str(number) for number in range(MODELS_NUM)]
+
+    parallel = translate(parallelism)
+    assert [name for name, _ in parallel] == [name for name, _ in sequential]
+    # UDEMSes and images go in the same order as at sequential translation
+    assert [translation[1] for _, translation in parallel] == [translation[1] for _, translation in sequential]
+    assert [image for _, translation in parallel for image in translation[2]] == \
+        [image for _, translation in sequential for image in translation[2]]
+    assert parallel == sequential
+    assert not translation_workers()
+
+
+def test_failed_translation(translate):
+    with pytest.raises(ComponentError):
+        translate(3, failing_model='2')
+    assert not translation_workers()
@@ -50,14 +50,16 @@ def translate_intermediate_model(logger, conf, avt, source, collection, udemses,
 
     :param logger: Logger object.
     :param conf: Configuration dictionary for the whole EMG.
-    :param avt: Verification task dictionary.
+    :param avt: Verification task dictionary. It is not modified, the returned one shares unchanged parts with it.
     :param source: Source object.
     :param collection: ProcessCollection object.
     :param udemses: Dictionary with UDEMSes to put the new one.
     :param program_fragment: Name of program fragment for which EMG generates environment models.
     :param images: List of images to be reported to the server.
-    :return: None.
+    :return: Verification task dictionary.
     """
+    avt = dict(avt)
+
     # Prepare main configuration properties
     logger.info(f"Translate '{collection.attributed_name}' with an identifier {collection.name}")
     conf['translation options'].setdefault('entry point', 'main')
@@ -129,7 +131,7 @@ def translate_intermediate_model(logger, conf, avt, source, collection, udemses,
     entry_file = os.path.join(model_path,
                               conf['translation options'].get('environment model file', 'environment_model.c'))
     entry_point_name = get_or_die(conf['translation options'], 'entry point')
-    files = source.c_full_paths
+    files = set(source.c_full_paths)
     if entry_file not in files:
         files.add(entry_file)
         try:
@@ -237,23 +239,23 @@ def translate_intermediate_model(logger, conf, avt, source, collection, udemses,
                               conf['translation options'].get("code additional aspects")]
     else:
         additional_aspects = []
+    avt['grps'] = [dict(grp, **{'Extra CCs': list(grp['Extra CCs'])}) for grp in avt['grps']]
     for grp in avt['grps']:
         # Todo maybe this will not work with ccs with multiple ins
         logger.info('Add aspects to C files of group {!r}'.format(grp['id']))
-        for cc_extra_full_desc_file in [f for f in grp['Extra CCs'] if 'in file' in f]:
-            if cc_extra_full_desc_file["in file"] in addictions:
-                if 'plugin aspects' not in cc_extra_full_desc_file:
-                    cc_extra_full_desc_file['plugin aspects'] = []
-                cc_extra_full_desc_file['plugin aspects'].append(
+        for num, cc_extra_full_desc_file in enumerate(grp['Extra CCs']):
+            if 'in file' in cc_extra_full_desc_file and cc_extra_full_desc_file["in file"] in addictions:
+                grp['Extra CCs'][num] = dict(cc_extra_full_desc_file)
+                grp['Extra CCs'][num]['plugin aspects'] = cc_extra_full_desc_file.get('plugin aspects', []) + [
                     {
                         "plugin": "EMG",
                         "aspects": [addictions[cc_extra_full_desc_file["in file"]]] + additional_aspects
                     }
-                )
+                ]
 
     extra_c_files = {f for p in list(collection.models.values()) + list(collection.environment.values()) +
                      [collection.entry] for f in p.cfiles}
-    avt.setdefault('extra C files', list())
+    avt['extra C files'] = list(avt.get('extra C files', list()))
     avt['extra C files'].extend([
         {"C file": os.path.realpath(find_file_or_dir(logger,
                                                      get_or_die(conf, "main working directory"), f))}
@@ -139,6 +139,17 @@ class Basic:
         # Save to task its class.
         task_desc['solution class'] = self.conf['solution class']
 
+        # Describe the task to let Scheduler predict resources necessary for its solution.
+        c_files = [os.path.join(self.conf['main working directory'], extra_c_file['C file']) for
+                   extra_c_file in self.abstract_task_desc['extra C files'] if 'C file' in extra_c_file]
+        task_desc['features'] = {
+            'program fragment': self.conf.get('program fragment', self.abstract_task_desc['id']),
+            'requirement': self.conf['solution class'],
+            'environment model attributes': self.conf.get('environment model attributes', {}),
+            'size': sum(os.path.getsize(c_file) for c_file in c_files if os.path.isfile(c_file)),
+            'files': len(c_files)
+        }
+
         # Keep reference to additional sources. It will be used for verification reports.
         task_desc['additional sources'] = self.abstract_task_desc['additional sources']
 
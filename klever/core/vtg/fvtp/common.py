@@ -20,6 +20,7 @@ import re
 import zipfile
 import json
 import klever.core.utils
+from klever.core.vtg.cache import ResultsCache, DEFAULT_CACHE_SIZE, get_exec_checksum
 
 
 def merge_files(logger, conf, abstract_task_desc):
@@ -36,10 +37,11 @@ def merge_files(logger, conf, abstract_task_desc):
     else:
         logger.info('Merge source files by means of CIL')
 
+        input_files = [os.path.join(conf['main working directory'], extra_c_file['C file'])
+                       for extra_c_file in abstract_task_desc['extra C files'] if 'C file' in extra_c_file]
         with open('input files', 'w', encoding='utf-8') as fp:
-            for extra_c_file in abstract_task_desc['extra C files']:
-                if 'C file' in extra_c_file:
-                    fp.write(os.path.join(conf['main working directory'], extra_c_file['C file']) + '\n')
+            for input_file in input_files:
+                fp.write(input_file + '\n')
 
         args = ['toplevel.opt'] + \
             conf.get('CIL additional opts', []) + \
@@ -75,14 +77,28 @@ def merge_files(logger, conf, abstract_task_desc):
                 '-more-files', 'input files'
             ]
 
-        klever.core.utils.execute(logger, args=args, enforce_limitations=True,
-                                  cpu_time_limit=conf["resource limits"]["CPU time for executed commands"],
-                                  memory_limit=conf["resource limits"]["memory size for executed commands"])
-        # There will be empty file if CIL succeeded. Remove it to avoid unknown reports of whole FVTP later.
-        if os.path.isfile('problem desc.txt'):
-            os.unlink('problem desc.txt')
-
-        logger.debug('Merged source files was outputted to "cil.i"')
+        # Tasks for different requirements specifications often merge the same woven in C files, so CIL results are
+        # shared between them. Input files are identified by their checksums in the given order.
+        cil_cache = ResultsCache(logger, os.path.join(conf['cache directory'], 'cil'),
+                                 conf.get('CIL cache size', DEFAULT_CACHE_SIZE))
+        cache_key = ResultsCache.get_key(
+            [klever.core.utils.get_file_checksum(input_file) for input_file in input_files],
+            args,
+            get_exec_checksum('toplevel.opt'))
+        with cil_cache.lock(cache_key):
+            cache_entry = cil_cache.get(cache_key)
+            if cache_entry and cil_cache.materialize(cache_entry, 'cil.i', 'cil.i'):
+                logger.info('Get merged source files from cache')
+            else:
+                klever.core.utils.execute(logger, args=args, enforce_limitations=True,
+                                          cpu_time_limit=conf["resource limits"]["CPU time for executed commands"],
+                                          memory_limit=conf["resource limits"]["memory size for executed commands"])
+                # There will be empty file if CIL succeeded. Remove it to avoid unknown reports of whole FVTP later.
+                if os.path.isfile('problem desc.txt'):
+                    os.unlink('problem desc.txt')
+
+                logger.debug('Merged source files was outputted to "cil.i"')
+                cil_cache.publish(cache_key, {'cil.i': 'cil.i'})
 
     return 'cil.i'
 
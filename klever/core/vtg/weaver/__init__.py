@@ -28,6 +28,7 @@ import klever.core.utils
 import klever.core.vtg.utils
 import klever.core.vtg.plugins
 from klever.core.cross_refs import CrossRefs
+from klever.core.vtg.cache import ResultsCache, DEFAULT_CACHE_SIZE, get_exec_checksum
 
 
 class Weaver(klever.core.vtg.plugins.Plugin):
@@ -75,8 +76,9 @@ class Weaver(klever.core.vtg.plugins.Plugin):
 
         self.logger.info('Start Weaver pull of workers')
 
-        # Here workers will put their results, namely, paths to extra C files.
-        vals = {'extra C files': multiprocessing.Manager().list()}
+        # Here workers will put their results, namely, paths to extra C files, and whether they got them from cache.
+        manager = multiprocessing.Manager()
+        vals = {'extra C files': manager.list(), 'weave cache statistics': manager.list()}
 
         # Lock to mutually exclude Weaver workers from each other.
         lock = multiprocessing.Manager().Lock()
@@ -110,6 +112,8 @@ class Weaver(klever.core.vtg.plugins.Plugin):
         self.abstract_task_desc['extra C files'] = list(vals['extra C files'])
         extra_cc_indexes_queue.close()
 
+        self.__submit_cache_statistics(list(vals['weave cache statistics']))
+
         # For auxiliary files there is no cross references since it is rather hard to get them from Aspectator. But
         # there still highlighting.
         if self.conf['code coverage details'] == 'All source files':
@@ -165,6 +169,30 @@ class Weaver(klever.core.vtg.plugins.Plugin):
 
     main = weave
 
+    def __submit_cache_statistics(self, statistics):
+        klever.core.utils.report(
+            self.logger,
+            'patch',
+            {
+                'identifier': self.id,
+                'attrs': [{
+                    'name': 'Weave cache',
+                    'value': [
+                        {
+                            'name': 'hits',
+                            'value': str(statistics.count('hit'))
+                        },
+                        {
+                            'name': 'misses',
+                            'value': str(statistics.count('miss'))
+                        }
+                    ]
+                }]
+            },
+            self.mqs['report files'],
+            self.vals['report id'],
+            self.conf['main working directory'])
+
 
 class WeaverWorker(klever.core.components.Component):
     def __init__(self, conf, logger, parent_id, callbacks, mqs, vals, id=None, work_dir=None, attrs=None,
@@ -214,8 +242,6 @@ class WeaverWorker(klever.core.components.Component):
             # processes will see it and do generate a new unique output file.
             with open(outfile_unique, 'w'):
                 pass
-        # This is used for storing/getting to/from cache where uniqueness is guaranteed by other means.
-        outfile = '{0}.i'.format(os.path.splitext(os.path.basename(infile))[0])
         self.logger.info('Weave in C file "{0}"'.format(infile))
 
         # Produce aspect to be weaved in.
@@ -273,56 +299,80 @@ class WeaverWorker(klever.core.components.Component):
         cwd = self.clade.get_storage_path(cc['cwd'])
 
         is_model = (self.grp_id == 'models')
+        # Original sources do not need cross references since this was already done before.
+        get_cross_refs = is_model and self.conf['code coverage details'] != 'Original C source files'
 
-        # Original sources should be woven in and we do not need to get cross references for them since this
-        # was already done before.
-        if not is_model:
-            self.__weave(infile, opts, aspect, outfile_unique, cwd, is_model)
         # For generated models we need to weave them in (actually, just pass through C Back-end) and to get
         # cross references always since most likely they all are different.
-        elif 'generated' in self.extra_cc:
+        if 'generated' in self.extra_cc:
             self.__weave(infile, opts, aspect, outfile_unique, cwd, is_model)
-            if self.conf['code coverage details'] != 'Original C source files':
+            if get_cross_refs:
                 self.__get_cross_refs(infile, opts, outfile_unique, cwd)
-        # For non-generated models use results cache in addition.
-        else:
-            cache_name = klever.core.utils.get_file_name_checksum(infile)[:32]
-
-            # Different requirement specifications can bring different sets of aspects and they can affect models when
-            # one requests for weaving in them with aspects. Let's distinguish cache directories for different aspects.
-            if aspect:
-                cache_name += klever.core.utils.get_file_checksum(aspect)[:32]
-
-            cache_dir = os.path.join(self.conf['cache directory'], cache_name)
-            with klever.core.utils.LockedOpen(cache_dir + '.tmp', 'w'):
-                if os.path.exists(cache_dir):
-                    self.logger.info('Get woven in C file from cache')
-                    outfile = os.path.join(cache_dir, os.path.basename(outfile))
-                    if not os.path.exists(outfile):
-                        raise FileExistsError('Cache misses woven in C file (perhaps your models are broken)')
-                    self.vals['extra C files'].append(
-                         {'C file': os.path.relpath(outfile, self.conf['main working directory'])})
-                    if self.conf['code coverage details'] != 'Original C source files':
-                        self.logger.info('Get cross references from cache')
-                        additional_srcs = os.path.join(cache_dir, 'additional sources')
-                        if not os.path.exists(additional_srcs):
-                            raise FileExistsError(
-                                'Cache misses cross references (perhaps your models are broken)')
-                        self.__merge_additional_srcs(os.path.join(cache_dir, 'additional sources'))
-                else:
-                    os.makedirs(cache_dir)
-                    self.__weave(infile, opts, aspect, outfile_unique, cwd, is_model)
-                    self.logger.info('Store woven in C file to cache')
-                    shutil.copy(outfile_unique, os.path.join(cache_dir, outfile))
+            return
+
+        # Original sources and non-generated models are woven in identically for the same input files, options, aspects
+        # and CIF, e.g. for different requirements specifications, so results are shared between verification tasks.
+        weave_cache = ResultsCache(self.logger,
+                                   self.conf.get('weave cache directory',
+                                                 os.path.join(self.conf['cache directory'], 'weaver')),
+                                   self.conf.get('weave cache size', DEFAULT_CACHE_SIZE))
+        cache_key = self.__get_cache_key(infile, opts, aspect, cwd, is_model, get_cross_refs)
+        with weave_cache.lock(cache_key):
+            cache_entry = weave_cache.get(cache_key)
+            if cache_entry and self.__get_from_cache(weave_cache, cache_entry, outfile_unique, get_cross_refs):
+                self.vals['weave cache statistics'].append('hit')
+                return
+
+            self.vals['weave cache statistics'].append('miss')
+            self.__weave(infile, opts, aspect, outfile_unique, cwd, is_model)
+            cache_files = {'woven.i': outfile_unique}
+            if get_cross_refs:
+                self.__get_cross_refs(infile, opts, outfile_unique, cwd)
+                cache_files['additional sources'] = outfile_unique + ' additional sources'
 
-                    if self.conf['code coverage details'] != 'Original C source files':
-                        self.__get_cross_refs(infile, opts, outfile_unique, cwd)
-                        self.logger.info('Store cross references to cache')
-                        shutil.copytree(outfile_unique + ' additional sources',
-                                        os.path.join(cache_dir, 'additional sources'))
+            self.logger.info('Store woven in C file to cache')
+            weave_cache.publish(cache_key, cache_files)
 
     main = process_extra_cc
 
+    def __get_cache_key(self, infile, opts, aspect, cwd, is_model, get_cross_refs):
+        cif = klever.core.vtg.utils.get_cif_or_aspectator_exec(self.conf, 'cif')
+        return ResultsCache.get_key(
+            infile,
+            klever.core.utils.get_file_checksum(infile),
+            # Normalized options are those that are actually passed to CIF.
+            klever.core.vtg.utils.prepare_cif_opts(opts, self.clade, is_model),
+            klever.core.utils.get_file_checksum(aspect) if aspect else None,
+            cwd,
+            self.conf['common headers'],
+            self.conf.get('aspect preprocessing options'),
+            self.conf['working source trees'],
+            self.conf['specifications base'],
+            sorted((name, value) for name, value in self.env.items() if name.startswith('LDV_')),
+            cif,
+            get_exec_checksum(cif),
+            is_model,
+            get_cross_refs
+        )
+
+    def __get_from_cache(self, weave_cache, cache_entry, outfile, get_cross_refs):
+        self.logger.info('Get woven in C file from cache')
+        if not weave_cache.materialize(cache_entry, 'woven.i', outfile):
+            return False
+
+        try:
+            if get_cross_refs:
+                self.logger.info('Get cross references from cache')
+                self.__merge_additional_srcs(os.path.join(cache_entry, 'additional sources'))
+        except OSError as e:
+            # The entry could be evicted while it was being copied.
+            self.logger.warning('Could not get cross references from cache: {0}'.format(e))
+            return False
+
+        self.vals['extra C files'].append(
+            {'C file': os.path.relpath(outfile, self.conf['main working directory'])})
+        return True
+
     def __weave(self, infile, opts, aspect, outfile, cwd, is_model):
         common_headers = []
         for common_header in self.conf['common headers']:
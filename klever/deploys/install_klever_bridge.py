@@ -30,6 +30,9 @@ def _install_klever_bridge(logger, update):
     logger.info('Migrate database')
     execute_cmd(logger, sys.executable, './manage.py', 'migrate')
 
+    logger.info('Create indexes for attributes of leaves')
+    execute_cmd(logger, sys.executable, './manage.py', 'attr-indexes')
+
     logger.info('Populate database')
     # We need to create users once. Otherwise this can overwrite their settings changed manually.
     if not update:
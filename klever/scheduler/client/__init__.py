@@ -200,7 +200,11 @@ def solve_task(logger, conf, srv):
     if conf.get('speculative', False) and \
             decision_results.get('status', True) in ('OUT OF JAVA MEMORY', 'OUT OF MEMORY', 'TIMEOUT',
                                                      'SEGMENTATION FAULT', 'TIMEOUT (OUT OF JAVA MEMORY)') and \
-            decision_results["resources"]["memory size"] >= 0.7 * decision_results['resource limits']['memory size']:
+            (decision_results["resources"]["memory size"] >=
+             0.7 * decision_results['resource limits']['memory size'] or
+             (decision_results['resource limits'].get('CPU time') and
+              decision_results["resources"]["CPU time"] >=
+              0.9 * 1000 * decision_results['resource limits']['CPU time'])):
         logger.info("Do not upload solution since limits are reduced and we got: {!r}".
                     format(decision_results['status']))
         decision_results['uploaded'] = False
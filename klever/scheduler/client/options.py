@@ -27,10 +27,34 @@ def adjust_options(file, conf):
     :param conf: Dictionary with the configuration of the client.
     :return: None
     """
+    time_limit_adjustment(file, conf)
     if conf['verifier']['name'] == 'CPAchecker':
         cpa_adjustment(file, conf)
 
 
+def time_limit_adjustment(file, conf):
+    """
+    Decrease CPU time limits of the benchmark if the scheduler has set a tighter CPU time limit for the task.
+
+    :param file: XML file for BenchExec.
+    :param conf: Dictionary with the configuration of the client.
+    :return: None
+    """
+    restriction = conf['resource limits'].get('CPU time')
+    if not restriction:
+        return
+
+    tree = ElementTree.parse(file)
+    root = tree.getroot()
+    hard_limit = root.attrib.get('hardtimelimit')
+    if hard_limit and int(hard_limit) > int(restriction):
+        root.set('hardtimelimit', str(int(restriction)))
+        if root.attrib.get('timelimit'):
+            # Keep the ratio between soft and hard limits
+            root.set('timelimit', str(int(int(root.attrib['timelimit']) * int(restriction) / int(hard_limit))))
+        tree.write(file, encoding='utf-8')
+
+
 def cpa_adjustment(file, conf):
     """
     This function adds fixes to configuration.
@@ -215,9 +215,8 @@ class Scheduler:
                                 self.runner.cancel_job(identifier, self._jobs[identifier],
                                                        self.relevant_tasks(identifier))
                             self.server.submit_job_status(identifier, self._job_status('CANCELLED'))
-                            for task_id, status in self.server.get_job_tasks(identifier):
-                                if status in ('PENDING', 'PROCESSING'):
-                                    self.server.submit_task_status(task_id, 'CANCELLED')
+                            for task_id, _ in self.server.get_job_tasks(identifier, ('PENDING', 'PROCESSING')):
+                                self.server.submit_task_status(task_id, 'CANCELLED')
                             if identifier in self._jobs:
                                 del self._jobs[identifier]
                         else:
@@ -0,0 +1,126 @@
+#
+# Copyright (c) 2018 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import math
+import sqlite3
+import time
+
+
+class LimitsPredictor:
+    """
+    Predict resource consumption of verification tasks on the basis of solutions of similar tasks from earlier jobs.
+
+    Tasks are described by features that Core provides: a program fragment, its size and number of files, a
+    requirement and environment model attributes. Solutions are kept in the SQLite database, so they are available for
+    all subsequent jobs.
+    """
+
+    # Reserve for inaccuracy of predictions
+    margin = 1.3
+    # Number of tasks checking the same requirement for fragments of close sizes that are enough for prediction
+    neighbours = 5
+    # Number of the latest solutions of each requirement that are considered
+    history = 1000
+    # Predicted limits are never less than these ones
+    min_memory = 500 * 1000 ** 2
+    min_cpu_time = 60
+
+    def __init__(self, logger, db_file):
+        self.logger = logger
+        self._connection = sqlite3.connect(db_file)
+        with self._connection:
+            self._connection.execute("""
+CREATE TABLE IF NOT EXISTS solutions (
+  fragment TEXT NOT NULL,
+  requirement TEXT NOT NULL,
+  envattrs TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  files INTEGER NOT NULL,
+  memory INTEGER NOT NULL,
+  cpu_time REAL NOT NULL,
+  created REAL NOT NULL
+)""")
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS solutions_task ON solutions (fragment, requirement, envattrs)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS solutions_requirement ON solutions (requirement)")
+
+    @staticmethod
+    def _key(features):
+        return (features['program fragment'], features['requirement'],
+                json.dumps(features.get('environment model attributes', {}), sort_keys=True))
+
+    def add(self, features, resources):
+        """
+        Save resources consumed at solving the task.
+
+        :param features: Dictionary with task features.
+        :param resources: Dictionary with consumed memory size in bytes and CPU time in ms.
+        """
+        with self._connection:
+            self._connection.execute(
+                "INSERT INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._key(features) + (int(features.get('size', 0)), int(features.get('files', 0)),
+                                       int(resources['memory size']), resources['CPU time'] / 1000, time.time()))
+
+    def predict(self, features):
+        """
+        Predict resource limits for the task.
+
+        :param features: Dictionary with task features.
+        :return: Dictionary with memory size in bytes and CPU time in seconds or None if there is no similar tasks.
+        """
+        fragment, requirement, envattrs = self._key(features)
+
+        # Prior attempts of the same task or at least of the same fragment and requirement are the best estimation
+        for query, params in (
+                ("fragment = ? AND requirement = ? AND envattrs = ?", (fragment, requirement, envattrs)),
+                ("fragment = ? AND requirement = ?", (fragment, requirement))):
+            rows = self._connection.execute(
+                "SELECT MAX(memory), MAX(cpu_time) FROM solutions WHERE {}".format(query), params).fetchone()
+            if rows[0] is not None:
+                return self._limits(rows[0], rows[1])
+
+        # Otherwise consider tasks checking the same requirement for fragments of close sizes
+        size = max(int(features.get('size', 0)), 1)
+        files = max(int(features.get('files', 0)), 1)
+        rows = self._connection.execute(
+            "SELECT size, files, memory, cpu_time FROM solutions WHERE requirement = ? ORDER BY created DESC LIMIT ?",
+            (requirement, self.history)).fetchall()
+        if len(rows) < self.neighbours:
+            return None
+
+        def distance(row):
+            return abs(math.log(size / max(row[0], 1))) + abs(math.log(files / max(row[1], 1)))
+
+        memory = []
+        cpu_time = []
+        for row_size, _, row_memory, row_cpu_time in sorted(rows, key=distance)[:self.neighbours]:
+            # Consumption grows with size of fragments
+            scale = max(1, size / max(row_size, 1))
+            memory.append(row_memory * scale)
+            cpu_time.append(row_cpu_time * scale)
+
+        # Take the upper quartile of estimations to be robust to outliers
+        quartile = len(memory) * 3 // 4
+        return self._limits(sorted(memory)[quartile], sorted(cpu_time)[quartile])
+
+    def _limits(self, memory, cpu_time):
+        return {
+            'memory size': max(int(memory * self.margin), self.min_memory),
+            'CPU time': max(int(math.ceil(cpu_time * self.margin)), self.min_cpu_time)
+        }
@@ -16,8 +16,11 @@
 #
 
 import math
+import os
+
 import klever.scheduler.utils as utils
 from klever.scheduler.schedulers import SchedulerException
+from klever.scheduler.schedulers.predictor import LimitsPredictor
 
 def incmean(prevmean, n, x):
     """Calculate incremental mean"""
@@ -426,6 +429,10 @@ class SpeculativeSimple(Runner):
         self._problematic = dict()
         # Data about job tasks
         self._jdata = dict()
+        # Resources consumed by tasks of previous jobs
+        self._predictor = LimitsPredictor(
+            self.logger, self.conf["scheduler"].get("resource limits database",
+                                                    os.path.join(self.work_dir, "resource limits.sqlite3")))
 
     def prepare_task(self, identifier, item):
         """
@@ -658,10 +665,12 @@ class SpeculativeSimple(Runner):
 
         # Start tracking the element
         element = self._is_there_or_init(job_identifier, attribute, identifier)
+        element["features"] = item["description"].get("features")
         limits = dict(job_limitations)
 
         # Check do we have some statistics already
         speculative = False
+        prediction = self._predictor.predict(element["features"]) if element["features"] else None
 
         if limits.get('memory size', 0) <= 0:
             message += 'There is no memory size limitation at solving task {}.'
@@ -670,6 +679,16 @@ class SpeculativeSimple(Runner):
         elif self._is_there(job_identifier, attribute, identifier):
             limits = dict(qos)
             message = 'Set QoS limit for the task {}'.format(identifier)
+        elif prediction:
+            for resource in ('memory size', 'CPU time'):
+                if limits.get(resource):
+                    limits[resource] = min(limits[resource], prediction[resource])
+            if limits != job_limitations:
+                message = "Try running task {} with predicted limitations {}B and {}s".\
+                          format(identifier, limits['memory size'], limits.get('CPU time'))
+                speculative = True
+            else:
+                message += "Prediction is not less than the job limit."
         elif not job.get("total tasks", None) or job.get("solved", 0) <= (0.05 * job.get("total tasks", 0)):
             message += 'We have not enough solved tasks (5%) to yield speculative limit'
         elif not job["limits"][attribute]["statistics"] or job["limits"][attribute]["statistics"]["number"] <= 5:
@@ -754,6 +773,8 @@ class SpeculativeSimple(Runner):
                 format(identifier, attribute, status, resources['memory size'], int(resources['CPU time'] / 1000)))
 
             if solution['uploaded']:
+                if element.get("features"):
+                    self._predictor.add(element["features"], resources)
                 self._del_task(job_identifier, attribute, identifier)
                 self._add_statisitcs(job, attribute, resources)
                 self.logger.info("Accept task {}".format(identifier))
@@ -158,17 +158,18 @@ class Server:
         self.scheduler_type = scheduler_type
         self.session = bridge.Session(self.logger, self.conf["name"], self.conf["user"], self.conf["password"])
 
-    def get_job_tasks(self, identifier):
+    def get_job_tasks(self, identifier, statuses=None):
         """
         Get all tasks related to a particular job from Bridge.
 
         :param identifier: Job identifier
+        :param statuses: Get just tasks with given statuses if specified.
         :return: ((id, status), ...)
         """
         self.logger.debug(f'Request tasks for job {identifier}')
-        ret = self.session.json_exchange("service/tasks/?job={}&fields=status&fields=id".format(identifier),
-                                         method='GET')
-        return ((item['id'], item['status']) for item in ret)
+        ret = self.session.json_exchange("service/task-changes/{}/?{}".format(
+            identifier, '&'.join('status={}'.format(status) for status in statuses or [])), method='GET')
+        return ((task_id, status) for task_id, status, _ in ret)
 
     def get_all_jobs(self):
         """
@@ -190,8 +191,8 @@ class Server:
         :return: ((id, status))
         """
         self.logger.debug(f'Request a list of all running tasks')
-        ret = self.session.json_exchange("service/tasks/?fields=status&fields=id&fields=id", method='GET')
-        return ((item['id'], item['status']) for item in ret)
+        ret = self.session.json_exchange("service/task-changes/", method='GET')
+        return ((task_id, status) for task_id, status, _ in ret)
 
     def submit_nodes(self, nodes, looping=True):
         """